@@ -0,0 +1,185 @@
+"""
+ZIP archive members as pipeline files, without unpacking archives to disk.
+
+A member is addressed by a virtual path: the archive path, '!/' and the member
+name, repeated for nested archives ('/data/a.zip!/2024/b.zip!/acta.docx').
+Scanning lists the members with allowed extensions; io_accounting routes
+open/stat/move of a virtual path here, so hashing, validation and the readers
+stream members (small ones from memory) and a member is only extracted when
+it is moved into the organized tree. The archives themselves are left as they are.
+
+Since the archives keep their members, every run over the same folder finds and
+extracts them again (loose files, in contrast, are gone once organized). Run
+--archives once per folder, or remove the archives after checking a run;
+restore.py removes the extracted copies of a run (its manifest entries whose
+original_path is a member).
+"""
+import io
+import os
+import stat
+import shutil
+import logging
+import zipfile
+import datetime
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+from .config import ALLOWED_EXTENSIONS, ARCHIVES
+
+SEPARATOR = "!/"
+ARCHIVE_EXTENSIONS = ('.zip',)
+
+_READABLE = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA)
+_CACHE_SIZE = 16
+
+class ArchiveCache:
+    """
+    Open ZipFile objects by archive path (virtual for nested ones), so the central
+    directory is parsed once per archive instead of once per member access.
+    Beyond _CACHE_SIZE archives the least recently used one is closed.
+    Each run has its own (see use_cache), so closing it at the end of one run
+    leaves the archives of runs still going open.
+    """
+
+    def __init__(self):
+        self._archives = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> zipfile.ZipFile:
+        with self._lock:
+            zf = self._archives.get(path)
+            if zf is not None:
+                self._archives.move_to_end(path)
+                return zf
+        if is_member(path):
+            zf = zipfile.ZipFile(_open_member(*split_member(path), cache=self))
+        else:
+            zf = zipfile.ZipFile(path)
+        with self._lock:
+            self._archives[path] = zf
+            while len(self._archives) > _CACHE_SIZE:
+                # Member streams already open keep their own reference to the archive file
+                self._archives.popitem(last=False)[1].close()
+        return zf
+
+    def close(self):
+        """Closes and forgets the open archives."""
+        with self._lock:
+            for zf in self._archives.values():
+                zf.close()
+            self._archives.clear()
+
+# Used by threads outside any use_cache() block
+_default_cache = ArchiveCache()
+_local = threading.local()
+
+def current_cache() -> ArchiveCache:
+    """The cache installed on this thread by use_cache, or the shared default one."""
+    return getattr(_local, 'cache', None) or _default_cache
+
+@contextlib.contextmanager
+def use_cache(cache: ArchiveCache) -> Iterator[ArchiveCache]:
+    """Makes this thread open archives through cache inside the block."""
+    outer = getattr(_local, 'cache', None)
+    _local.cache = cache
+    try:
+        yield cache
+    finally:
+        _local.cache = outer
+
+def is_member(path: str) -> bool:
+    archive, separator, _ = path.partition(SEPARATOR)
+    return bool(separator) and is_archive(archive)
+
+def is_archive(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in ARCHIVE_EXTENSIONS
+
+def split_member(path: str) -> Tuple[str, str]:
+    """'a.zip!/b.zip!/c.pdf' -> ('a.zip!/b.zip', 'c.pdf')."""
+    archive, _, name = path.rpartition(SEPARATOR)
+    return archive, name
+
+def _archive(path: str) -> zipfile.ZipFile:
+    return current_cache().get(path)
+
+def _open_member(archive: str, name: str, cache: Optional[ArchiveCache] = None):
+    """Stream of member name of archive: in memory up to archives.in_memory_mb, streamed beyond."""
+    cache = cache or current_cache()
+    for attempt in range(2):
+        zf = cache.get(archive)
+        try:
+            info = zf.getinfo(name)
+            if info.file_size <= ARCHIVES['in_memory_mb'] * 1024 * 1024:
+                return io.BytesIO(zf.read(info))
+            return zf.open(info)
+        except ValueError:
+            # Evicted and closed by another thread in between: open the archive again
+            if attempt:
+                raise
+
+def clear_cache():
+    """Closes and forgets the archives of this thread's cache (call at the end of a run)."""
+    current_cache().close()
+
+def list_members(archive_path: str, depth: int = 1) -> List[str]:
+    """
+    Virtual paths of the members of archive_path with allowed extensions, descending
+    into nested archives up to archives.max_depth levels. Encrypted members, members
+    with unsupported compression and unreadable archives are skipped with a warning.
+    """
+    try:
+        zf = _archive(archive_path)
+        infos = zf.infolist()
+    except (OSError, zipfile.BadZipFile, KeyError, NotImplementedError, RuntimeError) as e:
+        logging.warning(f"Skipping unreadable archive {archive_path}: {e}")
+        return []
+
+    members = []
+    for info in infos:
+        if info.is_dir():
+            continue
+        path = archive_path + SEPARATOR + info.filename
+        ext = os.path.splitext(info.filename)[1].lower()
+        if ext not in ALLOWED_EXTENSIONS and ext not in ARCHIVE_EXTENSIONS:
+            continue
+        if info.flag_bits & 0x1 or info.compress_type not in _READABLE:
+            logging.warning(f"Skipping encrypted or unsupported archive member: {path}")
+            continue
+        if ext in ALLOWED_EXTENSIONS:
+            members.append(path)
+        elif depth < ARCHIVES['max_depth']:
+            members.extend(list_members(path, depth + 1))
+        else:
+            logging.warning(f"Nested archive deeper than {ARCHIVES['max_depth']} levels not scanned: {path}")
+    return members
+
+def member_info(path: str) -> zipfile.ZipInfo:
+    archive, name = split_member(path)
+    try:
+        return _archive(archive).getinfo(name)
+    except KeyError:
+        raise FileNotFoundError(f"No such archive member: {path}")
+
+def open_member(path: str):
+    """Readable, seekable stream of a member: in memory up to archives.in_memory_mb, streamed beyond."""
+    archive, name = split_member(path)
+    try:
+        return _open_member(archive, name)
+    except KeyError:
+        raise FileNotFoundError(f"No such archive member: {path}")
+
+def stat_member(path: str) -> os.stat_result:
+    """stat() of a member: its uncompressed size and archive timestamp as size, mtime and ctime."""
+    info = member_info(path)
+    timestamp = datetime.datetime(*info.date_time).timestamp()
+    return os.stat_result((stat.S_IFREG | 0o444, 0, 0, 1, 0, 0, info.file_size, timestamp, timestamp, timestamp))
+
+def extract_member(path: str, dest_path: str) -> int:
+    """Copies a member to dest_path (which must not exist). Returns the bytes written."""
+    with open_member(path) as src, open(dest_path, 'xb') as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+        written = dst.tell()
+    mtime = stat_member(path).st_mtime
+    os.utime(dest_path, (mtime, mtime))
+    return written
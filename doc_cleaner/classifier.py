@@ -1,34 +1,103 @@
 import re
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from .config import TOPIC_KEYWORDS
 
-def classify_document(metadata: Dict[str, str]) -> str:
+def score_text(text: str) -> Dict[str, int]:
     """
-    Classifies the document based on extracted metadata (title, subtitle, sample_text).
-    Returns the detected topic key (e.g., 'PROCEDIMIENTO', 'FORMATO') or 'GENERIC'.
-    Uses a scoring system with regex word boundary checks.
+    Counts keyword hits per topic in text (case-insensitive, whole words).
     """
-    # Combine all text for search
-    full_text = f"{metadata.get('title', '')} {metadata.get('subtitle', '')} {metadata.get('sample_text', '')}".lower()
-    
+    text = text.lower()
     scores = {topic: 0 for topic in TOPIC_KEYWORDS.keys()}
-    
+
     for topic, keywords in TOPIC_KEYWORDS.items():
-        if topic == 'GENERIC': continue 
-        
+        if topic == 'GENERIC': continue
+
         for kw in keywords:
             # Escape keyword just in case, though currently they are simple words
             pattern = r'\b' + re.escape(kw.lower()) + r'\b'
-            matches = re.findall(pattern, full_text)
+            matches = re.findall(pattern, text)
             scores[topic] += len(matches)
-            
-    # Find topic with highest score
+
+    return scores
+
+def pick_topic(scores: Dict[str, int]) -> str:
+    """Topic with the highest score, or 'GENERIC' when nothing matched (first topic wins ties)."""
     best_topic = 'GENERIC'
     max_score = 0
-    
+
     for topic, score in scores.items():
         if score > max_score:
             max_score = score
             best_topic = topic
-            
+
     return best_topic
+
+def classify_document(metadata: Dict[str, str]) -> str:
+    """
+    Classifies the document based on extracted metadata (title, subtitle, sample_text).
+    Returns the detected topic key (e.g., 'PROCEDIMIENTO', 'FORMATO') or 'GENERIC'.
+    Uses a scoring system with regex word boundary checks.
+    """
+    # Combine all text for search
+    full_text = f"{metadata.get('title', '')} {metadata.get('subtitle', '')} {metadata.get('sample_text', '')}"
+
+    # Find topic with highest score
+    return pick_topic(score_text(full_text))
+
+def classify_with_score(metadata: Dict[str, str]) -> Tuple[str, int]:
+    """
+    Same as classify_document, also returning the winning topic's score
+    (0 for 'GENERIC') so callers can judge how confident the decision is.
+    """
+    full_text = f"{metadata.get('title', '')} {metadata.get('subtitle', '')} {metadata.get('sample_text', '')}"
+    scores = score_text(full_text)
+    topic = pick_topic(scores)
+    return topic, scores.get(topic, 0)
+
+def confident_topic(metadata: Dict[str, str], min_score: int) -> Optional[str]:
+    """Topic of metadata when it scores at least min_score, else None (also for 'GENERIC')."""
+    topic, score = classify_with_score(metadata)
+    if topic != 'GENERIC' and score >= min_score:
+        return topic
+    return None
+
+class StreamingClassifier:
+    """
+    Accumulates keyword scores as text chunks arrive so readers can stop early.
+    Reading can stop when:
+    - the leader's margin over the runner-up is larger than the number of keyword
+      hits that could still fit in the remaining character budget, or
+    - the leader reached confident_score with at least min_lead over the runner-up.
+    """
+
+    def __init__(self, confident_score: Optional[int] = None, min_lead: int = 1):
+        self.confident_score = confident_score
+        self.min_lead = min_lead
+        self.scores = {topic: 0 for topic in TOPIC_KEYWORDS.keys()}
+        keywords = [kw for topic, kws in TOPIC_KEYWORDS.items() if topic != 'GENERIC' for kw in kws]
+        # A hit needs the keyword plus at least one separating character
+        self._min_hit_chars = min((len(kw) for kw in keywords), default=1) + 1
+
+    def feed(self, text: str):
+        for topic, score in score_text(text).items():
+            self.scores[topic] += score
+
+    def leaders(self) -> Tuple[int, int]:
+        """Returns (best score, runner-up score)."""
+        ranked = sorted(self.scores.values(), reverse=True) + [0, 0]
+        return ranked[0], ranked[1]
+
+    def topic(self) -> str:
+        return pick_topic(self.scores)
+
+    def can_stop(self, remaining_chars: int) -> bool:
+        best, runner_up = self.leaders()
+        if best == 0:
+            return False
+        lead = best - runner_up
+
+        max_remaining_hits = remaining_chars // self._min_hit_chars + 1
+        if lead > max_remaining_hits:
+            return True
+
+        return bool(self.confident_score) and best >= self.confident_score and lead >= self.min_lead
@@ -24,7 +24,85 @@ DEFAULT_CONFIG = {
         "GENERIC": "OTROS"
     },
     "folder_month_format": "%b%Y",
-    "filename_date_format": "%Y-%m-%d"
+    "filename_date_format": "%Y-%m-%d",
+    "near_duplicates": {
+        "enabled": False,
+        "threshold": 0.8,
+        "num_perm": 64,
+        "shingle_size": 5
+    },
+    "extraction_limits": {
+        "isolate": False,
+        "timeout_seconds": 60,
+        "max_rss_mb": 1024,
+        "per_extension": {
+            ".pdf": {"timeout_seconds": 120}
+        }
+    },
+    "early_exit": {
+        "enabled": False,
+        "confident_score": 3,
+        "min_lead": 2
+    },
+    "tiered_classification": {
+        "enabled": False,
+        "min_score": 2
+    },
+    "validation": {
+        "enabled": False,
+        "quarantine": False,
+        "quarantine_folder": "CUARENTENA"
+    },
+    "extraction_scheduling": {
+        "workers": 1,
+        "default_cost": {"base_seconds": 0.05, "seconds_per_mb": 0.2, "seconds_per_page": 0.0},
+        "cost_model": {
+            ".pdf": {"base_seconds": 0.05, "seconds_per_mb": 0.1, "seconds_per_page": 0.02},
+            ".docx": {"base_seconds": 0.1, "seconds_per_mb": 0.3},
+            ".xlsx": {"base_seconds": 0.2, "seconds_per_mb": 1.0},
+            ".pptx": {"base_seconds": 0.15, "seconds_per_mb": 0.1}
+        }
+    },
+    "memory": {
+        "max_memory_mb": 0,
+        "large_file_mb": 50,
+        "large_file_workers": 1,
+        "sample_interval": 0.2,
+        "shrink_at": 0.85,
+        "grow_below": 0.6
+    },
+    "metrics": {
+        "slowest_files": 10
+    },
+    "profiling": {
+        "slow_file_seconds": 5,
+        "sample_interval": 0.1,
+        "top": 30,
+        "traceback_frames": 10
+    },
+    "duplicates": {
+        "size_prefilter": False,
+        "hash_algorithm": "sha256",
+        "buffer_kb": 1024,
+        "mmap": False,
+        "mmap_min_mb": 16
+    },
+    "events": {
+        "progress_interval": 0.5
+    },
+    "archives": {
+        "enabled": False,
+        "max_depth": 2,
+        "in_memory_mb": 32
+    },
+    "destination_layout": {
+        "mode": "month",
+        "hash_prefix_length": 2,
+        "max_entries": 0
+    },
+    "reclassification": {
+        "store_metadata": True
+    }
 }
 
 def load_config():
@@ -48,6 +126,20 @@ TOPIC_KEYWORDS = _config_data.get("topic_keywords", DEFAULT_CONFIG["topic_keywor
 TOPIC_FOLDERS = _config_data.get("topic_folders", DEFAULT_CONFIG["topic_folders"])
 FOLDER_MONTH_FORMAT = _config_data.get("folder_month_format", DEFAULT_CONFIG["folder_month_format"])
 FILENAME_DATE_FORMAT = _config_data.get("filename_date_format", DEFAULT_CONFIG["filename_date_format"])
+NEAR_DUPLICATES = {**DEFAULT_CONFIG["near_duplicates"], **_config_data.get("near_duplicates", {})}
+EXTRACTION_LIMITS = {**DEFAULT_CONFIG["extraction_limits"], **_config_data.get("extraction_limits", {})}
+EARLY_EXIT = {**DEFAULT_CONFIG["early_exit"], **_config_data.get("early_exit", {})}
+TIERED_CLASSIFICATION = {**DEFAULT_CONFIG["tiered_classification"], **_config_data.get("tiered_classification", {})}
+VALIDATION = {**DEFAULT_CONFIG["validation"], **_config_data.get("validation", {})}
+EXTRACTION_SCHEDULING = {**DEFAULT_CONFIG["extraction_scheduling"], **_config_data.get("extraction_scheduling", {})}
+MEMORY = {**DEFAULT_CONFIG["memory"], **_config_data.get("memory", {})}
+METRICS = {**DEFAULT_CONFIG["metrics"], **_config_data.get("metrics", {})}
+PROFILING = {**DEFAULT_CONFIG["profiling"], **_config_data.get("profiling", {})}
+DUPLICATES = {**DEFAULT_CONFIG["duplicates"], **_config_data.get("duplicates", {})}
+EVENTS = {**DEFAULT_CONFIG["events"], **_config_data.get("events", {})}
+ARCHIVES = {**DEFAULT_CONFIG["archives"], **_config_data.get("archives", {})}
+DESTINATION_LAYOUT = {**DEFAULT_CONFIG["destination_layout"], **_config_data.get("destination_layout", {})}
+RECLASSIFICATION = {**DEFAULT_CONFIG["reclassification"], **_config_data.get("reclassification", {})}
 
 # Derived Paths
 # Allow overriding duplicated path via enviroment variable or keep default
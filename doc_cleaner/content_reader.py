@@ -1,5 +1,12 @@
 import os
-from typing import Dict, Any
+import re
+import time
+import logging
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from . import classifier, io_accounting
+from .config import EARLY_EXIT
 # Import libraries inside functions or try-except blocks if optional, 
 # but here they are required.
 try:
@@ -22,7 +29,11 @@ try:
 except ImportError:
     pptx = None
 
-def read_content(path: str) -> Dict[str, str]:
+# Maximum characters of body text kept in sample_text
+SAMPLE_LIMIT = 2000
+
+def read_content(path: str, stats: Optional[Dict[str, Any]] = None,
+                 early_exit: Optional[bool] = None, keep_sample: bool = False) -> Dict[str, str]:
     """
     Analyzes the file content to extract metadata for classification.
     Returns a dictionary:
@@ -31,6 +42,14 @@ def read_content(path: str) -> Dict[str, str]:
         "subtitle": "Detected subtitle or empty",
         "sample_text": "Extracted text content for keyword searching"
     }
+    Readers produce text incrementally; with early exit, reading stops as soon as
+    the classifier's decision can no longer change.
+    early_exit: overrides early_exit.enabled in config (False when the whole
+    sample is needed, e.g. for near-duplicate signatures).
+    keep_sample: store the chunks the result was built from in stats['sample']
+    (see sample_metadata), for 'reclassify'; with an early exit they end at the stop point.
+    stats: optional dict filled with 'chars_read', 'units_read' (pages, paragraphs,
+    rows or slides), 'stopped_early', 'units_saved', 'chars_saved' and 'read_seconds'.
     """
     ext = os.path.splitext(path)[1].lower()
     
@@ -40,57 +59,220 @@ def read_content(path: str) -> Dict[str, str]:
         "sample_text": ""
     }
     
-    try:
-        if ext == '.pdf':
-            metadata = _read_pdf(path)
-        elif ext == '.docx':
-            metadata = _read_docx(path)
-        elif ext == '.xlsx':
-            metadata = _read_xlsx(path)
-        elif ext == '.pptx':
-            metadata = _read_pptx(path)
-    except Exception as e:
-        # If reading fails, return empty metadata but don't crash
-        # Maybe log error?
-        print(f"Error reading {path}: {e}")
-        pass
+    reader = _READERS.get(ext)
+    if reader is not None:
+        start = time.perf_counter()
+        try:
+            metadata = _consume(reader(path), stats, early_exit, keep_sample)
+        except Exception as e:
+            # If reading fails, return empty metadata but don't crash
+            logging.error(f"Error reading {path}: {e}")
+        if stats is not None:
+            stats['read_seconds'] = time.perf_counter() - start
+    if keep_sample and stats is not None:
+        stats.setdefault('sample', [])  # Unreadable: classified from the empty metadata
         
     return metadata
 
-def _read_pdf(path: str) -> Dict[str, str]:
-    if not pypdf:
-        return {"title": "", "subtitle": "", "sample_text": ""}
-        
-    text_content = []
+def sample_metadata(sample: List[Tuple[str, str]], early_exit: bool = False,
+                    stats: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """
+    Metadata read_content returns for a document whose stored sample chunks
+    (stats['sample'] with keep_sample) are given, classifying with the current keywords.
+    stats: as for read_content; 'stopped_early' tells whether early exit stopped within the sample.
+    """
+    return _consume(iter(sample), stats, early_exit=early_exit)
+
+def _consume(chunks: Iterator[Tuple[str, Any]], stats: Optional[Dict[str, Any]] = None,
+             early_exit: Optional[bool] = None, keep_sample: bool = False) -> Dict[str, str]:
+    """
+    Builds the metadata dict from a reader's chunks, feeding a streaming
+    classifier and closing the reader early once the topic is decided.
+    Chunk kinds: 'title', 'subtitle', 'text', 'unit' (end of a page/paragraph/
+    row/slide) and 'expected' (number of units the reader would read at most).
+    keep_sample: also collect the consumed title/subtitle/text chunks (text up to
+    SAMPLE_LIMIT characters) in stats['sample'].
+    """
     title = ""
+    subtitle = ""
+    text_content = []
+    chars_read = 0
+    units_read = 0
+    expected_units = None
+    stopped_early = False
+    in_unit = False
+    sample = []
+    sample_chars = 0
+    
+    streaming = None
+    if early_exit is None:
+        early_exit = EARLY_EXIT.get('enabled')
+    if early_exit:
+        streaming = classifier.StreamingClassifier(
+            confident_score=EARLY_EXIT.get('confident_score'),
+            min_lead=EARLY_EXIT.get('min_lead', 1))
+    
+    for kind, value in chunks:
+        if kind == 'expected':
+            expected_units = value
+            continue
+        if kind == 'unit':
+            units_read += 1
+            in_unit = False
+            continue
+        
+        in_unit = True
+        if keep_sample and (kind != 'text' or sample_chars < SAMPLE_LIMIT):
+            sample.append((kind, value))
+            if kind == 'text':
+                sample_chars += len(value) + 1
+        if kind == 'title':
+            title = value
+        elif kind == 'subtitle':
+            subtitle = value
+        else:
+            text_content.append(value)
+            chars_read += len(value) + 1
+        
+        if streaming is not None:
+            streaming.feed(value)
+            if streaming.can_stop(max(0, SAMPLE_LIMIT - chars_read)):
+                stopped_early = True
+                if in_unit:
+                    units_read += 1 # The current page/slide was already extracted
+                break
+    
+    if hasattr(chunks, 'close'):
+        chunks.close() # Release the file right away when stopping early
+    
+    if stats is not None:
+        if keep_sample:
+            stats['sample'] = sample
+        stats['chars_read'] = min(chars_read, SAMPLE_LIMIT)
+        stats['units_read'] = units_read
+        stats['stopped_early'] = stopped_early
+        stats['units_saved'] = max(0, expected_units - units_read) if stopped_early and expected_units else 0
+        stats['chars_saved'] = max(0, SAMPLE_LIMIT - chars_read) if stopped_early else 0
+    
+    return {
+        "title": title,
+        "subtitle": subtitle,
+        "sample_text": "\n".join(text_content)[:SAMPLE_LIMIT] # Limit sample size
+    }
+
+def filename_metadata(path: str) -> Dict[str, str]:
+    """
+    Metadata built only from the file name, used when the content cannot be read
+    (e.g. extraction went over its time or memory budget).
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    return {
+        "title": re.sub(r'[_.-]+', ' ', base).strip(),
+        "subtitle": "",
+        "sample_text": ""
+    }
+
+# Namespaces of docProps/core.xml in OOXML packages
+_CORE_NS = {
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
+}
+
+def read_properties(path: str, info: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """
+    Tier-0 metadata: document properties plus the file name, without parsing the body.
+    - OOXML (.docx/.xlsx/.pptx): only the zip central directory and docProps/core.xml
+      (title, subject, keywords, category, description) are read.
+    - PDF: the trailer/xref and the info dictionary (pages are never loaded).
+    Returns the same shape as read_content; unreadable properties give file name only.
+    info: optional dict receiving 'pages' (PDF page count from the page tree root),
+    used by the extraction scheduler to estimate the cost of the body read.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    properties = {}
+    try:
+        if ext in ('.docx', '.xlsx', '.pptx'):
+            properties = _read_core_xml(path)
+        elif ext == '.pdf':
+            properties = _read_pdf_info(path, info)
+    except Exception:
+        # Tier 0 is best effort: a broken package falls through to full extraction
+        properties = {}
     
-    with open(path, 'rb') as f:
+    name = filename_metadata(path)['title']
+    extra = [properties.get(k, '') for k in ('keywords', 'category', 'description')]
+    return {
+        "title": properties.get('title', ''),
+        "subtitle": properties.get('subject', ''),
+        "sample_text": "\n".join([t for t in extra if t] + [name])
+    }
+
+def _read_core_xml(path: str) -> Dict[str, str]:
+    with io_accounting.open_file(path, 'rb') as f, zipfile.ZipFile(f) as zf:
+        try:
+            data = zf.read('docProps/core.xml')
+        except KeyError:
+            return {}
+    root = ET.fromstring(data)
+    fields = {
+        'title': 'dc:title',
+        'subject': 'dc:subject',
+        'keywords': 'cp:keywords',
+        'category': 'cp:category',
+        'description': 'dc:description',
+    }
+    properties = {}
+    for key, tag in fields.items():
+        element = root.find(tag, _CORE_NS)
+        if element is not None and element.text:
+            properties[key] = element.text.strip()
+    return properties
+
+def _read_pdf_info(path: str, info: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    if not pypdf:
+        return {}
+    with io_accounting.open_file(path, 'rb') as f:
+        reader = pypdf.PdfReader(f)
+        if info is not None:
+            # /Count of the root /Pages node, no page objects are loaded
+            info['pages'] = len(reader.pages)
+        meta = reader.metadata
+        if not meta:
+            return {}
+        return {
+            'title': meta.title or '',
+            'subject': meta.subject or '',
+            'keywords': str(meta.get('/Keywords', '') or ''),
+        }
+
+def _read_pdf(path: str) -> Iterator[Tuple[str, Any]]:
+    if not pypdf:
+        return
+        
+    with io_accounting.open_file(path, 'rb') as f:
         reader = pypdf.PdfReader(f)
         meta = reader.metadata
         if meta and meta.title:
-            title = meta.title
+            yield 'title', meta.title
             
         # Extract text from first few pages
         max_pages = min(len(reader.pages), 3)
+        yield 'expected', max_pages
         for i in range(max_pages):
             page_text = reader.pages[i].extract_text()
             if page_text:
-                text_content.append(page_text)
-                
-    return {
-        "title": title,
-        "subtitle": "",
-        "sample_text": "\n".join(text_content)[:2000] # Limit sample size
-    }
+                yield 'text', page_text
+            yield 'unit', None
 
-def _read_docx(path: str) -> Dict[str, str]:
+def _read_docx(path: str) -> Iterator[Tuple[str, Any]]:
     if not docx:
-        return {"title": "", "subtitle": "", "sample_text": ""}
+        return
         
-    doc = docx.Document(path)
-    text_content = []
-    title = ""
-    subtitle = ""
+    with io_accounting.open_file(path, 'rb') as f:
+        doc = docx.Document(f)
+    text_count = 0
+    title_found = False
+    subtitle_found = False
     
     # Try to find title style or just use first paragraphs
     for para in doc.paragraphs:
@@ -99,14 +281,18 @@ def _read_docx(path: str) -> Dict[str, str]:
         if not text:
             continue
             
-        if 'title' in style_name and not title:
-            title = text
-        elif 'subtitle' in style_name and not subtitle:
-            subtitle = text
+        if 'title' in style_name and not title_found:
+            title_found = True
+            yield 'title', text
+        elif 'subtitle' in style_name and not subtitle_found:
+            subtitle_found = True
+            yield 'subtitle', text
         else:
-            text_content.append(text)
+            text_count += 1
+            yield 'text', text
+        yield 'unit', None
             
-        if len(text_content) > 50: # Read first ~50 paragraphs
+        if text_count > 50: # Read first ~50 paragraphs
             break
             
     # Also read tables
@@ -115,53 +301,42 @@ def _read_docx(path: str) -> Dict[str, str]:
             for cell in row.cells:
                 text = cell.text.strip()
                 if text:
-                    text_content.append(text)
-        if len(text_content) > 100: # Global limit including paragraphs
+                    text_count += 1
+                    yield 'text', text
+        if text_count > 100: # Global limit including paragraphs
             break
-            
-    return {
-        "title": title,
-        "subtitle": subtitle,
-        "sample_text": "\n".join(text_content)[:2000]
-    }
 
-def _read_xlsx(path: str) -> Dict[str, str]:
+def _read_xlsx(path: str) -> Iterator[Tuple[str, Any]]:
     if not openpyxl:
-        return {"title": "", "subtitle": "", "sample_text": ""}
+        return
         
-    # Use context manager to ensure file is closed, preventing lock issues
-    try:
-        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    # Close the workbook and file in all cases (also when the consumer stops early), preventing lock issues
+    # (the file too when load_workbook fails on a corrupt workbook)
+    with io_accounting.open_file(path, 'rb') as f:
+        wb = openpyxl.load_workbook(f, read_only=True, data_only=True)
         try:
-            text_content = []
-            
             # Read first sheet
             if wb.sheetnames:
                 ws = wb[wb.sheetnames[0]]
+                if ws.max_row:
+                    yield 'expected', min(ws.max_row, 50)
                 # Read first 50 rows
                 for i, row in enumerate(ws.iter_rows(max_row=50, values_only=True)):
                     row_text = " ".join([str(c) for c in row if c is not None])
                     if row_text.strip():
-                        text_content.append(row_text)
+                        yield 'text', row_text
+                    yield 'unit', None
         finally:
-             wb.close()
-    except Exception:
-        # If openpyxl fails completely (e.g. invalid file), just return empty
-        return {"title": "", "subtitle": "", "sample_text": ""}
-
-    return {
-        "title": "",
-        "subtitle": "",
-        "sample_text": "\n".join(text_content)[:2000]
-    }
+            wb.close()
 
-def _read_pptx(path: str) -> Dict[str, str]:
+def _read_pptx(path: str) -> Iterator[Tuple[str, Any]]:
     if not pptx:
-        return {"title": "", "subtitle": "", "sample_text": ""}
+        return
         
-    prs = pptx.Presentation(path)
-    text_content = []
+    with io_accounting.open_file(path, 'rb') as f:
+        prs = pptx.Presentation(f)
     title = ""
+    yield 'expected', min(len(prs.slides), 6)
     
     # Iterate through slides
     for i, slide in enumerate(prs.slides):
@@ -184,11 +359,14 @@ def _read_pptx(path: str) -> Dict[str, str]:
                     
                     if not title: # Fallback
                         title = text
+                    yield 'title', title
                 
-                text_content.append(text)
-                
-    return {
-        "title": title,
-        "subtitle": "",
-        "sample_text": "\n".join(text_content)[:2000]
-    }
+                yield 'text', text
+        yield 'unit', None
+
+_READERS = {
+    '.pdf': _read_pdf,
+    '.docx': _read_docx,
+    '.xlsx': _read_xlsx,
+    '.pptx': _read_pptx,
+}
@@ -1,23 +1,73 @@
 import os
+import mmap
+import zipfile
 import hashlib
-import shutil
-from typing import List, Dict, Any
-from . import config
+import threading
+import contextlib
+from typing import List, Dict, Optional
+from . import config, io_accounting, archives
+from .config import DUPLICATES
+from .metrics import Metrics, timed
+from .records import FileRecord
 
-def get_file_hash(file_path: str) -> str:
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Selectable with duplicates.hash_algorithm (or --hash-algorithm); the xxh* ones need the xxhash package
+HASH_ALGORITHMS = ('sha256', 'sha1', 'md5', 'blake2b', 'blake2s', 'xxh64', 'xxh3_64', 'xxh3_128')
+
+# Per-thread read buffer reused by every file hashed on that thread
+_buffers = threading.local()
+
+def available_algorithms() -> List[str]:
+    return [name for name in HASH_ALGORITHMS if not name.startswith('xxh') or xxhash is not None]
+
+def new_hasher(algorithm: str):
+    """Hash object with update()/hexdigest() for one of HASH_ALGORITHMS."""
+    if algorithm not in HASH_ALGORITHMS:
+        raise ValueError(f"Unknown hash algorithm: {algorithm} (expected one of {', '.join(HASH_ALGORITHMS)})")
+    if algorithm.startswith('xxh'):
+        if xxhash is None:
+            raise ValueError(f"Hash algorithm {algorithm} needs the xxhash package")
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+def _buffer() -> memoryview:
+    size = DUPLICATES['buffer_kb'] * 1024
+    buffer = getattr(_buffers, 'view', None)
+    if buffer is None or len(buffer) != size:
+        buffer = _buffers.view = memoryview(bytearray(size))
+    return buffer
+
+def get_file_hash(file_path: str, algorithm: Optional[str] = None) -> str:
     """
-    Calculates SHA256 hash of a file.
+    Calculates the hash of a file (algorithm defaults to duplicates.hash_algorithm).
+    Files are read into a reused buffer, so no chunk is allocated per read.
+    With duplicates.mmap on, files of at least mmap_min_mb are instead hashed
+    from a memory map in one update(). It is off by default: a mapped file that
+    is truncated while hashed (a live share, watch or service mode) kills the
+    process with SIGBUS rather than raising OSError.
     """
-    hasher = hashlib.sha256()
+    hasher = new_hasher(algorithm or DUPLICATES['hash_algorithm'])
     try:
-        with open(file_path, 'rb') as f:
-            while True:
-                chunk = f.read(65536)
-                if not chunk:
-                    break
-                hasher.update(chunk)
+        with io_accounting.open_file(file_path, 'rb') as f:
+            size = 0 if archives.is_member(file_path) else os.fstat(f.fileno()).st_size
+            if DUPLICATES['mmap'] and size and size >= DUPLICATES['mmap_min_mb'] * 1024 * 1024:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    hasher.update(mapped)
+                f.count_mapped(size)
+            else:
+                buffer = _buffer()
+                while True:
+                    n = f.readinto(buffer)
+                    if not n:
+                        break
+                    hasher.update(buffer[:n])
         return hasher.hexdigest()
-    except OSError:
+    except (OSError, zipfile.BadZipFile, KeyError, NotImplementedError, RuntimeError):
+        # RuntimeError/NotImplementedError: encrypted or unsupported archive members
         return "" # Should handle gracefully by skipping or logging
 
 def move_to_duplicated(file_path: str, dry_run: bool = False) -> str:
@@ -25,9 +75,13 @@ def move_to_duplicated(file_path: str, dry_run: bool = False) -> str:
     Moves a file to the configured DUPLICATED_FOLDER_PATH.
     Creates the folder if it doesn't exist.
     Handles name collisions in destination by appending count.
+    Archive members are not extracted just to be set aside: they stay in their archive.
     Returns the new absolute path of the moved file.
     """
-    if not dry_run and not os.path.exists(config.DUPLICATED_FOLDER_PATH):
+    if archives.is_member(file_path):
+        return file_path
+
+    if not dry_run and not io_accounting.exists(config.DUPLICATED_FOLDER_PATH):
         os.makedirs(config.DUPLICATED_FOLDER_PATH, exist_ok=True)
         
     filename = os.path.basename(file_path)
@@ -39,30 +93,73 @@ def move_to_duplicated(file_path: str, dry_run: bool = False) -> str:
     
     # Check collision against existing files on disk
     if not dry_run:
-        while os.path.exists(dest_path):
+        while io_accounting.exists(dest_path):
             dest_path = os.path.join(config.DUPLICATED_FOLDER_PATH, f"{base}_{counter}{ext}")
             counter += 1
-        shutil.move(file_path, dest_path)
+        io_accounting.move(file_path, dest_path)
         
     return dest_path
 
-def process_duplicates(file_paths: List[str], dry_run: bool = False) -> List[Dict[str, Any]]:
+def check_duplicate(path: str, seen_hashes: Dict[str, str], dry_run: bool = False,
+                    metrics: Optional[Metrics] = None, algorithm: Optional[str] = None) -> FileRecord:
+    """
+    Hashes a single file and checks it against seen_hashes (hash -> first path seen).
+    Duplicates are moved to the duplicated folder; new hashes are added to seen_hashes.
+    metrics: optional collector for the 'hash' and 'move' timings.
+    algorithm: hash algorithm, defaults to duplicates.hash_algorithm; seen_hashes must
+               only hold hashes of the same algorithm.
+    Returns the record described in process_duplicates.
+    """
+    algorithm = algorithm or DUPLICATES['hash_algorithm']
+    with timed(metrics, 'hash', path):
+        file_hash = get_file_hash(path, algorithm)
+    
+    if not file_hash:
+        # Failed to read
+        record = FileRecord(path)
+        record['error'] = "ReadFailed"
+        return record
+    
+    if file_hash in seen_hashes:
+        # It's a duplicate
+        record = FileRecord(path, hash=file_hash, is_duplicate=True, hash_algorithm=algorithm)
+        try:
+            with timed(metrics, 'move', path):
+                record['final_path'] = move_to_duplicated(path, dry_run=dry_run)
+        except Exception as e:
+            # It IS a duplicate but failed to move
+            record['error'] = str(e)
+        return record
+    
+    # New unique file (for this extension)
+    seen_hashes[file_hash] = path
+    return FileRecord(path, hash=file_hash, hash_algorithm=algorithm)
+
+def process_duplicates(file_paths: List[str], dry_run: bool = False, io_slots=None,
+                       metrics: Optional[Metrics] = None, size_prefilter: bool = False,
+                       algorithm: Optional[str] = None) -> List[FileRecord]:
     """
     Identifies and moves duplicates.
     Grouping is done by file extension first (comparing strictly same types).
-    Returns a list of result dictionaries for ALL files:
-    [
-        {
-            "original_path": str,
-            "hash": str,
-            "is_duplicate": bool,
-            "final_path": str (moved path if duplicate, else None/original),
-            "error": str (optional)
-        },
-        ...
-    ]
+    io_slots: optional semaphore held while each file is hashed (shared I/O limit).
+    metrics: optional collector for hashing and move timings.
+    size_prefilter: only hash files that share their size with another file of the
+                    same extension; the others cannot be duplicates and keep hash None.
+    algorithm: hash algorithm (see HASH_ALGORITHMS), defaults to duplicates.hash_algorithm.
+    Returns a FileRecord for ALL files, read like the former result dicts:
+    {
+        "original_path": str,
+        "hash": str,
+        "is_duplicate": bool,
+        "final_path": str (moved path if duplicate, else original),
+        "error": str (optional)
+    }
+    The same record continues through the pipeline and becomes the manifest entry.
     """
     results = []
+    io_slots = io_slots or contextlib.nullcontext()
+    algorithm = algorithm or DUPLICATES['hash_algorithm']
+    new_hasher(algorithm)  # Fail before hashing anything if it is unknown or unavailable
     
     # Group by extension
     files_by_ext = {}
@@ -72,50 +169,38 @@ def process_duplicates(file_paths: List[str], dry_run: bool = False) -> List[Dic
             files_by_ext[ext] = []
         files_by_ext[ext].append(p)
     
+    candidates = None
+    if size_prefilter:
+        with timed(metrics, 'size_check'):
+            candidates = _same_size_files(files_by_ext)
+    
     # Process each extension group
     for ext, paths in files_by_ext.items():
         seen_hashes = {} # hash -> original_path
         
         for path in paths:
-            file_hash = get_file_hash(path)
-            
-            if not file_hash:
-                # Failed to read
-                results.append({
-                    "original_path": path,
-                    "hash": None,
-                    "is_duplicate": False,
-                    "final_path": path,
-                    "error": "ReadFailed"
-                })
+            if candidates is not None and path not in candidates:
+                results.append(FileRecord(path))
                 continue
-            
-            if file_hash in seen_hashes:
-                # It's a duplicate
-                try:
-                    new_path = move_to_duplicated(path, dry_run=dry_run)
-                    results.append({
-                        "original_path": path,
-                        "hash": file_hash,
-                        "is_duplicate": True,
-                        "final_path": new_path
-                    })
-                except Exception as e:
-                     results.append({
-                        "original_path": path,
-                        "hash": file_hash,
-                        "is_duplicate": True, # It IS a duplicate but failed to move
-                        "final_path": path,
-                        "error": str(e)
-                    })
-            else:
-                # New unique file (for this extension)
-                seen_hashes[file_hash] = path
-                results.append({
-                    "original_path": path,
-                    "hash": file_hash,
-                    "is_duplicate": False,
-                    "final_path": path
-                })
+            with io_slots:
+                results.append(check_duplicate(path, seen_hashes, dry_run=dry_run, metrics=metrics,
+                                               algorithm=algorithm))
                 
     return results
+
+def _same_size_files(files_by_ext: Dict[str, List[str]]) -> set:
+    """Paths whose size is shared by at least one other file of the same extension."""
+    candidates = set()
+    for paths in files_by_ext.values():
+        by_size = {}
+        for path in paths:
+            try:
+                size = io_accounting.getsize(path)
+            except OSError:
+                candidates.add(path) # Let hashing report the problem
+                continue
+            by_size.setdefault(size, []).append(path)
+        for same_size in by_size.values():
+            if len(same_size) > 1:
+                candidates.update(same_size)
+    return candidates
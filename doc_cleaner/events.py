@@ -0,0 +1,82 @@
+"""
+Structured run events: one JSON object per line (file_started, duplicate,
+classified, moved, error, plus run_started/run_finished) written to a file or
+streamed to a socket, for dashboards and tooling that would otherwise parse
+console output. Callers use emit(None, ...) when no bus is configured.
+"""
+import json
+import time
+import socket
+import logging
+import threading
+import datetime
+from typing import Any, Callable, Optional
+from .records import to_json
+
+def _connect(target: str):
+    """Text stream for target: tcp://host:port, unix:///path or a file path (appended to)."""
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid event target (expected tcp://host:port): {target}")
+        sock = socket.create_connection((host, int(port)))
+    elif target.startswith("unix://"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target[len("unix://"):])
+    else:
+        return open(target, 'a', encoding='utf-8')
+    return sock.makefile('w', encoding='utf-8')
+
+class EventBus:
+    """
+    Thread-safe JSONL writer. Every line is flushed as it is written, so consumers
+    see events live. A socket that goes away mid-run disables the bus (with one
+    warning) instead of failing the run.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self._stream = _connect(target)
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, **fields: Any):
+        line = json.dumps({"ts": datetime.datetime.now().isoformat(), "event": event, **fields},
+                          ensure_ascii=False, default=to_json)
+        with self._lock:
+            if self._stream is None:
+                return
+            try:
+                self._stream.write(line + "\n")
+                self._stream.flush()
+            except OSError as e:
+                logging.warning(f"Event stream {self.target} closed ({e}), no more events are sent")
+                self._stream = None
+
+    def close(self):
+        with self._lock:
+            if self._stream is None:
+                return
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
+
+def emit(bus: Optional[EventBus], event: str, **fields: Any):
+    """bus.emit(event, **fields), or a no-op when events are off."""
+    if bus is not None:
+        bus.emit(event, **fields)
+
+def rate_limited(progress: Callable[[int, int], None], interval: float) -> Callable[[int, int], None]:
+    """
+    Wraps a progress(done, total) callback so it runs at most once per interval
+    seconds (and always for the last file), reporting the files done meanwhile at once.
+    """
+    last = [float('-inf')]
+
+    def report(done: int, total: int):
+        now = time.monotonic()
+        if done >= total or now - last[0] >= interval:
+            last[0] = now
+            progress(done, total)
+    return report
@@ -2,6 +2,8 @@ import json
 import os
 from typing import List, Dict, Any
 from .config import TOPIC_FOLDERS
+from .io_accounting import open_file
+from .records import to_json
 
 def generate_reports(results: List[Dict[str, Any]], output_path: str):
     """
@@ -9,15 +11,15 @@ def generate_reports(results: List[Dict[str, Any]], output_path: str):
     - doccleaner_result_map.json
     - doccleaner_organization_plan.json
     
-    results: list of dicts with keys:
+    results: list of FileRecords (or dicts) with keys:
     original_path, current_path, topic, created_at, modified_at, is_duplicate
     (and optional hash, etc)
     """
     
     # 1. manifest.json (Execution Log for Undo)
     map_file = os.path.join(output_path, "manifest.json")
-    with open(map_file, 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    with open_file(map_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, default=to_json)
         
     # 2. doccleaner_organization_plan.json
     # Aggregate by Topic
@@ -41,11 +43,36 @@ def generate_reports(results: List[Dict[str, Any]], output_path: str):
             suggested_root = TOPIC_FOLDERS.get(topic, 'OTROS')
             plan[topic] = {
                 "suggested_root": suggested_root,
+                "folders": {},
                 "files": []
             }
             
         plan[topic]["files"].append(rel_path)
+        # Files per destination folder (month, day, hash or numbered sub-folders; see destination_layout)
+        folder = os.path.dirname(rel_path)
+        plan[topic]["folders"][folder] = plan[topic]["folders"].get(folder, 0) + 1
         
     plan_file = os.path.join(output_path, "doccleaner_organization_plan.json")
-    with open(plan_file, 'w', encoding='utf-8') as f:
+    with open_file(plan_file, 'w', encoding='utf-8') as f:
          json.dump(plan, f, indent=2, ensure_ascii=False)
+
+def write_metrics(metrics: Dict[str, Any], output_path: str):
+    """
+    Writes output_path/metrics.json: per-stage counts, total time and latency
+    histograms (overall and per extension), the slowest file operations and
+    the I/O counters per stage.
+    """
+    metrics_file = os.path.join(output_path, "metrics.json")
+    with open_file(metrics_file, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2, ensure_ascii=False)
+
+def append_manifest(entries: List[Dict[str, Any]], output_path: str):
+    """
+    Appends entries to output_path/manifest.jsonl (one JSON object per line).
+    Used by long-running modes that record files as they are processed;
+    scripts/restore.py accepts this file as well as manifest.json.
+    """
+    map_file = os.path.join(output_path, "manifest.jsonl")
+    with open_file(map_file, 'a', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, default=to_json) + "\n")
@@ -0,0 +1,373 @@
+"""
+Isolated content extraction: parsers run in a separate worker process with a
+wall-clock and RSS budget per file, so one malformed or enormous document
+cannot stall or blow up the whole run.
+"""
+import os
+import time
+import functools
+import threading
+import multiprocessing
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from . import archives, content_reader, profiling, io_accounting
+from .memory import get_rss_bytes, MemoryGovernor
+from .config import EXTRACTION_LIMITS, EXTRACTION_SCHEDULING, MEMORY
+
+# Error codes recorded in the manifest as 'extraction_error'
+EXTRACTION_TIMEOUT = "ExtractionTimeout"
+EXTRACTION_OOM = "ExtractionOOM"
+EXTRACTION_CRASHED = "ExtractionCrashed"
+
+# How often the parent checks the worker's memory while waiting
+_POLL_INTERVAL = 0.05
+
+# Workers are started from a parent that already runs several threads (pool,
+# logging listener); forking that state can deadlock, so they start fresh
+_MP = multiprocessing.get_context("spawn")
+
+def limits_for(ext: str) -> Tuple[float, int]:
+    """Returns (timeout_seconds, max_rss_mb) for an extension, applying per_extension overrides."""
+    limits = {**EXTRACTION_LIMITS, **EXTRACTION_LIMITS.get('per_extension', {}).get(ext, {})}
+    return limits['timeout_seconds'], limits['max_rss_mb']
+
+def _worker_loop(conn, profile=None, read_options=None, reader=None):
+    """
+    Child process: reads paths from conn and sends back (status, payload).
+    profile: optional {"mode", "log_dir"}; the worker then profiles itself and
+    samples slow files, writing its own files when it is closed normally.
+    read_options: keyword arguments for the reader.
+    reader: callable(path, stats, **read_options) -> metadata; content_reader.read_content by default.
+    """
+    reader = reader or content_reader.read_content
+    profiler = sampler = None
+    if profile:
+        name = f"worker{os.getpid()}"
+        profiler = profiling.Profiler(profile['mode'], profile['log_dir'], name)
+        profiler.start()
+        sampler = profiling.SlowFileSampler(profile['log_dir'], name=name)
+
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            break
+        if path is None:
+            break
+        try:
+            stats = {}
+            with profiling.watch(sampler, path), io_accounting.track() as io:
+                metadata = reader(path, stats, **(read_options or {}))
+            stats['io'] = io
+            conn.send(("ok", (metadata, stats)))
+        except MemoryError:
+            conn.send(("oom", None))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    if profiler:
+        sampler.close()
+        profiler.stop()
+
+class IsolatedWorker:
+    """
+    One long-lived extraction process. It is killed and restarted whenever a
+    file exceeds its time or memory budget, so parser imports are paid once
+    per worker rather than once per file.
+    profile: optional {"mode", "log_dir"} to profile inside the worker (--profile).
+    A worker killed for going over budget loses its profile.
+    read_options: keyword arguments for content_reader.read_content (e.g. {"early_exit": False}).
+    reader: optional module-level replacement for content_reader.read_content
+            (it must be importable by the spawned worker).
+    """
+
+    def __init__(self, profile: Optional[Dict[str, str]] = None, read_options: Optional[Dict[str, Any]] = None,
+                 reader=None):
+        self.process = None
+        self.conn = None
+        self.profile = profile
+        self.read_options = read_options
+        self.reader = reader
+        self._start()
+
+    def _start(self):
+        parent_conn, child_conn = _MP.Pipe()
+        self.process = _MP.Process(target=_worker_loop,
+                                   args=(child_conn, self.profile, self.read_options, self.reader), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Pid of the worker process, None while it is not running."""
+        process = self.process
+        return process.pid if process is not None else None
+
+    def _kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.process = None
+
+    def read(self, path: str, stats: Optional[Dict[str, Any]] = None) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+        """
+        Extracts metadata from path in the worker (stats: see content_reader.read_content).
+        Returns (metadata, None) on success or (None, error_code) when the file
+        went over budget or the worker died.
+        """
+        if self.process is None or not self.process.is_alive():
+            self._start()
+
+        timeout, max_rss_mb = limits_for(os.path.splitext(path)[1].lower())
+        max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        deadline = time.monotonic() + timeout
+
+        self.conn.send(path)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._kill()
+                return None, EXTRACTION_TIMEOUT
+
+            if self.conn.poll(min(remaining, _POLL_INTERVAL)):
+                try:
+                    status, payload = self.conn.recv()
+                except EOFError:
+                    # Died without answering; SIGKILL here usually means the kernel OOM killer
+                    self.process.join()
+                    exitcode = self.process.exitcode
+                    self._kill()
+                    return None, EXTRACTION_OOM if exitcode == -9 else EXTRACTION_CRASHED
+                if status == "ok":
+                    metadata, worker_stats = payload
+                    if stats is not None:
+                        stats.update(worker_stats)
+                    return metadata, None
+                if status == "oom":
+                    self._kill() # Heap may be fragmented, start clean
+                    return None, EXTRACTION_OOM
+                # Parser exceptions are already handled inside read_content; anything else is a crash
+                return None, EXTRACTION_CRASHED
+
+            if max_rss is not None:
+                rss = get_rss_bytes(self.process.pid)
+                if rss is not None and rss > max_rss:
+                    self._kill()
+                    return None, EXTRACTION_OOM
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+            # Profiled workers write their output before exiting
+            self.process.join(timeout=30 if self.profile else 2)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+
+def read_inline(path: str, stats: Optional[Dict[str, Any]] = None,
+                **read_options: Any) -> Tuple[Optional[Dict[str, str]], Optional[str]]:
+    """Same interface as IsolatedWorker.read, parsing in the current process (read_options as for IsolatedWorker)."""
+    return content_reader.read_content(path, stats, **read_options), None
+
+def _size(path: str) -> int:
+    try:
+        return io_accounting.getsize(path)
+    except OSError:
+        return 0
+
+def estimate_cost(path: str, pages: Optional[int] = None) -> float:
+    """
+    Predicted extraction time in seconds from file size, extension and (for PDFs,
+    when tier 0 already read it) page count, using extraction_scheduling.cost_model.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    model = {**EXTRACTION_SCHEDULING['default_cost'], **EXTRACTION_SCHEDULING['cost_model'].get(ext, {})}
+    size_mb = _size(path) / (1024 * 1024)
+    cost = model.get('base_seconds', 0.0) + model.get('seconds_per_mb', 0.0) * size_mb
+    if pages:
+        cost += model.get('seconds_per_page', 0.0) * pages
+    return cost
+
+class ExtractionPool:
+    """
+    Body extraction spread over N workers with longest-job-first scheduling:
+    submitted files are sorted by estimate_cost (largest first) into one shared
+    queue, and each worker takes the next file as soon as it is free, so a few
+    huge files start early instead of stretching the tail of the run.
+    Each worker owns an IsolatedWorker process when isolate is set, otherwise
+    it parses in-process on its own thread. The parsers are pure Python and hold
+    the GIL, so in-process workers only overlap file I/O: parsing in parallel
+    needs isolate (pipeline.run turns it on by default when workers > 1).
+    Results are collected with as_completed (or result for one path).
+    max_memory: optional budget in bytes for the isolated workers (requires isolate);
+    the number of files extracted at once then follows a MemoryGovernor. Files of memory.large_file_mb or more always
+    go through a separate lane of memory.large_file_workers slots.
+    io_slots: optional semaphore shared with other runs, held by in-process workers
+    around each file read (io_accounting.read_slots) but not while parsing.
+    profile: optional {"mode", "log_dir"} passed to isolated workers.
+    profiler: optional run Profiler; in-process workers profile their threads into it.
+    sampler: optional SlowFileSampler watching in-process reads.
+    read_options: keyword arguments for content_reader.read_content, for every file.
+    """
+
+    def __init__(self, workers: int = 1, isolate: bool = False, io_slots=None,
+                 max_memory: Optional[int] = None, profile: Optional[Dict[str, str]] = None,
+                 sampler: Optional[profiling.SlowFileSampler] = None,
+                 read_options: Optional[Dict[str, Any]] = None,
+                 profiler: Optional[profiling.Profiler] = None):
+        if max_memory and not isolate:
+            raise ValueError("A memory budget needs isolated extraction: in-process parsing "
+                             "memory is neither measurable per file nor given back")
+        self.workers = max(1, workers)
+        self.isolate = isolate
+        self.io_slots = io_slots
+        self.profile = profile
+        self.sampler = sampler
+        self.profiler = profiler
+        self.read_options = read_options or {}
+        self.archive_cache = archives.current_cache()  # the run's, for in-process reads of members
+        self._isolated = []  # IsolatedWorkers of this pool, measured by the governor
+        self.governor = MemoryGovernor(max_memory, self.workers, pids=self._worker_pids)
+        self.large_bytes = MEMORY['large_file_mb'] * 1024 * 1024
+        self._active = 0
+        self._active_large = 0
+        self._queue = []  # (predicted, path, is_large), largest first
+        self._results = {}  # path -> (metadata, error, stats), in completion order
+        self._outstanding = 0  # submitted files whose result was not collected yet
+        self._cond = threading.Condition()
+        self._threads = []
+        self._costs = {}  # ext -> {"files", "predicted_seconds", "actual_seconds"}
+
+    def submit(self, items: List[Tuple[str, Optional[int]]]):
+        """Queues (path, pages) pairs and starts the workers."""
+        jobs = [(estimate_cost(path, pages), path, _size(path) >= self.large_bytes) for path, pages in items]
+        jobs.sort(key=lambda job: job[0], reverse=True)
+        with self._cond:
+            self._outstanding += len(jobs)
+            self._queue.extend(jobs)
+            self._queue.sort(key=lambda job: job[0], reverse=True)
+            self._cond.notify_all()
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < min(self.workers, len(self._queue)):
+            thread = threading.Thread(target=self._work, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        # Isolated workers profile themselves; in-process reads run on this thread
+        with profiling.thread_profile(None if self.isolate else self.profiler), \
+                archives.use_cache(self.archive_cache):
+            self._work_loop()
+
+    def _work_loop(self):
+        worker = IsolatedWorker(self.profile, self.read_options) if self.isolate else None
+        if worker:
+            with self._cond:
+                self._isolated.append(worker)
+        read = worker.read if worker else functools.partial(read_inline, **self.read_options)
+        try:
+            while True:
+                with self._cond:
+                    job = self._next_job()
+                    while job is None:
+                        if not self._queue:
+                            return
+                        # Over the memory budget or the large-file lane is full
+                        self._cond.wait(MEMORY['sample_interval'])
+                        job = self._next_job()
+                    predicted, path, is_large = job
+                    self._active += 1
+                    self._active_large += is_large
+
+                stats = {}
+                start = time.perf_counter()
+                try:
+                    # In process, a slot is held per file read, not across the parse;
+                    # an isolated worker's reads happen in the child, outside the slots
+                    with io_accounting.read_slots(None if worker else self.io_slots), \
+                            profiling.watch(None if worker else self.sampler, path), io_accounting.track() as io:
+                        metadata, error = read(path, stats)
+                    # Isolated workers count their own I/O; the parent only sees the pipe
+                    stats.setdefault('io', io)
+                except Exception as e:
+                    metadata, error = None, EXTRACTION_CRASHED
+                    stats['exception'] = str(e)
+                actual = time.perf_counter() - start
+                stats['extraction_predicted_s'] = predicted
+                stats['extraction_seconds'] = actual
+
+                with self._cond:
+                    self._active -= 1
+                    self._active_large -= is_large
+                    self._record_cost(path, predicted, actual)
+                    self._results[path] = (metadata, error, stats)
+                    self._cond.notify_all()
+        finally:
+            if worker:
+                worker.close()
+                with self._cond:
+                    self._isolated.remove(worker)
+
+    def _worker_pids(self) -> List[int]:
+        with self._cond:
+            return [worker.pid for worker in self._isolated if worker.pid is not None]
+
+    def _next_job(self) -> Optional[Tuple[float, str, bool]]:
+        """Largest queued file this worker may start now (called with the lock held)."""
+        if self._active >= self.governor.allowed():
+            return None
+        for i, job in enumerate(self._queue):
+            if not job[2] or self._active_large < max(1, MEMORY['large_file_workers']):
+                return self._queue.pop(i)
+        return None
+
+    def _record_cost(self, path: str, predicted: float, actual: float):
+        ext = os.path.splitext(path)[1].lower()
+        entry = self._costs.setdefault(ext, {"files": 0, "predicted_seconds": 0.0, "actual_seconds": 0.0})
+        entry["files"] += 1
+        entry["predicted_seconds"] += predicted
+        entry["actual_seconds"] += actual
+
+    def result(self, path: str) -> Tuple[Optional[Dict[str, str]], Optional[str], Dict[str, Any]]:
+        """Waits for a submitted path and returns (metadata, extraction_error, stats)."""
+        with self._cond:
+            while path not in self._results:
+                self._cond.wait()
+            self._outstanding -= 1
+            return self._results.pop(path)
+
+    def as_completed(self) -> Iterator[Tuple[str, Tuple[Optional[Dict[str, str]], Optional[str], Dict[str, Any]]]]:
+        """
+        Yields (path, (metadata, extraction_error, stats)) for every submitted file
+        not collected yet, in the order extractions finish. Results are handed
+        over as soon as they exist instead of waiting in the pool.
+        """
+        while True:
+            with self._cond:
+                while not self._results and self._outstanding:
+                    self._cond.wait()
+                if not self._results:
+                    return
+                path = next(iter(self._results))
+                self._outstanding -= 1
+                result = self._results.pop(path)
+            yield path, result
+
+    def cost_report(self) -> Dict[str, Dict[str, float]]:
+        """Predicted vs actual extraction seconds per extension, for tuning the cost model."""
+        with self._cond:
+            return {ext: {"files": c["files"],
+                          "predicted_seconds": round(c["predicted_seconds"], 3),
+                          "actual_seconds": round(c["actual_seconds"], 3)}
+                    for ext, c in sorted(self._costs.items())}
+
+    def close(self):
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
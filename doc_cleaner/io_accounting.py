@@ -0,0 +1,234 @@
+"""
+I/O accounting: files opened, bytes read and written, stat calls, directory
+listings and full reads, per pipeline stage and per file.
+
+Counting is per thread: track() installs a counters dict for the current
+thread and the helpers below (open_file, stat, exists, move) add to it.
+Outside a track() block they behave like the plain os/shutil calls.
+read_slots() makes the reads of this thread's files wait for a shared I/O slot.
+They also accept the virtual paths of ZIP archive members (see archives).
+"""
+import os
+import errno
+import shutil
+import threading
+import contextlib
+from typing import Any, Dict, Iterator, List, Optional
+from . import archives
+
+FIELDS = ('opens', 'bytes_read', 'bytes_written', 'stats', 'listdirs', 'full_reads')
+
+_local = threading.local()
+
+def new_counters() -> Dict[str, int]:
+    return dict.fromkeys(FIELDS, 0)
+
+def add_counters(total: Dict[str, int], counters: Dict[str, int]):
+    for field in FIELDS:
+        total[field] += counters.get(field, 0)
+
+def count(field: str, n: int = 1):
+    counters = getattr(_local, 'counters', None)
+    if counters is not None:
+        counters[field] += n
+
+@contextlib.contextmanager
+def track() -> Iterator[Dict[str, int]]:
+    """Counts the I/O done by this thread inside the block; nested blocks also add to the outer one."""
+    counters = new_counters()
+    outer = getattr(_local, 'counters', None)
+    _local.counters = counters
+    try:
+        yield counters
+    finally:
+        _local.counters = outer
+        if outer is not None:
+            add_counters(outer, counters)
+
+@contextlib.contextmanager
+def read_slots(slots) -> Iterator[None]:
+    """
+    Holds slots (a semaphore shared between threads) around each read of a
+    CountingFile by this thread inside the block, rather than around the whole
+    block: parsing between reads does not keep a slot. None disables it.
+    """
+    outer = getattr(_local, 'slots', None)
+    _local.slots = slots
+    try:
+        yield
+    finally:
+        _local.slots = outer
+
+def _slot():
+    return getattr(_local, 'slots', None) or contextlib.nullcontext()
+
+class CountingFile:
+    """
+    File object wrapper counting bytes read and written. Closing a file whose
+    bytes read reach its size at open time counts as one full read.
+    """
+
+    def __init__(self, raw, size: Optional[int] = None):
+        self._raw = raw
+        self._read = 0
+        self._size = size
+        if size is None:
+            try:
+                self._size = os.fstat(raw.fileno()).st_size
+            except (OSError, AttributeError, ValueError):
+                pass
+
+    def _add_read(self, n: int):
+        self._read += n
+        count('bytes_read', n)
+
+    def count_mapped(self, n: int):
+        """Counts n bytes read through an mmap of this file (which bypasses read())."""
+        self._add_read(n)
+
+    def read(self, *args):
+        with _slot():
+            data = self._raw.read(*args)
+        self._add_read(len(data))
+        return data
+
+    def read1(self, *args):
+        with _slot():
+            data = self._raw.read1(*args)
+        self._add_read(len(data))
+        return data
+
+    def readinto(self, buffer):
+        with _slot():
+            n = self._raw.readinto(buffer)
+        self._add_read(n or 0)
+        return n
+
+    def readline(self, *args):
+        with _slot():
+            line = self._raw.readline(*args)
+        self._add_read(len(line))
+        return line
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def write(self, data):
+        n = self._raw.write(data)
+        count('bytes_written', n if n is not None else len(data))
+        return n
+
+    def close(self):
+        if not self._raw.closed and self._size and self._read >= self._size:
+            count('full_reads')
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        # seek, tell, seekable, fileno, closed, name, mode, ...
+        return getattr(self._raw, name)
+
+def open_file(path: str, mode: str = 'rb', **kwargs) -> CountingFile:
+    count('opens')
+    if archives.is_member(path):
+        if mode != 'rb':
+            raise ValueError(f"Archive members can only be opened with mode 'rb': {path}")
+        return CountingFile(archives.open_member(path), size=archives.member_info(path).file_size)
+    return CountingFile(open(path, mode, **kwargs))
+
+def stat(path: str) -> os.stat_result:
+    count('stats')
+    if archives.is_member(path):
+        return archives.stat_member(path)
+    return os.stat(path)
+
+def getsize(path: str) -> int:
+    return stat(path).st_size
+
+def exists(path: str) -> bool:
+    count('stats')
+    if archives.is_member(path):
+        try:
+            archives.member_info(path)
+            return True
+        except (OSError, ValueError):
+            return False
+    return os.path.exists(path)
+
+def listdir(path: str) -> List[str]:
+    count('listdirs')
+    return os.listdir(path)
+
+_COPY_ON_RENAME_ERRORS = (errno.EXDEV, errno.EPERM, errno.EACCES)
+
+def move(src: str, dst: str):
+    """
+    shutil.move for a file path destination. A rename costs no data I/O; across
+    devices (or when the rename is not permitted) the file is copied, which counts as a full read plus the bytes written.
+    An archive member is extracted to dst (the archive is not modified).
+    """
+    if archives.is_member(src):
+        written = archives.extract_member(src, dst)
+        count('opens', 2)
+        count('bytes_read', written)
+        count('bytes_written', written)
+        count('full_reads')
+        return
+    try:
+        os.rename(src, dst)
+        return
+    except OSError as e:
+        # Like shutil.move: copy when the rename is refused (other device, or a
+        # share/filesystem that does not allow renames across its directories)
+        if e.errno not in _COPY_ON_RENAME_ERRORS:
+            raise
+    size = getsize(src)
+    shutil.move(src, dst)
+    count('opens', 2)
+    count('bytes_read', size)
+    count('bytes_written', size)
+    count('full_reads')
+
+class IOAccounting:
+    """Per-stage totals plus bytes read and full reads per file."""
+
+    def __init__(self):
+        self.stages = {}  # stage -> counters
+        self.files = {}  # path -> [bytes_read, full_reads]
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, counters: Dict[str, int], path: Optional[str] = None):
+        with self._lock:
+            add_counters(self.stages.setdefault(stage, new_counters()), counters)
+            if path is not None and (counters.get('bytes_read') or counters.get('full_reads')):
+                per_file = self.files.setdefault(path, [0, 0])
+                per_file[0] += counters.get('bytes_read', 0)
+                per_file[1] += counters.get('full_reads', 0)
+
+    def file_counters(self, path: str) -> Dict[str, int]:
+        bytes_read, full_reads = self.files.get(path, (0, 0))
+        return {"bytes_read": bytes_read, "full_reads": full_reads}
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            total = new_counters()
+            for counters in self.stages.values():
+                add_counters(total, counters)
+            reread = [(full, read, path) for path, (read, full) in self.files.items() if full > 1]
+            most_read: List = sorted(reread, reverse=True)[:top]
+            return {
+                "stages": {stage: dict(counters) for stage, counters in self.stages.items()},
+                "total": total,
+                "files_read_more_than_once": len(reread),
+                "most_read_files": [{"path": path, "full_reads": full, "bytes_read": read}
+                                    for full, read, path in most_read],
+            }
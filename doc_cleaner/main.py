@@ -3,178 +3,200 @@ import sys
 import datetime
 import argparse
 import logging
-from logging.handlers import RotatingFileHandler
+import importlib
 from tqdm import tqdm
-from . import scanner, duplicates, content_reader, classifier, renamer, organizer, exporter
+from . import organizer, pipeline, sharding, memory, profiling, events, duplicates
+from .pipeline import get_file_dates
+from .config import EVENTS
 
-def get_file_dates(path):
-    """Returns created and modified dates as ISO 8601 strings and a datetime object for renaming (using modified)."""
-    stats = os.stat(path)
-    created = datetime.datetime.fromtimestamp(stats.st_ctime)
-    modified = datetime.datetime.fromtimestamp(stats.st_mtime)
-    
-    # Use modified date for organization/renaming by default as it's often more stable than creation on Windows copy
-    # user spec says "creación o última modificación", can implement option. Defaulting to modified.
-    ref_date = modified 
-    
-    return created.isoformat(), modified.isoformat(), ref_date
+# Sub-commands dispatched on the first argument (module exposing main(argv)).
+# Anything else is the classic "clean FOLDER" invocation.
+COMMANDS = {
+    "watch": "doc_cleaner.watcher",
+    "serve": "doc_cleaner.service",
+    "merge": "doc_cleaner.sharding",
+    "reclassify": "doc_cleaner.reclassify",
+}
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        command = importlib.import_module(COMMANDS[sys.argv[1]])
+        return command.main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="DocCleaner: Intelligent Document Organization")
-    parser.add_argument("folder", help="Root input folder to clean")
+    parser.add_argument("folders", nargs="+", metavar="folder",
+                        help="Root input folder to clean; several roots are scanned together and deduplicated against each other, each with its own run folder")
     parser.add_argument("--recursive", "-r", action="store_true", help="Scan subdirectories recursively")
     parser.add_argument("--dry-run", action="store_true", help="Simulate execution without moving files")
+    parser.add_argument("--scan-workers", type=int, default=1, help="Threads used to list directories in parallel (recursive scans)")
+    parser.add_argument("--shard", help="Process only slice i of N (e.g. 2/4) for multi-node runs; combine with 'merge'")
+    parser.add_argument("--near-duplicates", action="store_true", help="Report near-duplicate clusters (MinHash/LSH over extracted text) in the manifest")
+    parser.add_argument("--near-threshold", type=float, help="Similarity (0-1) for near-duplicates; defaults to config")
+    parser.add_argument("--workers", type=int, help="Extraction workers; files are scheduled largest-first (defaults to config). More than one implies --isolate, since in-process parsers share one interpreter lock")
+    parser.add_argument("--max-memory", help="Memory budget for the extraction workers (e.g. 2G, 512M); concurrency adapts to stay under it. Implies --isolate")
+    parser.add_argument("--profile", choices=profiling.MODES, help="Profile the run (cProfile or tracemalloc) and sample stacks of slow files into the run's logs folder")
+    parser.add_argument("--isolate", action="store_true", help="Parse documents in a worker process with per-file time/memory budgets (see extraction_limits in config)")
+    parser.add_argument("--early-exit", action="store_true", help="Stop reading a document once its topic can no longer change (see early_exit in config)")
+    parser.add_argument("--tiered", action="store_true", help="Classify from file name and document properties first and parse the body only when undecided (see tiered_classification in config)")
+    parser.add_argument("--size-prefilter", action="store_true", help="Only hash files that share their size with another file; the others get no hash in the manifest (see duplicates.size_prefilter in config)")
+    parser.add_argument("--validate", action="store_true", help="Check magic bytes before parsing; empty/truncated/encrypted/mismatched files are not parsed or moved (see validation in config)")
+    parser.add_argument("--quarantine", action="store_true", help="Validate as --validate and move invalid files to the run's quarantine folder")
+    parser.add_argument("--archives", action="store_true", help="Also process the documents inside .zip archives (members are extracted only when organized; archives are left as they are, so a rerun extracts them again)")
+    parser.add_argument("--hash-algorithm", choices=duplicates.HASH_ALGORITHMS, help="Duplicate detection hash (defaults to config; xxh* need the xxhash package)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print a console line for every file (the log file always has them)")
+    parser.add_argument("--events", help="Write JSONL run events to this file, tcp://host:port or unix:///path")
     args = parser.parse_args()
     
-    root_path = os.path.abspath(args.folder)
+    shard = None
+    if args.shard:
+        try:
+            shard = sharding.parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    max_memory = None
+    if args.max_memory:
+        try:
+            max_memory = memory.parse_size(args.max_memory)
+        except ValueError as e:
+            parser.error(str(e))
     
-    if not os.path.exists(root_path):
-        print(f"Error: Folder does not exist: {root_path}")
-        return
+    if shard and len(args.folders) > 1:
+        parser.error("--shard takes a single folder")
 
-    print(f"Starting DocCleaner on: {root_path}")
+    root_paths = []
+    for folder in args.folders:
+        root_path = os.path.abspath(folder)
+        if not os.path.exists(root_path):
+            print(f"Error: Folder does not exist: {root_path}")
+            return
+        if root_path not in root_paths:
+            root_paths.append(root_path)
+
+    print(f"Starting DocCleaner on: {', '.join(root_paths)}")
     if args.dry_run:
         print("!!! DRY RUN MODE: No files will be moved !!!")
 
     
-    # 1. Create Output Structure
+    # 1. Create Output Structure (one run folder per root)
     run_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    output_root = organizer.create_output_structure(root_path, run_timestamp, dry_run=args.dry_run)
-    print(f"Output folder created: {output_root}")
-    
-    # Setup Logging
-    # Console Handler (Simpler format for user)
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-    
-    handlers = [console_handler]
-    
-    if not args.dry_run:
-        log_dir = os.path.join(output_root, "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, "doccleaner.log")
-        
-        # File Handler (Detailed format, rotating)
-        file_handler = RotatingFileHandler(
-            log_file, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8'
-        )
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-        
-        handlers.append(file_handler)
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        handlers=handlers,
-        force=True
-    )
-    logging.info(f"Started execution on {root_path}")
-    
-    # 2. Scan
-    # 2. Scan
-    print(f"Scanning files... (Recursive: {args.recursive})")
-    all_files = scanner.scan_folder(root_path, recursive=args.recursive)
-    print(f"Found {len(all_files)} files with allowed extensions.")
-    
-    # 3. Detect Duplicates
-    # 3. Detect Duplicates
-    print("Detecting duplicates...")
-    dup_results = duplicates.process_duplicates(all_files, dry_run=args.dry_run)
-    
-    # 4. Process Non-duplicates
-    final_results = []
-    
-    moved_dups = 0
-    processed_count = 0
-    
-    # Use tqdm for progress bar
+    if shard:
+        run_timestamp += f"_shard{shard[0]}of{shard[1]}"
+    roots = []
+    for root_path in root_paths:
+        output_root = organizer.create_output_structure(root_path, run_timestamp, dry_run=args.dry_run)
+        print(f"Output folder created: {output_root}")
+        roots.append((root_path, output_root))
+    
+    # Setup Logging (in the first run folder)
+    pipeline.setup_logging(roots[0][1], dry_run=args.dry_run, verbose=args.verbose)
+    logging.info(f"Started execution on {', '.join(root_paths)}")
+    
+    # 2-5. Scan, detect duplicates, process and export
+    # Use tqdm for progress bar, created once the number of files is known
     # If this is dry run or not, visual feedback is good.
-    # We iterating dup_results
-    iterator = tqdm(dup_results, desc="Processing Files", unit="file")
-    
-    for item in iterator:
-        original_path = item['original_path']
-        is_dup = item['is_duplicate']
-        
-        # Determine timestamps for report
-        try:
-             created_iso, modified_iso, ref_date = get_file_dates(original_path)
-        except FileNotFoundError:
-             # File might have been moved if it was a duplicate?
-             # If it was duplicate, duplicates module moved it. 
-             # So we check final_path or original depending on state.
-             if is_dup and item.get('final_path'):
-                  created_iso, modified_iso, ref_date = get_file_dates(item['final_path'])
-             else:
-                  # Should not happen if non-dup
-                  created_iso, modified_iso, ref_date = "", "", datetime.datetime.now()
-
-        res_entry = {
-            "original_path": original_path,
-            "created_at": created_iso,
-            "modified_at": modified_iso,
-            "is_duplicate": is_dup,
-            "topic": None,
-            "current_path": item.get('final_path', original_path)
-        }
-        
-        if is_dup:
-            moved_dups += 1
-            final_results.append(res_entry)
-            msg = f"Duplicate found: {os.path.basename(original_path)} -> Moved to duplicated folder"
-            print(msg)
-            logging.info(msg)
-            continue
-            
-        # Non-duplicate processing
-        try:
-            print(f"Processing: {os.path.basename(original_path)}")
-            
-            # Read Content
-            metadata = content_reader.read_content(original_path)
-            
-            # Classify
-            topic = classifier.classify_document(metadata)
-            res_entry['topic'] = topic
-            
-            if topic == 'GENERIC':
-                logging.warning(f"Classified as GENERIC (Edge Case): {original_path} - Metadata found: {metadata}")
-            
-            # Rename
-            new_name = renamer.generate_new_name(original_path, topic, ref_date)
-            
-            # Organize
-            dest_dir = organizer.determine_destination(output_root, topic, ref_date)
-            final_path = organizer.move_file(original_path, dest_dir, new_name, dry_run=args.dry_run)
-            
-            res_entry['current_path'] = final_path
-            final_results.append(res_entry)
-            processed_count += 1
-            
-        except Exception as e:
-            msg = f"Error processing {original_path}: {e}"
-            print(msg)
-            logging.error(msg, exc_info=True)
-            res_entry['error'] = str(e)
-            res_entry['current_path'] = original_path # Not moved
-            final_results.append(res_entry)
-        
-    # 5. Export
-    # 5. Export
-    if not args.dry_run:
-        exporter.generate_reports(final_results, output_root)
-    else:
-        print("\n[Dry Run] Reports would be generated in output folder.")
+    # Updates are rate-limited: the bar advances by all files done since the last one.
+    bars = []
+    
+    def update_progress(done, total):
+        if not bars:
+            bars.append(tqdm(total=total, desc="Processing Files", unit="file"))
+        bars[0].update(done - bars[0].n)
+    
+    options = {
+        "recursive": args.recursive,
+        "dry_run": args.dry_run,
+        "scan_workers": args.scan_workers,
+        "shard": shard,
+        "near_threshold": args.near_threshold,
+    }
+    if args.near_duplicates:
+        options["near_duplicates"] = True
+    if args.workers:
+        options["workers"] = args.workers
+    if max_memory:
+        options["max_memory"] = max_memory
+    if args.profile:
+        options["profile"] = args.profile
+    if args.isolate:
+        options["isolate"] = True
+    if args.early_exit:
+        options["early_exit"] = True
+    if args.tiered:
+        options["tiered"] = True
+    if args.size_prefilter:
+        options["size_prefilter"] = True
+    if args.validate or args.quarantine:
+        options["validate"] = True
+    if args.quarantine:
+        options["quarantine"] = True
+    if args.events:
+        options["events"] = args.events
+    if args.archives:
+        options["archives"] = True
+    if args.hash_algorithm:
+        if args.hash_algorithm not in duplicates.available_algorithms():
+            parser.error(f"--hash-algorithm {args.hash_algorithm} needs the xxhash package")
+        options["hash_algorithm"] = args.hash_algorithm
+    try:
+        summary = pipeline.run_roots(roots, options,
+                                     progress=events.rate_limited(update_progress, EVENTS['progress_interval']))
+    finally:
+        for bar in bars:
+            bar.close()
+        # Flush queued log lines before the summary
+        pipeline.stop_logging()
     
     # Summary
     print("\n" + "="*40)
     print("DocCleaner Execution Complete")
     print("="*40)
-    print(f"Total files scanned: {len(all_files)}")
-    print(f"Duplicates moved: {moved_dups}")
-    print(f"Files organized: {processed_count}")
-    print(f"Output location: {output_root}")
+    print(f"Total files scanned: {summary['total_files']}")
+    print(f"Duplicates moved: {summary['duplicates']}")
+    print(f"Files organized: {summary['organized']}")
+    if len(roots) > 1:
+        for root in summary['roots']:
+            print(f"  {root['root']}: {root['total_files']} scanned, {root['duplicates']} duplicates, "
+                  f"{root['organized']} organized")
+    if summary['extraction_errors']:
+        print(f"Extraction over budget (classified by name): {summary['extraction_errors']}")
+    if summary['invalid_files']:
+        print(f"Invalid files (not parsed): {summary['invalid_files']}")
+    if summary['tier0_decided']:
+        print(f"Classified from name/properties only (tier 0): {summary['tier0_decided']}")
+    read_stats = summary['read_stats']
+    if read_stats.get('early_exits'):
+        print(f"Early exits: {read_stats['early_exits']}/{read_stats['files_read']} files "
+              f"(saved {read_stats['units_saved']} pages/rows/slides, {read_stats['chars_saved']} chars)")
+    if summary['near_duplicate_clusters']:
+        print(f"Near-duplicate clusters: {summary['near_duplicate_clusters']}")
+    for ext, cost in summary['cost_model'].items():
+        print(f"Extraction {ext}: {cost['files']} files, predicted {cost['predicted_seconds']:.1f}s, "
+              f"actual {cost['actual_seconds']:.1f}s")
+    if summary['peak_memory_mb']:
+        peaks = ", ".join(f"{stage} {mb:.0f}" for stage, mb in summary['peak_memory_mb'].items())
+        print(f"Peak memory (MB): {peaks}")
+    if summary['lowest_concurrency']:
+        print(f"Extraction concurrency lowered to {summary['lowest_concurrency']} to stay within the memory budget")
+    stages = summary['metrics']['stages']
+    if stages:
+        print("Stage timings (count, total, p50/p95):")
+        for stage, m in stages.items():
+            print(f"  {stage:<11} {m['count']:>7}  {m['total_seconds']:>9.2f}s  "
+                  f"{m['p50_ms'] or 0:.0f}/{m['p95_ms'] or 0:.0f} ms")
+        slowest = summary['metrics']['slowest_files'][:5]
+        if slowest:
+            print("Slowest files:")
+            for s in slowest:
+                print(f"  {s['seconds']:.2f}s {s['stage']}: {s['path']}")
+    io = summary['io']['total']
+    print(f"I/O: {io['opens']} opens, {io['bytes_read'] / (1024 * 1024):.1f} MB read, "
+          f"{io['bytes_written'] / (1024 * 1024):.1f} MB written, {io['stats']} stats, {io['listdirs']} dir listings")
+    if summary['io']['files_read_more_than_once']:
+        print(f"Files fully read more than once: {summary['io']['files_read_more_than_once']} (see metrics.json)")
+    if summary.get('slow_files'):
+        print(f"Slow files with stack samples: {summary['slow_files']} (see logs/)")
+    for _, output_root in roots:
+        print(f"Output location: {output_root}")
     print("="*40)
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""
+Memory accounting for memory-bounded runs: RSS of the run's process tree and
+of its extraction workers, an adaptive concurrency limit keeping the workers
+under a --max-memory budget, and per-stage peak memory for the run summary.
+"""
+import os
+import re
+import glob
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+from .config import MEMORY
+
+_SIZE_UNITS = {'': 1024 * 1024, 'k': 1024, 'm': 1024 * 1024, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+def parse_size(value: str) -> int:
+    """'512M', '2G', '1.5g' or a bare number of MB -> bytes."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([kmgt]?)b?\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid memory size: {value}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+def get_rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of a process from /proc (Linux). None if unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(path, 'r') as f:
+                children.extend(int(c) for c in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return children
+
+def workers_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """RSS of all descendants of a process (e.g. isolated extraction workers), without the process itself."""
+    pid = pid or os.getpid()
+    if get_rss_bytes(pid) is None:
+        return None
+    total = 0
+    pending = _children(pid)
+    while pending:
+        child = pending.pop()
+        total += get_rss_bytes(child) or 0
+        pending.extend(_children(child))
+    return total
+
+def processes_rss_bytes(pids: List[int]) -> Optional[int]:
+    """RSS of the given processes plus their descendants (e.g. one pool's workers). None if unavailable."""
+    if get_rss_bytes(os.getpid()) is None:
+        return None
+    return sum(tree_rss_bytes(pid) or 0 for pid in pids)
+
+def tree_rss_bytes(pid: Optional[int] = None) -> Optional[int]:
+    """RSS of a process plus all its descendants."""
+    pid = pid or os.getpid()
+    own = get_rss_bytes(pid)
+    if own is None:
+        return None
+    return own + (workers_rss_bytes(pid) or 0)
+
+class MemoryGovernor:
+    """
+    Adaptive concurrency limit for a memory budget of the extraction worker
+    processes returned by pids() (one pool's workers: other runs in the same
+    process, e.g. service jobs, have budgets of their own). Their RSS is sampled
+    at most every sample_interval seconds:
+    above shrink_at of the budget the limit drops by one (never below 1), below
+    grow_below it rises by one again (never above max_workers). The parent is
+    left out on purpose: its RSS rarely shrinks once a large file was handled,
+    so counting it would lower the limit to 1 for the rest of the run. Workers
+    that went over budget are restarted, which does give their memory back.
+    """
+
+    def __init__(self, max_bytes: Optional[int], max_workers: int,
+                 pids: Callable[[], List[int]] = list):
+        self.max_bytes = max_bytes
+        self.pids = pids
+        self.max_workers = max(1, max_workers)
+        self.limit = self.max_workers
+        self.lowest_limit = self.limit
+        self._sampled_at = 0.0
+        self._lock = threading.Lock()
+
+    def allowed(self) -> int:
+        """Current number of files that may be extracted concurrently."""
+        if not self.max_bytes:
+            return self.max_workers
+        with self._lock:
+            now = time.monotonic()
+            if now - self._sampled_at >= MEMORY['sample_interval']:
+                self._sampled_at = now
+                rss = processes_rss_bytes(self.pids())
+                if rss is not None:
+                    self._adjust(rss)
+            return self.limit
+
+    def _adjust(self, rss: int):
+        if rss > self.max_bytes * MEMORY['shrink_at'] and self.limit > 1:
+            self.limit -= 1
+            self.lowest_limit = min(self.lowest_limit, self.limit)
+        elif rss < self.max_bytes * MEMORY['grow_below'] and self.limit < self.max_workers:
+            self.limit += 1
+
+class StagePeaks:
+    """
+    Peak tree RSS per pipeline stage, sampled by a background thread.
+    begin(name) closes the running stage (if any) and starts the next one.
+    """
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or MEMORY['sample_interval']
+        self.peaks = {}  # stage -> bytes
+        self._stage = None
+        self._stop = None
+        self._thread = None
+
+    def _sample(self, stage: str):
+        rss = tree_rss_bytes()
+        if rss is not None and rss > self.peaks.get(stage, 0):
+            self.peaks[stage] = rss
+
+    def _sampler(self, stage: str, stop: threading.Event):
+        while not stop.wait(self.interval):
+            self._sample(stage)
+
+    def begin(self, stage: str):
+        self.end()
+        self._stage = stage
+        self._sample(stage)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sampler, args=(stage, self._stop), daemon=True)
+        self._thread.start()
+
+    def end(self):
+        if self._stage is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._sample(self._stage)
+        self._stage = None
+
+    def report(self) -> Dict[str, float]:
+        """Stage -> peak MB, in the order stages ran."""
+        return {stage: round(peak / (1024 * 1024), 1) for stage, peak in self.peaks.items()}
@@ -0,0 +1,116 @@
+"""
+Run metrics: count, total time and latency histogram per stage and per
+extension, the slowest individual file operations and the I/O done in each
+stage. Written to metrics.json next to manifest.json and summarized at the
+end of a run.
+"""
+import os
+import time
+import heapq
+import bisect
+import threading
+import contextlib
+from typing import Any, Dict, List, Optional
+from . import io_accounting
+
+# Histogram bucket upper bounds in milliseconds; one more bucket collects the rest
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+class _Series:
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+
+    def percentile_ms(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return float(BUCKETS_MS[i]) if i < len(BUCKETS_MS) else round(self.max * 1000, 1)
+        return round(self.max * 1000, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 4),
+            "mean_ms": round(self.total * 1000 / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile_ms(0.5),
+            "p95_ms": self.percentile_ms(0.95),
+            "max_ms": round(self.max * 1000, 2),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+class Metrics:
+    """
+    Thread-safe collector. Stages are free-form names ('scan', 'hash', 'read',
+    'classify', 'move', ...); samples with a path are also grouped by extension
+    and compete for the slowest-files list. Timed blocks also count their I/O
+    (see io_accounting) into self.io.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.slowest = slowest
+        self.io = io_accounting.IOAccounting()
+        self._stages = {}  # stage -> _Series
+        self._by_ext = {}  # (stage, ext) -> _Series
+        self._slowest = []  # min-heap of (seconds, stage, path)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, path: Optional[str] = None):
+        with self._lock:
+            self._stages.setdefault(stage, _Series()).add(seconds)
+            if path is None:
+                return
+            ext = os.path.splitext(path)[1].lower()
+            self._by_ext.setdefault((stage, ext), _Series()).add(seconds)
+            entry = (seconds, stage, path)
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @contextlib.contextmanager
+    def timer(self, stage: str, path: Optional[str] = None):
+        start = time.perf_counter()
+        with io_accounting.track() as counters:
+            try:
+                yield
+            finally:
+                self.record(stage, time.perf_counter() - start, path)
+        self.io.record(stage, counters, path)
+
+    def slowest_files(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            ranked = sorted(self._slowest, reverse=True)
+        return [{"path": path, "stage": stage, "seconds": round(seconds, 4)} for seconds, stage, path in ranked]
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {}
+            for stage, series in self._stages.items():
+                stages[stage] = series.to_dict()
+                by_ext = {ext: s.to_dict() for (st, ext), s in sorted(self._by_ext.items()) if st == stage}
+                if by_ext:
+                    stages[stage]["by_extension"] = by_ext
+        return {"stages": stages, "slowest_files": self.slowest_files(), "io": self.io.to_dict(self.slowest)}
+
+def timed(collector: Optional[Metrics], stage: str, path: Optional[str] = None):
+    """collector.timer(stage, path), or a no-op when metrics are not collected."""
+    if collector is None:
+        return contextlib.nullcontext()
+    return collector.timer(stage, path)
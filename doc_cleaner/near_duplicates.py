@@ -0,0 +1,138 @@
+"""
+Near-duplicate detection over extracted text using MinHash signatures and
+locality-sensitive hashing (LSH). Only documents sharing at least one LSH band
+are compared, so the cost grows roughly linearly with the number of files.
+"""
+import re
+import random
+import hashlib
+from typing import List, Dict, Any, Set, Tuple, Optional
+
+# Mersenne prime used by the (a * x + b) mod p permutation family
+_PRIME = (1 << 61) - 1
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """Returns the set of hashed word k-grams (k = size) of text."""
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {int.from_bytes(hashlib.blake2b(g.encode('utf-8'), digest_size=4).digest(), 'big') for g in grams}
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Picks (bands, rows) with bands * rows == num_perm so that the LSH
+    S-curve threshold (1/bands) ** (1/rows) is as close as possible to threshold.
+    """
+    best = (num_perm, 1)
+    best_error = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+class MinHasher:
+    """Computes MinHash signatures with num_perm seeded universal hash permutations."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [(rng.randint(1, _PRIME - 1), rng.randint(0, _PRIME - 1)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set: Set[int]) -> List[int]:
+        values = list(shingle_set)
+        return [min([(a * v + b) % _PRIME for v in values]) for a, b in self.permutations]
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity: fraction of matching signature positions."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+class NearDuplicateIndex:
+    """
+    Incremental LSH index. add() documents as they are read, then clusters()
+    returns groups of keys whose estimated similarity is >= threshold
+    (connected components of the candidate pairs that pass verification; a new
+    document is verified against one member of each cluster it shares a band with).
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, shingle_size: int = 5, bands: Optional[int] = None):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        if bands:
+            self.bands, self.rows = bands, num_perm // bands
+        else:
+            self.bands, self.rows = choose_bands(num_perm, threshold)
+        self.buckets = [{} for _ in range(self.bands)]
+        self.keys = []
+        self.signatures = []
+        self._parent = []
+
+    def _find(self, i: int) -> int:
+        while self._parent[i] != i:
+            self._parent[i] = self._parent[self._parent[i]]
+            i = self._parent[i]
+        return i
+
+    def add(self, key: Any, text: str) -> bool:
+        """Indexes one document. Returns False if the text has nothing to compare."""
+        shingle_set = shingles(text, self.shingle_size)
+        if not shingle_set:
+            return False
+
+        signature = self.hasher.signature(shingle_set)
+        position = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(signature)
+        self._parent.append(position)
+
+        # A bucket keeps one member per cluster (members of clusters merged since
+        # are dropped), so a document is compared with one member of each cluster
+        # sharing a band with it rather than with every document in the bucket
+        candidates = {}  # cluster root -> member to compare with
+        for band in range(self.bands):
+            band_key = tuple(signature[band * self.rows:(band + 1) * self.rows])
+            bucket = self.buckets[band].setdefault(band_key, [])
+            members = {}
+            for member in bucket:
+                members.setdefault(self._find(member), member)
+            bucket[:] = members.values()
+            for root, member in members.items():
+                candidates.setdefault(root, member)
+            bucket.append(position)
+
+        for other in candidates.values():
+            if self._find(other) == self._find(position):
+                continue
+            if estimate_similarity(signature, self.signatures[other]) >= self.threshold:
+                self._parent[self._find(position)] = self._find(other)
+        return True
+
+    def clusters(self) -> List[List[Any]]:
+        """Groups of two or more keys, in the order their first member was added."""
+        groups = {}
+        for position in range(len(self.keys)):
+            groups.setdefault(self._find(position), []).append(self.keys[position])
+        return [members for members in groups.values() if len(members) > 1]
+
+def annotate_clusters(index: NearDuplicateIndex) -> int:
+    """
+    Marks manifest entries (the index keys) with 'near_duplicate_cluster' (1-based id).
+    Returns the number of clusters.
+    """
+    clusters = index.clusters()
+    for cluster_id, members in enumerate(clusters, start=1):
+        for entry in members:
+            entry['near_duplicate_cluster'] = cluster_id
+    return len(clusters)
+
+def metadata_text(metadata: Dict[str, str]) -> str:
+    """Same text the classifier looks at."""
+    return f"{metadata.get('title', '')} {metadata.get('subtitle', '')} {metadata.get('sample_text', '')}"
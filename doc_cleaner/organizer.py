@@ -1,7 +1,16 @@
 import os
-import shutil
+import hashlib
 import datetime
-from .config import TOPIC_FOLDERS, get_month_folder_name
+import threading
+from typing import Optional
+from . import io_accounting
+from .config import TOPIC_FOLDERS, DESTINATION_LAYOUT, get_month_folder_name
+
+LAYOUT_MODES = ('month', 'day', 'hash')
+
+# Sub-bucketing state for destination_layout.max_entries: folder -> [bucket number, files in it]
+_buckets = {}
+_buckets_lock = threading.Lock()
 
 def create_output_structure(root_path: str, run_id: str, dry_run: bool = False) -> str:
     """
@@ -18,24 +27,67 @@ def create_output_structure(root_path: str, run_id: str, dry_run: bool = False)
         
     return run_folder_path
 
-def determine_destination(output_root: str, topic: str, date_obj: datetime.datetime) -> str:
+def determine_destination(output_root: str, topic: str, date_obj: datetime.datetime,
+                          file_name: Optional[str] = None) -> str:
     """
     Determines the full destination folder path:
     output_root / TOPIC_FOLDER / MonthYear
+    fanned out further according to destination_layout in config:
+    - mode 'day': .../MonthYear/DD
+    - mode 'hash': .../MonthYear/<first hash_prefix_length hex digits of the SHA-1 of file_name>
+    - max_entries > 0: files are spread over numbered sub-folders (0001, 0002, ...)
+      of at most max_entries files each. This reserves a slot, so call it once per file.
     """
     folder_name = TOPIC_FOLDERS.get(topic, TOPIC_FOLDERS.get('GENERIC', 'OTROS'))
     month_folder = get_month_folder_name(date_obj)
     
     full_path = os.path.join(output_root, folder_name, month_folder)
+
+    mode = DESTINATION_LAYOUT['mode']
+    if mode == 'day':
+        full_path = os.path.join(full_path, f"{date_obj.day:02d}")
+    elif mode == 'hash':
+        if file_name is None:
+            raise ValueError("The 'hash' destination layout needs the file name")
+        digest = hashlib.sha1(file_name.lower().encode('utf-8')).hexdigest()
+        full_path = os.path.join(full_path, digest[:DESTINATION_LAYOUT['hash_prefix_length']])
+    elif mode != 'month':
+        raise ValueError(f"Unknown destination layout mode: {mode} (expected one of {', '.join(LAYOUT_MODES)})")
+
+    if DESTINATION_LAYOUT['max_entries'] > 0:
+        full_path = _next_bucket(full_path, DESTINATION_LAYOUT['max_entries'])
     return full_path
 
+def _next_bucket(folder: str, max_entries: int) -> str:
+    """Numbered sub-folder of folder with room for one more file (existing buckets on disk are continued)."""
+    with _buckets_lock:
+        state = _buckets.get(folder)
+        if state is None:
+            state = _buckets[folder] = _existing_bucket(folder)
+        if state[1] >= max_entries:
+            state[0] += 1
+            state[1] = 0
+        state[1] += 1
+        return os.path.join(folder, f"{state[0]:04d}")
+
+def _existing_bucket(folder: str) -> list:
+    """[last bucket number, files in it] for a folder left by an earlier run (or [1, 0])."""
+    try:
+        numbers = [int(name) for name in io_accounting.listdir(folder) if name.isdigit()]
+    except FileNotFoundError:
+        numbers = []
+    if not numbers:
+        return [1, 0]
+    last = max(numbers)
+    return [last, len(io_accounting.listdir(os.path.join(folder, f"{last:04d}")))]
+
 def move_file(source_path: str, dest_dir: str, new_name: str, dry_run: bool = False) -> str:
     """
     Moves the source file to dest_dir with new_name.
     Creates dest_dir if it doesn't exist.
     Returns the final absolute path.
     """
-    if not dry_run and not os.path.exists(dest_dir):
+    if not dry_run and not io_accounting.exists(dest_dir):
         os.makedirs(dest_dir, exist_ok=True)
         
     final_path = os.path.join(dest_dir, new_name)
@@ -50,9 +102,9 @@ def move_file(source_path: str, dest_dir: str, new_name: str, dry_run: bool = Fa
     # In dry run, we can't easily check 'os.path.exists' for FILES WE JUST 'MOVED' (simulated).
     # But we can check existing files.
     if not dry_run:
-        while os.path.exists(final_path):
+        while io_accounting.exists(final_path):
             final_path = os.path.join(dest_dir, f"{base}_{counter}{ext}")
             counter += 1
-        shutil.move(source_path, final_path)
+        io_accounting.move(source_path, final_path)
         
     return final_path
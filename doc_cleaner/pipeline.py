@@ -0,0 +1,602 @@
+import os
+import sys
+import queue
+import atexit
+import datetime
+import logging
+import contextlib
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from . import archives, events, reclassify, io_accounting, scanner, duplicates, content_reader, classifier, renamer, organizer, exporter, sharding, near_duplicates, extraction, validator, memory, profiling
+from .records import FileRecord
+from .metrics import Metrics, timed
+from .config import NEAR_DUPLICATES, EXTRACTION_LIMITS, EARLY_EXIT, TIERED_CLASSIFICATION, VALIDATION, EXTRACTION_SCHEDULING, MEMORY, METRICS, DUPLICATES, RECLASSIFICATION
+
+def get_file_dates(path):
+    """Returns created and modified dates as ISO 8601 strings and a datetime object for renaming (using modified)."""
+    stats = io_accounting.stat(path)
+    created = datetime.datetime.fromtimestamp(stats.st_ctime)
+    modified = datetime.datetime.fromtimestamp(stats.st_mtime)
+
+    # Use modified date for organization/renaming by default as it's often more stable than creation on Windows copy
+    # user spec says "creación o última modificación", can implement option. Defaulting to modified.
+    ref_date = modified
+
+    return created.isoformat(), modified.isoformat(), ref_date
+
+# extra= for log records about a single file; the console shows them only when verbose
+PER_FILE = {"per_file": True}
+
+_log_listener = None
+
+def setup_logging(output_root: str, dry_run: bool = False, verbose: bool = False):
+    """
+    Configures console logging and, outside dry runs, a rotating log file in output_root/logs.
+    Records go through a queue: formatting and disk writes happen on a listener
+    thread, so the pipeline never waits on them. Per-file records (extra=PER_FILE)
+    reach the console only when verbose; the log file always gets them.
+    """
+    global _log_listener
+    stop_logging()
+
+    # Console Handler (Simpler format for user)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    if not verbose:
+        console_handler.addFilter(lambda record: not getattr(record, 'per_file', False))
+
+    handlers = [console_handler]
+
+    if not dry_run:
+        log_dir = os.path.join(output_root, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = os.path.join(log_dir, "doccleaner.log")
+
+        # File Handler (Detailed format, rotating)
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=5*1024*1024, backupCount=5, encoding='utf-8'
+        )
+        file_handler.setLevel(logging.INFO)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    queue_handler = QueueHandler(log_queue)
+    # The queued record only carries the message (and traceback); the handlers above add the rest
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[queue_handler],
+        force=True
+    )
+
+def stop_logging():
+    """Flushes the queued log records and stops the listener thread started by setup_logging."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+atexit.register(stop_logging)
+
+def _add_read_stats(totals: Dict[str, int], stats: Dict[str, Any]):
+    totals['files_read'] = totals.get('files_read', 0) + 1
+    for key in ('chars_read', 'units_read', 'units_saved', 'chars_saved'):
+        totals[key] = totals.get(key, 0) + stats.get(key, 0)
+    if stats.get('stopped_early'):
+        totals['early_exits'] = totals.get('early_exits', 0) + 1
+
+def start_item(item: FileRecord, output_root: str, dry_run: bool = False,
+               tiered: bool = False, validate: bool = False, quarantine: bool = False,
+               metrics: Optional[Metrics] = None, bus: Optional[events.EventBus] = None) -> Dict[str, Any]:
+    """
+    Cheap first phase for one result of duplicates detection: dates, duplicate
+    short-circuit, magic-byte validation and tier-0 classification.
+    tiered: classify from file name and document properties first (tier 0) and only
+            parse the body (tier 1) when that result is GENERIC or below min_score.
+            The deciding tier is recorded as 'classification_tier'.
+    validate: check magic bytes / container markers first; invalid files get the
+              problem code as 'error' and, with quarantine, are moved to the
+              quarantine folder of the run instead of being parsed.
+    metrics: optional collector for the 'validate' and 'properties' timings.
+    The record itself becomes the manifest entry.
+    Returns a state dict for finish_item:
+    {"entry": the record, "ref_date": datetime, "metadata": tier-0 metadata or None,
+     "needs_body": bool, "done": bool, "pages": PDF page count if known, "tiered": bool,
+     "properties": tier-0 metadata, also when it did not decide (tiered only)}
+    """
+    original_path = item['original_path']
+    is_dup = item['is_duplicate']
+    # Hashing/move problems are logged; the manifest keeps 'error' for processing failures
+    hash_error = item.pop('error', None)
+    if hash_error:
+        logging.warning(f"Duplicate check failed for {original_path}: {hash_error}")
+
+    # Determine timestamps for report
+    with timed(metrics, 'dates', original_path):
+        try:
+             created_iso, modified_iso, ref_date = get_file_dates(original_path)
+        except FileNotFoundError:
+             # File might have been moved if it was a duplicate?
+             # If it was duplicate, duplicates module moved it.
+             # So we check final_path or original depending on state.
+             if is_dup and item.get('final_path'):
+                  created_iso, modified_iso, ref_date = get_file_dates(item['final_path'])
+             else:
+                  # Should not happen if non-dup
+                  created_iso, modified_iso, ref_date = "", "", datetime.datetime.now()
+
+    res_entry = item
+    res_entry['created_at'] = created_iso
+    res_entry['modified_at'] = modified_iso
+    state = {"entry": res_entry, "ref_date": ref_date, "metadata": None,
+             "needs_body": False, "done": True, "pages": None, "tiered": tiered, "properties": None}
+
+    if is_dup:
+        logging.info(f"Duplicate found: {os.path.basename(original_path)} -> Moved to duplicated folder", extra=PER_FILE)
+        events.emit(bus, "duplicate", path=original_path, current_path=res_entry['current_path'])
+        return state
+
+    # Non-duplicate processing
+    try:
+        logging.info(f"Processing: {os.path.basename(original_path)}", extra=PER_FILE)
+        events.emit(bus, "file_started", path=original_path)
+
+        if validate:
+            with timed(metrics, 'validate', original_path):
+                problem = validator.sniff_file(original_path)
+            if problem:
+                res_entry['error'] = problem
+                if quarantine:
+                    quarantine_dir = os.path.join(output_root, VALIDATION['quarantine_folder'])
+                    res_entry['current_path'] = organizer.move_file(
+                        original_path, quarantine_dir, os.path.basename(original_path), dry_run=dry_run)
+                logging.warning(f"Invalid file ({problem}): {original_path}", extra=PER_FILE)
+                events.emit(bus, "error", path=original_path, error=problem, current_path=res_entry['current_path'])
+                return state
+
+        state['done'] = False
+        if tiered:
+            # Tier 0: file name + core properties / PDF info
+            info = {}
+            with timed(metrics, 'properties', original_path):
+                properties = content_reader.read_properties(original_path, info)
+            state['pages'] = info.get('pages')
+            state['properties'] = properties
+            if classifier.confident_topic(properties, TIERED_CLASSIFICATION['min_score']):
+                state['metadata'] = properties
+                res_entry['classification_tier'] = 0
+                return state
+
+        state['needs_body'] = True
+
+    except Exception as e:
+        _record_error(state, e, bus)
+
+    return state
+
+def finish_item(state: Dict[str, Any], output_root: str, dry_run: bool = False,
+                body: Optional[Tuple[Optional[Dict[str, str]], Optional[str], Dict[str, Any]]] = None,
+                on_metadata: Optional[Callable[[FileRecord, Dict[str, str]], None]] = None,
+                read_totals: Optional[Dict[str, int]] = None,
+                metrics: Optional[Metrics] = None, bus: Optional[events.EventBus] = None) -> FileRecord:
+    """
+    Second phase: classify -> rename -> move.
+    body: (metadata, extraction_error, read_stats) from the reader for files that
+          needed body extraction. Files whose extraction failed are classified
+          from their file name.
+    on_metadata: optional callable(res_entry, metadata) called once the content is read.
+    read_totals: optional dict accumulating the reader stats (early exits, units/chars saved).
+    metrics: optional collector; parser time ('read') and extraction wall time including
+             worker overhead ('extraction') come from read_stats, the other stages are timed here.
+    bus: optional event bus receiving 'classified' and 'moved' (or 'error') events.
+    The metadata the file was classified from is left in state['metadata'].
+    Returns the manifest entry for the file.
+    """
+    res_entry = state['entry']
+    if state['done']:
+        return res_entry
+
+    original_path = res_entry['original_path']
+    try:
+        metadata = state['metadata']
+        if state['needs_body']:
+            # Tier 1: Read Content
+            metadata, extraction_error, read_stats = body
+            if read_totals is not None:
+                _add_read_stats(read_totals, read_stats)
+            if metrics is not None:
+                for stage, key in (('read', 'read_seconds'), ('extraction', 'extraction_seconds')):
+                    if key in read_stats:
+                        metrics.record(stage, read_stats[key], original_path)
+                if 'io' in read_stats:
+                    metrics.io.record('read', read_stats['io'], original_path)
+            if extraction_error:
+                logging.warning(f"{extraction_error}: {original_path} - classifying from file name", extra=PER_FILE)
+                res_entry['extraction_error'] = extraction_error
+                metadata = content_reader.filename_metadata(original_path)
+            if on_metadata:
+                on_metadata(res_entry, metadata)
+            if state['tiered']:
+                res_entry['classification_tier'] = 1
+            for key in ('extraction_predicted_s', 'extraction_seconds'):
+                if key in read_stats:
+                    res_entry[key] = round(read_stats[key], 4)
+
+        # Classify
+        with timed(metrics, 'classify', original_path):
+            topic = classifier.classify_document(metadata)
+        res_entry['topic'] = topic
+        state['metadata'] = metadata
+
+        if topic == 'GENERIC':
+            logging.warning(f"Classified as GENERIC (Edge Case): {original_path}", extra=PER_FILE)
+            logging.debug("Metadata of %s: %s", original_path, metadata)
+        events.emit(bus, "classified", path=original_path, topic=topic, tier=res_entry.get('classification_tier'))
+
+        # Rename
+        with timed(metrics, 'rename', original_path):
+            new_name = renamer.generate_new_name(original_path, topic, state['ref_date'])
+
+        # Organize
+        with timed(metrics, 'move', original_path):
+            dest_dir = organizer.determine_destination(output_root, topic, state['ref_date'], new_name)
+            final_path = organizer.move_file(original_path, dest_dir, new_name, dry_run=dry_run)
+
+        res_entry['current_path'] = final_path
+        events.emit(bus, "moved", path=original_path, current_path=final_path)
+
+    except Exception as e:
+        _record_error(state, e, bus)
+
+    return res_entry
+
+def _record_error(state: Dict[str, Any], e: Exception, bus: Optional[events.EventBus] = None):
+    res_entry = state['entry']
+    original_path = res_entry['original_path']
+    logging.error(f"Error processing {original_path}: {e}", exc_info=True, extra=PER_FILE)
+    events.emit(bus, "error", path=original_path, error=str(e))
+    res_entry['error'] = str(e)
+    res_entry['current_path'] = original_path # Not moved
+    state['done'] = True
+
+def process_item(item: FileRecord, output_root: str, dry_run: bool = False,
+                 on_metadata: Optional[Callable[[FileRecord, Dict[str, str]], None]] = None,
+                 reader: Callable = extraction.read_inline,
+                 read_totals: Optional[Dict[str, int]] = None,
+                 tiered: bool = False,
+                 validate: bool = False,
+                 quarantine: bool = False) -> FileRecord:
+    """
+    Runs one result of duplicates detection through read -> classify -> rename -> move
+    (start_item and finish_item back to back).
+    reader: callable(path, stats) -> (metadata, extraction_error); an IsolatedWorker's read
+            bounds time and memory per file.
+    Returns the manifest entry for the file.
+    """
+    state = start_item(item, output_root, dry_run=dry_run, tiered=tiered, validate=validate, quarantine=quarantine)
+    body = None
+    if state['needs_body'] and not state['done']:
+        read_stats = {}
+        metadata, extraction_error = reader(state['entry']['original_path'], read_stats)
+        body = (metadata, extraction_error, read_stats)
+    return finish_item(state, output_root, dry_run=dry_run, body=body,
+                       on_metadata=on_metadata, read_totals=read_totals)
+
+def run(root_path: str, output_root: str, options: Dict[str, Any],
+        progress: Optional[Callable[[int, int], None]] = None, io_slots=None) -> Dict[str, Any]:
+    """
+    Runs the full cleanup of root_path into output_root: scan -> duplicates -> process -> export.
+    options: dict with 'recursive', 'dry_run', 'scan_workers', 'shard' ((i, N) or None)
+             'workers' (extraction workers), 'near_duplicates', 'isolate', 'early_exit', 'tiered',
+             'size_prefilter', 'validate' and 'quarantine' (bools, default to config), 'max_memory' (bytes,
+             for the isolated extraction workers; ValueError with 'isolate' False),
+             'profile' ('cpu' or 'memory'), 'events' (JSONL event target: file path,
+             tcp://host:port or unix:///path), 'hash_algorithm', 'archives' (bool, defaults
+             to config), same meaning as the CLI flags.
+    progress: optional callable(done, total) invoked after each file.
+    io_slots: optional semaphore held around each disk-heavy step, so several runs
+              in one process (the service) share a global I/O concurrency limit.
+    Returns a summary dict with the counters and the per-file results.
+    """
+    return run_roots([(root_path, output_root)], options, progress=progress, io_slots=io_slots)
+
+def run_roots(roots: List[Tuple[str, str]], options: Dict[str, Any],
+              progress: Optional[Callable[[int, int], None]] = None, io_slots=None) -> Dict[str, Any]:
+    """
+    Cleans several (root_path, output_root) pairs in one run: the roots are scanned
+    concurrently and share one duplicate index (a file is a duplicate of an earlier
+    copy in any root, earlier roots first) and one extraction pool. Every root gets
+    its own manifest, reports and metrics.json in its output_root; logs and
+    profiles go to the first one.
+    Same options as run(), except that 'shard' needs a single root.
+    Returns the summary of run() over all roots; 'output_root' is the first root's
+    and 'roots' has the counters of each root.
+    Archives are opened through a cache of this run only, closed when it ends.
+    """
+    if options.get('shard') and len(roots) > 1:
+        raise ValueError("Sharded runs take a single root folder")
+    check_options(options)
+    bus = events.EventBus(options['events']) if options.get('events') else None
+    archive_cache = archives.ArchiveCache()
+    try:
+        with archives.use_cache(archive_cache):
+            for root_path, output_root in roots:
+                events.emit(bus, "run_started", root=root_path, output_root=output_root)
+            summary = _profiled_run(roots, options, progress, io_slots, bus)
+            events.emit(bus, "run_finished", **{key: summary[key] for key in _FINISH_COUNTERS})
+            return summary
+    finally:
+        archive_cache.close()
+        if bus is not None:
+            bus.close()
+
+# Summary counters sent with the run_finished event
+_FINISH_COUNTERS = ('total_files', 'duplicates', 'organized', 'errors')
+
+def extraction_settings(options: Dict[str, Any]) -> Tuple[int, bool, Optional[int]]:
+    """
+    (workers, isolate, max_memory in bytes or None) for run options, config applied.
+    In-process parsers hold the GIL and a memory budget is enforced on worker processes,
+    so both several workers and a budget parse in worker processes unless told otherwise.
+    """
+    max_memory = options.get('max_memory') or MEMORY['max_memory_mb'] * 1024 * 1024 or None
+    workers = options.get('workers', EXTRACTION_SCHEDULING['workers'])
+    isolate = options.get('isolate', EXTRACTION_LIMITS['isolate'] or workers > 1 or bool(max_memory))
+    return workers, isolate, max_memory
+
+def check_options(options: Dict[str, Any]):
+    """Raises ValueError for run options that cannot be honored, before anything is moved."""
+    _, isolate, max_memory = extraction_settings(options)
+    if max_memory and not isolate:
+        raise ValueError("A memory budget (max_memory or memory.max_memory_mb) needs isolated extraction")
+
+def _profiled_run(roots: List[Tuple[str, str]], options: Dict[str, Any],
+                  progress: Optional[Callable[[int, int], None]], io_slots,
+                  bus: Optional[events.EventBus]) -> Dict[str, Any]:
+    mode = options.get('profile')
+    if not mode:
+        return _run(roots, options, progress, io_slots, bus=bus)
+
+    # Profiles and slow-file stacks go to the (first) run's logs folder
+    log_dir = os.path.join(roots[0][1], "logs")
+    profiler = profiling.Profiler(mode, log_dir)
+    sampler = profiling.SlowFileSampler(log_dir)
+    profiler.start()
+    try:
+        summary = _run(roots, options, progress, io_slots,
+                       profile={"mode": mode, "log_dir": log_dir}, profiler=profiler, sampler=sampler, bus=bus)
+    finally:
+        sampler.close()
+        profile_path = profiler.stop()
+    logging.info(f"Profile written to {profile_path}")
+    summary['profile'] = profile_path
+    summary['slow_files'] = sampler.slow_files
+    return summary
+
+def _scan_roots(roots: List[Tuple[str, str]], options: Dict[str, Any], run_metrics: Metrics) -> List[List[str]]:
+    """Scans every root (concurrently when there are several). Returns the files of each root."""
+    recursive = options.get('recursive', False)
+    logging.info(f"Scanning files... (Recursive: {recursive})")
+
+    archive_cache = archives.current_cache()
+
+    def scan(root_path):
+        scan_stats = {}
+        with archives.use_cache(archive_cache):
+            files = scanner.scan_folder(root_path, recursive=recursive, workers=options.get('scan_workers', 1), stats=scan_stats,
+                                        include_archives=options.get('archives'))
+        return files, scan_stats
+
+    if len(roots) == 1:
+        scans = [scan(roots[0][0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(roots), thread_name_prefix="doccleaner-scan") as executor:
+            scans = list(executor.map(scan, [root_path for root_path, _ in roots]))
+
+    files_per_root = []
+    seen = set()
+    for (root_path, _), (files, scan_stats) in zip(roots, scans):
+        run_metrics.record('scan', scan_stats['elapsed_seconds'])
+        run_metrics.io.record('scan', {'listdirs': scan_stats['directories']})
+        where = ""
+        if len(roots) > 1:
+            # Nested or repeated roots: a file belongs to the first root that lists it
+            files = [path for path in files if path not in seen]
+            seen.update(files)
+            where = f"{root_path}: "
+        logging.info(f"{where}Found {len(files)} files with allowed extensions.")
+        logging.info(f"{where}Scanned {scan_stats['directories']} directories "
+                     f"({scan_stats['directories_per_second']:.0f} dirs/s, {scan_stats['files_per_second']:.0f} files/s)")
+        if scan_stats['archives']:
+            logging.info(f"{where}Listed the members of {scan_stats['archives']} archives.")
+        files_per_root.append(files)
+    return files_per_root
+
+def _run(roots: List[Tuple[str, str]], options: Dict[str, Any],
+         progress: Optional[Callable[[int, int], None]], io_slots,
+         profile: Optional[Dict[str, str]] = None,
+         profiler: Optional[profiling.Profiler] = None,
+         sampler: Optional[profiling.SlowFileSampler] = None,
+         bus: Optional[events.EventBus] = None) -> Dict[str, Any]:
+    dry_run = options.get('dry_run', False)
+    io_slots = io_slots or contextlib.nullcontext()
+    workers, isolate, max_memory = extraction_settings(options)
+    peaks = memory.StagePeaks()
+    run_metrics = Metrics(slowest=METRICS['slowest_files'])
+
+    # 2. Scan
+    peaks.begin('scan')
+    files_per_root = _scan_roots(roots, options, run_metrics)
+
+    shard = options.get('shard')
+    if shard:
+        root_path = roots[0][0]
+        shard_index, shard_count = shard
+        all_files = sharding.order_for_sharding(files_per_root[0], root_path)
+        files_per_root[0] = sharding.select_shard(all_files, root_path, shard_index, shard_count)
+        logging.info(f"Shard {shard_index}/{shard_count}: {len(files_per_root[0])} files assigned to this node.")
+
+    all_files = [path for files in files_per_root for path in files]
+    # Root index of each file; only needed when there are several roots
+    root_of = {path: i for i, files in enumerate(files_per_root) for path in files} if len(roots) > 1 else None
+
+    # 3. Detect Duplicates
+    peaks.begin('duplicates')
+    logging.info("Detecting duplicates...")
+    # Sharded runs hash every file: 'merge' finds duplicates across shards by hash
+    dup_results = duplicates.process_duplicates(all_files, dry_run=dry_run, io_slots=io_slots, metrics=run_metrics,
+                                                size_prefilter=options.get('size_prefilter', DUPLICATES['size_prefilter']) and not shard,
+                                                algorithm=options.get('hash_algorithm'))
+
+    # 4. Process Non-duplicates
+    final_results = []
+    root_results = [[] for _ in roots]
+    read_totals = {}
+
+    near_index = None
+    on_metadata = None
+    if options.get('near_duplicates', NEAR_DUPLICATES['enabled']):
+        near_index = near_duplicates.NearDuplicateIndex(
+            threshold=NEAR_DUPLICATES['threshold'] if options.get('near_threshold') is None else options['near_threshold'],
+            num_perm=NEAR_DUPLICATES['num_perm'],
+            shingle_size=NEAR_DUPLICATES['shingle_size'])
+
+        def on_metadata(res_entry, metadata):
+            near_index.add(res_entry, near_duplicates.metadata_text(metadata))
+
+    # Near-duplicates need the whole body sample of every file, so tier 0 and early exit are skipped with them
+    tiered = options.get('tiered', TIERED_CLASSIFICATION['enabled']) and near_index is None
+    read_options = {"early_exit": options.get('early_exit', EARLY_EXIT['enabled']) and near_index is None}
+
+    # What each file is classified from, for 'reclassify' after keyword changes: the
+    # tier-0 properties and the body sample read (up to the stop point with early exit)
+    metadata_logs = None
+    if not dry_run and RECLASSIFICATION['store_metadata']:
+        metadata_logs = [reclassify.MetadataLog(output_root) for _, output_root in roots]
+        read_options['keep_sample'] = True
+    validate = options.get('validate', VALIDATION['enabled'])
+    quarantine = options.get('quarantine', VALIDATION['quarantine'])
+
+    # 4a. Cheap checks (validation, tier 0) decide which files need body extraction
+    peaks.begin('validation')
+    states = []
+    for item in dup_results:
+        output_root = roots[root_of[item['original_path']] if root_of else 0][1]
+        with io_slots, profiling.watch(sampler, item['original_path']):
+            states.append(start_item(item, output_root, dry_run=dry_run, tiered=tiered,
+                                     validate=validate, quarantine=quarantine, metrics=run_metrics, bus=bus))
+
+    # 4b. Body extraction runs on the pool, most expensive files first (see extraction_settings)
+    peaks.begin('extraction')
+    pool = extraction.ExtractionPool(workers=workers, isolate=isolate,
+                                     io_slots=io_slots, max_memory=max_memory,
+                                     profile=profile, profiler=profiler, sampler=sampler, read_options=read_options)
+    index_of = {}  # path -> position in dup_results, for files waiting on extraction
+    for i, state in enumerate(states):
+        if state['needs_body'] and not state['done']:
+            index_of[state['entry']['original_path']] = i
+    pool.submit([(states[i]['entry']['original_path'], states[i]['pages']) for i in index_of.values()])
+
+    # 4c. Classify, rename and move: files without body extraction first, then the
+    # others as their extraction completes (never waiting behind a queued large file);
+    # the manifest keeps scan order
+    finished = [None] * len(dup_results)
+    done_count = 0
+
+    def finish(i, body):
+        nonlocal done_count
+        item = dup_results[i]
+        state, states[i] = states[i], None  # Drop per-file state (tier-0 metadata) once finished
+        root_index = root_of[item['original_path']] if root_of else 0
+        root_path, output_root = roots[root_index]
+        with io_slots, profiling.watch(sampler, item['original_path']):
+            res_entry = finish_item(state, output_root, dry_run=dry_run, body=body,
+                                    on_metadata=on_metadata, read_totals=read_totals, metrics=run_metrics, bus=bus)
+        if metadata_logs and res_entry['topic'] and state['metadata'] is not None:
+            metadata_logs[root_index].add(item['original_path'], state['metadata'], properties=state['properties'],
+                                          sample=body[2].get('sample') if body else None,
+                                          early_exit=read_options['early_exit'],
+                                          truncated=bool(body and body[2].get('stopped_early')))
+        if shard:
+            # Position in the global order, used by 'merge' to pick the first seen copy
+            res_entry['scan_key'] = sharding.relative_key(item['original_path'], root_path)
+        finished[i] = (root_index, res_entry)
+
+        done_count += 1
+        if progress:
+            progress(done_count, len(dup_results))
+
+    for i, state in enumerate(states):
+        if state is not None and not (state['needs_body'] and not state['done']):
+            finish(i, None)
+    for path, body in pool.as_completed():
+        finish(index_of.pop(path), body)
+
+    for root_index, res_entry in finished:
+        final_results.append(res_entry)
+        root_results[root_index].append(res_entry)
+
+    pool.close()
+    for metadata_log in metadata_logs or ():
+        metadata_log.close()
+    cost_model = pool.cost_report()
+    archives.clear_cache()
+
+    near_clusters = 0
+    if near_index is not None:
+        near_clusters = near_duplicates.annotate_clusters(near_index)
+        logging.info(f"Near-duplicate clusters found: {near_clusters}")
+
+    # 5. Export
+    peaks.begin('reports')
+    if not dry_run:
+        with run_metrics.timer('export'):
+            for (_, output_root), results in zip(roots, root_results):
+                exporter.generate_reports(results, output_root)
+    else:
+        logging.info("[Dry Run] Reports would be generated in output folder.")
+    peaks.end()
+
+    metrics_report = run_metrics.to_dict()
+    if not dry_run:
+        for _, output_root in roots:
+            exporter.write_metrics(metrics_report, output_root)
+
+    per_root = [{"root": root_path, "output_root": output_root, "total_files": len(files), **_counts(results)}
+                for (root_path, output_root), files, results in zip(roots, files_per_root, root_results)]
+    return {
+        "output_root": roots[0][1],
+        "total_files": len(all_files),
+        **_counts(final_results),
+        "near_duplicate_clusters": near_clusters,
+        "extraction_errors": sum(1 for r in final_results if 'extraction_error' in r),
+        "read_stats": read_totals,
+        "tier0_decided": sum(1 for r in final_results if r.get('classification_tier') == 0),
+        "invalid_files": sum(1 for r in final_results if r.get('error') in validator.PROBLEM_CODES),
+        "cost_model": cost_model,
+        "peak_memory_mb": peaks.report(),
+        "metrics": metrics_report,
+        "io": {"total": metrics_report["io"]["total"],
+               "files_read_more_than_once": metrics_report["io"]["files_read_more_than_once"]},
+        # Set only when the memory budget forced fewer concurrent extractions
+        "lowest_concurrency": pool.governor.lowest_limit if pool.governor.lowest_limit < pool.workers else None,
+        "roots": per_root,
+        "results": final_results
+    }
+
+def _counts(results: List[FileRecord]) -> Dict[str, int]:
+    moved_dups = sum(1 for r in results if r['is_duplicate'])
+    processed_count = sum(1 for r in results if not r['is_duplicate'] and 'error' not in r)
+    return {
+        "duplicates": moved_dups,
+        "organized": processed_count,
+        "errors": len(results) - moved_dups - processed_count,
+    }
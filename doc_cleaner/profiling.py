@@ -0,0 +1,169 @@
+"""
+Opt-in profiling for --profile cpu|memory: cProfile or tracemalloc around the
+run (and inside isolated extraction workers), plus stack samples of files that
+take longer than a threshold. Nothing here is created when profiling is off;
+callers use watch(None, ...) which is a plain nullcontext.
+"""
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import traceback
+import contextlib
+from typing import Dict, Optional
+from .config import PROFILING
+
+MODES = ('cpu', 'memory')
+
+class Profiler:
+    """
+    Whole-process profile written to log_dir when stopped; name tells runs and workers apart.
+    cProfile only sees the thread that enabled it: other threads working for the
+    run (extraction pool threads) profile themselves with thread(), and stop()
+    merges their stats into the same output.
+    """
+
+    def __init__(self, mode: str, log_dir: str, name: str = "run"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.log_dir = log_dir
+        self.name = name
+        self._profile = None
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.mode == 'cpu':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILING['traceback_frames'])
+
+    @contextlib.contextmanager
+    def thread(self):
+        """Profiles the calling thread for the duration of the block (cpu mode; tracemalloc sees all threads)."""
+        if self.mode != 'cpu':
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles through sys.monitoring, which already covers every thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._thread_profiles.append(profile)
+
+    def stop(self) -> str:
+        """Stops profiling and writes the output files. Returns the main output path."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        base = os.path.join(self.log_dir, f"profile_{self.mode}_{self.name}")
+        if self.mode == 'cpu':
+            self._profile.disable()
+            text = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=text)
+            with self._lock:
+                for profile in self._thread_profiles:
+                    stats.add(profile)
+            stats.dump_stats(base + ".prof")
+            stats.sort_stats('cumulative').print_stats(PROFILING['top'])
+            with open(base + ".txt", 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+            return base + ".prof"
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        snapshot.dump(base + ".tracemalloc")
+        with open(base + ".txt", 'w', encoding='utf-8') as f:
+            f.write(f"Top {PROFILING['top']} allocation sites (live at the end of the {self.name}):\n")
+            for stat in snapshot.statistics('lineno')[:PROFILING['top']]:
+                f.write(f"{stat}\n")
+            f.write("\nLargest allocation tracebacks:\n")
+            for stat in snapshot.statistics('traceback')[:5]:
+                f.write(f"\n{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                f.write("\n".join(stat.traceback.format()) + "\n")
+        return base + ".txt"
+
+class SlowFileSampler:
+    """
+    Background thread that samples the stack of every thread working on a file
+    for longer than threshold seconds. Samples are grouped by stack and appended
+    to log_dir/slow_files_<name>.txt when the file finishes.
+    """
+
+    def __init__(self, log_dir: str, threshold: Optional[float] = None,
+                 interval: Optional[float] = None, name: str = "run"):
+        self.threshold = PROFILING['slow_file_seconds'] if threshold is None else threshold
+        self.interval = interval or PROFILING['sample_interval']
+        self.path = os.path.join(log_dir, f"slow_files_{name}.txt")
+        os.makedirs(log_dir, exist_ok=True)
+        self.slow_files = 0
+        self._active = {}  # thread id -> [file path, start time, {stack: count}]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, daemon=True)
+        self._thread.start()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                slow = {tid: entry for tid, entry in self._active.items() if now - entry[1] >= self.threshold}
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for tid, entry in slow.items():
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = "".join(traceback.format_stack(frame))
+                with self._lock:
+                    entry[2][stack] = entry[2].get(stack, 0) + 1
+
+    @contextlib.contextmanager
+    def watch(self, path: str):
+        tid = threading.get_ident()
+        entry = [path, time.monotonic(), {}]
+        with self._lock:
+            self._active[tid] = entry
+        try:
+            yield
+        finally:
+            with self._lock:
+                del self._active[tid]
+            if entry[2]:
+                self._write(path, time.monotonic() - entry[1], entry[2])
+
+    def _write(self, path: str, seconds: float, samples: Dict[str, int]):
+        with self._lock:
+            self.slow_files += 1
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"=== {path} ({seconds:.2f}s, {sum(samples.values())} samples)\n")
+                for stack, count in sorted(samples.items(), key=lambda item: -item[1]):
+                    f.write(f"--- {count} samples\n{stack}\n")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+def thread_profile(profiler: Optional[Profiler]):
+    """profiler.thread(), or a no-op when profiling is off."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.thread()
+
+def watch(sampler: Optional[SlowFileSampler], path: str):
+    """sampler.watch(path), or a no-op when profiling is off."""
+    if sampler is None:
+        return contextlib.nullcontext()
+    return sampler.watch(path)
@@ -0,0 +1,194 @@
+"""
+Reclassification after topic_keywords changes: every run stores what each file
+was classified from in extracted_metadata.jsonl (see reclassification.store_metadata
+in config): its tier-0 properties and the body sample that was read (up to the
+stop point when early exit cut reading short). 'reclassify' applies the run's
+rules again with the current keywords (tier 0 against tiered_classification.min_score,
+then the body sample with or without early exit), so it picks the topic a new run
+would. Only the files whose topic changed are renamed and moved to their new
+topic folder. A document is read again only when its stored sample is not enough:
+decided at tier 0 and the properties no longer decide, or cut short by early exit
+and the current keywords would read further. Its organized copy is read once and
+the whole sample stored.
+
+Usage: python -m doc_cleaner reclassify RUN_FOLDER [RUN_FOLDER ...] [--dry-run]
+"""
+import os
+import json
+import logging
+import argparse
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from . import classifier, content_reader, renamer, organizer, exporter, io_accounting
+from .io_accounting import open_file
+from .config import TIERED_CLASSIFICATION
+
+METADATA_FILE = "extracted_metadata.jsonl"
+
+class MetadataLog:
+    """
+    Appends one line per classified file to output_root/extracted_metadata.jsonl,
+    keeping the file open for the whole run:
+    {"original_path", "metadata" (what it was classified from), "properties" (tier-0
+     metadata, null without tier 0), "sample" (body chunks from read_content's
+     keep_sample, null when the body was not read), "early_exit" (bool),
+     "truncated" (early exit stopped reading before the end of the sample)}
+    """
+
+    def __init__(self, output_root: str):
+        self._file = open_file(os.path.join(output_root, METADATA_FILE), 'a', encoding='utf-8')
+
+    def add(self, original_path: str, metadata: Dict[str, str], properties: Optional[Dict[str, str]] = None,
+            sample: Optional[List[Tuple[str, str]]] = None, early_exit: bool = False, truncated: bool = False):
+        record = {"original_path": original_path, "metadata": metadata, "properties": properties,
+                  "sample": sample, "early_exit": early_exit, "truncated": truncated}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+def load_metadata(run_folder: str) -> Dict[str, Dict[str, Any]]:
+    """Stored records of a run folder by original path (later lines win)."""
+    stored = {}
+    with open_file(os.path.join(run_folder, METADATA_FILE), 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                stored[record['original_path']] = record
+    return stored
+
+def classify_record(record: Dict[str, Any], entry: Dict[str, Any]) -> Optional[str]:
+    """
+    Topic of a stored record under the run's rules and the current keywords, or
+    None when more of its body is needed than was stored (decided at tier 0, or
+    cut short by early exit while the current keywords would read further).
+    entry: the file's manifest entry.
+    """
+    if 'sample' not in record:
+        # Written before samples were stored
+        return classifier.classify_document(record['metadata'])
+    if record['properties'] is not None:
+        topic = classifier.confident_topic(record['properties'], TIERED_CLASSIFICATION['min_score'])
+        if topic:
+            return topic
+    if entry.get('extraction_error'):
+        # Classified from the file name, as in the run
+        return classifier.classify_document(record['metadata'])
+    if record['sample'] is None:
+        return None
+    stats = {}
+    metadata = content_reader.sample_metadata(record['sample'], record['early_exit'], stats)
+    if record.get('truncated') and not stats['stopped_early']:
+        return None
+    return classifier.classify_document(metadata)
+
+def _ref_date(entry: Dict[str, Any]) -> datetime.datetime:
+    """Date the file was renamed and filed with (its modified date, as in the run)."""
+    try:
+        return datetime.datetime.fromisoformat(entry['modified_at'])
+    except (KeyError, TypeError, ValueError):
+        return datetime.datetime.fromtimestamp(io_accounting.stat(entry['current_path']).st_mtime)
+
+def reclassify(run_folder: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Classifies the stored metadata of run_folder again and moves the organized
+    files whose topic changed (new name from renamer.generate_new_name, new
+    destination inside run_folder). manifest.json and the organization plan are
+    rewritten with the new paths, so restore.py keeps working; moved entries
+    record their previous topic as 'reclassified_from'.
+    Files whose stored sample is not enough (see classify_record) are read from their
+    current path; their whole sample is appended to the stored metadata ('read_again').
+    Raises OSError when the run folder has no manifest.json or stored metadata.
+    """
+    stored = load_metadata(run_folder)
+    with open_file(os.path.join(run_folder, "manifest.json"), 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+
+    changed = []
+    unchanged = 0
+    missing = 0
+    errors = 0
+    read_again = 0
+    metadata_log = None
+
+    for entry in entries:
+        if entry.get('is_duplicate') or entry.get('error') or not entry.get('topic'):
+            continue
+        original_path = entry['original_path']
+        record = stored.get(original_path)
+        if record is None:
+            missing += 1
+            continue
+
+        topic = classify_record(record, entry)
+        if topic is None:
+            stats = {}
+            content_reader.read_content(entry['current_path'], stats, early_exit=False, keep_sample=True)
+            record['sample'] = stats['sample']
+            record['truncated'] = False
+            read_again += 1
+            if not dry_run:
+                metadata_log = metadata_log or MetadataLog(run_folder)
+                metadata_log.add(original_path, record['metadata'], properties=record['properties'],
+                                 sample=record['sample'], early_exit=record['early_exit'])
+            topic = classify_record(record, entry)
+        if topic == entry['topic']:
+            unchanged += 1
+            continue
+
+        try:
+            ref_date = _ref_date(entry)
+            new_name = renamer.generate_new_name(original_path, topic, ref_date)
+            dest_dir = organizer.determine_destination(run_folder, topic, ref_date, new_name)
+            new_path = organizer.move_file(entry['current_path'], dest_dir, new_name, dry_run=dry_run)
+        except OSError as e:
+            logging.error(f"Error reclassifying {original_path}: {e}")
+            errors += 1
+            continue
+
+        logging.info(f"Reclassified {os.path.basename(original_path)}: {entry['topic']} -> {topic}")
+        entry['reclassified_from'] = entry['topic']
+        entry['topic'] = topic
+        entry['current_path'] = new_path
+        changed.append(entry)
+
+    if metadata_log:
+        metadata_log.close()
+    if changed and not dry_run:
+        exporter.generate_reports(entries, run_folder)
+
+    return {
+        "run_folder": run_folder,
+        "reclassified": len(changed),
+        "unchanged": unchanged,
+        "without_metadata": missing,
+        "errors": errors,
+        "read_again": read_again,
+        "results": changed
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="doc_cleaner reclassify",
+                                     description="Apply the current topic keywords to earlier runs without re-reading documents")
+    parser.add_argument("runs", nargs="+", metavar="run_folder", help="DocCleaner_Run_* folders to reclassify")
+    parser.add_argument("--dry-run", action="store_true", help="Report topic changes without moving files")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    summaries: List[Dict[str, Any]] = []
+    for run in args.runs:
+        try:
+            summaries.append(reclassify(os.path.abspath(run), dry_run=args.dry_run))
+        except OSError as e:
+            print(f"Error: {run}: {e}")
+
+    print("\n" + "="*40)
+    print("DocCleaner Reclassification Complete")
+    print("="*40)
+    for summary in summaries:
+        print(f"{summary['run_folder']}: {summary['reclassified']} reclassified, {summary['unchanged']} unchanged, "
+              f"{summary['without_metadata']} without stored metadata, {summary['errors']} errors, "
+              f"{summary['read_again']} read again")
+        for entry in summary['results']:
+            print(f"  {entry['reclassified_from']} -> {entry['topic']}: {entry['current_path']}")
+    print("="*40)
@@ -0,0 +1,149 @@
+"""
+Compact per-file record carried from duplicate detection to the manifest.
+
+One FileRecord replaces the separate duplicates-result and manifest dicts:
+fields live in __slots__ instead of a per-object dict, and paths are stored
+as an interned directory plus a file name, so the thousands of files sharing
+a folder share one directory string. Records still behave like the old
+dicts for reading and writing keys (record['topic'], record.get('error'),
+'error' in record), and to_dict() gives the unchanged manifest entry.
+"""
+import os
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_MISSING = object()
+
+# Manifest keys in their serialized order; each maps to a slot (or a path property)
+MANIFEST_FIELDS = ('original_path', 'created_at', 'modified_at', 'is_duplicate', 'topic', 'current_path', 'hash',
+                   'hash_algorithm')
+_SLOT_KEYS = frozenset(MANIFEST_FIELDS + ('final_path', 'error'))
+
+def split_path(path: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Path -> (interned directory, file name)."""
+    if path is None:
+        return None, None
+    directory, name = os.path.split(path)
+    return sys.intern(directory), name
+
+def join_path(directory: Optional[str], name: Optional[str]) -> Optional[str]:
+    if name is None:
+        return None
+    return os.path.join(directory, name) if directory else name
+
+class FileRecord:
+    """
+    Per-file state through the pipeline. Besides the manifest fields:
+    - 'final_path' is an alias of current_path (name used by duplicate detection).
+    - 'error' is only present once set.
+    - Any other key (classification_tier, extraction_error, scan_key, ...) goes to
+      a small extras dict that is created on first use.
+    """
+    __slots__ = ('_orig_dir', '_orig_name', '_cur_dir', '_cur_name', '_digest', 'hash_algorithm',
+                 'is_duplicate', 'topic', 'created_at', 'modified_at', 'error', 'extra')
+
+    def __init__(self, original_path: str, hash: Optional[str] = None, is_duplicate: bool = False,
+                 current_path: Optional[str] = None, hash_algorithm: Optional[str] = None):
+        self._orig_dir, self._orig_name = split_path(original_path)
+        self.current_path = original_path if current_path is None else current_path
+        self.hash = hash
+        self.hash_algorithm = hash_algorithm
+        self.is_duplicate = is_duplicate
+        self.topic = None
+        self.created_at = None
+        self.modified_at = None
+        self.error = _MISSING
+        self.extra = None
+
+    @property
+    def original_path(self) -> str:
+        return join_path(self._orig_dir, self._orig_name)
+
+    @property
+    def current_path(self) -> Optional[str]:
+        # Unchanged paths share the original's strings
+        return join_path(self._cur_dir, self._cur_name)
+
+    @current_path.setter
+    def current_path(self, path: Optional[str]):
+        if path == self.original_path:
+            self._cur_dir, self._cur_name = self._orig_dir, self._orig_name
+        else:
+            self._cur_dir, self._cur_name = split_path(path)
+
+    final_path = current_path
+
+    @property
+    def hash(self) -> Optional[str]:
+        # Hex digests are kept as raw bytes (half the size of the hex string)
+        if isinstance(self._digest, bytes):
+            return self._digest.hex()
+        return self._digest
+
+    @hash.setter
+    def hash(self, value: Optional[str]):
+        try:
+            self._digest = bytes.fromhex(value) if value else value
+        except ValueError:
+            self._digest = value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _SLOT_KEYS:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.extra is None:
+            return default
+        return self.extra.get(key, default)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _SLOT_KEYS:
+            setattr(self, key, value)
+            return
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if key == 'error':
+            self.error = _MISSING
+        elif key not in _SLOT_KEYS:
+            del self.extra[key]
+        else:
+            raise KeyError(f"{key} cannot be removed")
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> Iterator[str]:
+        yield from MANIFEST_FIELDS
+        if self.error is not _MISSING:
+            yield 'error'
+        if self.extra:
+            yield from self.extra
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self.keys():
+            yield key, self.get(key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Manifest entry (same keys and order as the former res_entry dicts)."""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"FileRecord({self.to_dict()!r})"
+
+def to_json(value: Any) -> Any:
+    """json.dump default= hook so lists of records serialize as manifest entries."""
+    if isinstance(value, FileRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
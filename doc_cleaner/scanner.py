@@ -1,41 +1,158 @@
 import os
+import time
 import pathlib
-from typing import List
-from .config import ALLOWED_EXTENSIONS
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Tuple
+from . import archives
+from .config import ALLOWED_EXTENSIONS, ARCHIVES
 
-def scan_folder(root_path: str, recursive: bool = True) -> List[str]:
+def is_excluded_dir(name: str) -> bool:
+    """Internal folders, hidden folders and previous run outputs are never scanned."""
+    return name.startswith('.') or name.startswith('__') or name.startswith('DocCleaner_Run_')
+
+def walk_order_key(rel_path: str) -> Tuple[Tuple[int, str], ...]:
+    """
+    Sort key reproducing scan_folder's order for '/'-separated paths relative to
+    the scanned root: names sorted, the files of a folder before its subfolders.
+    """
+    parts = rel_path.split('/')
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+def scan_folder(root_path: str, recursive: bool = True, workers: int = 1,
+                stats: Optional[Dict[str, Any]] = None,
+                include_archives: Optional[bool] = None) -> List[str]:
     """
     Scans the root_path for files with allowed extensions.
     recursive: if True, scans subdirectories. If False, only root_path.
+    workers: if > 1 (and recursive), independent subtrees are listed in parallel.
+             Files come in the same deterministic order for any number of workers:
+             sorted by name, a folder's files before its subfolders (depth-first),
+             so the copy kept by duplicate detection does not depend on workers.
+    stats: optional dict filled with directory/file counts and rates.
+    include_archives: list the matching members of ZIP archives (as virtual
+                      'archive.zip!/member' paths) in place of each archive;
+                      defaults to archives.enabled in config.
     Returns a list of absolute file paths.
     """
     valid_files = []
-    
+    start = time.perf_counter()
+    dir_count = 0
+    if include_archives is None:
+        include_archives = ARCHIVES['enabled']
+    extensions = ALLOWED_EXTENSIONS | set(archives.ARCHIVE_EXTENSIONS) if include_archives else ALLOWED_EXTENSIONS
+
     # Ensure root_path is absolute
     root_path = os.path.abspath(root_path)
-    
-    if recursive:
+
+    if recursive and workers > 1:
+        valid_files, dir_count = _parallel_walk(root_path, workers, extensions)
+    elif recursive:
         # Recursive scan using walk
         for root, dirs, files in os.walk(root_path):
+            dir_count += 1
             # Exclude internal folders, hidden folders, and previous run outputs
-            dirs[:] = [d for d in dirs if not d.startswith('.') and not d.startswith('__') and not d.startswith('DocCleaner_Run_')]
-            
-            for file in files:
+            # (sorted in place: os.walk descends in this order, as _parallel_walk does)
+            dirs[:] = sorted(d for d in dirs if not is_excluded_dir(d))
+
+            for file in sorted(files):
                 ext = os.path.splitext(file)[1].lower()
-                if ext in ALLOWED_EXTENSIONS:
+                if ext in extensions:
                     full_path = os.path.join(root, file)
                     valid_files.append(full_path)
     else:
         # Non-recursive: just list the top directory
+        dir_count = 1
         try:
              # Manual listdir
              with os.scandir(root_path) as it:
                 for entry in it:
                     if entry.is_file():
                         ext = os.path.splitext(entry.name)[1].lower()
-                        if ext in ALLOWED_EXTENSIONS:
+                        if ext in extensions:
                             valid_files.append(entry.path)
         except OSError as e:
             print(f"Error checking directory {root_path}: {e}")
+        valid_files.sort()
+
+    archive_count = 0
+    if include_archives:
+        expanded = []
+        for path in valid_files:
+            if archives.is_archive(path):
+                archive_count += 1
+                expanded.extend(archives.list_members(path))
+            else:
+                expanded.append(path)
+        valid_files = expanded
+
+    if stats is not None:
+        elapsed = time.perf_counter() - start
+        stats.update({
+            "directories": dir_count,
+            "archives": archive_count,
+            "files": len(valid_files),
+            "elapsed_seconds": elapsed,
+            "directories_per_second": dir_count / elapsed if elapsed > 0 else 0.0,
+            "files_per_second": len(valid_files) / elapsed if elapsed > 0 else 0.0,
+        })
 
     return valid_files
+
+def _list_dir(path: str, extensions=ALLOWED_EXTENSIONS) -> Tuple[List[str], List[str]]:
+    """
+    Lists a single directory.
+    Returns (subdirectories to descend into, matching files), both sorted by name.
+    """
+    subdirs = []
+    files = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    # Same rules as os.walk(followlinks=False): symlinked dirs are not descended
+                    if not is_excluded_dir(entry.name) and not entry.is_symlink():
+                        subdirs.append(entry.path)
+                else:
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext in extensions:
+                        files.append(entry.path)
+    except OSError as e:
+        print(f"Error checking directory {path}: {e}")
+    subdirs.sort()
+    files.sort()
+    return subdirs, files
+
+def _parallel_walk(root_path: str, workers: int, extensions=ALLOWED_EXTENSIONS) -> Tuple[List[str], int]:
+    """
+    Lists the tree under root_path on a thread pool, one task per directory.
+    Directory listings complete in any order, so the final list is assembled
+    afterwards in depth-first order (files of a folder before its subfolders),
+    which keeps 'first seen' duplicate selection stable between runs.
+    Returns (files, number of directories listed).
+    """
+    listings = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_list_dir, root_path, extensions): root_path}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                subdirs, files = future.result()
+                listings[path] = (subdirs, files)
+                for sub in subdirs:
+                    pending[pool.submit(_list_dir, sub, extensions)] = sub
+
+    valid_files = []
+    stack = [root_path]
+    while stack:
+        path = stack.pop()
+        subdirs, files = listings[path]
+        valid_files.extend(files)
+        stack.extend(reversed(subdirs))
+
+    return valid_files, len(listings)
@@ -0,0 +1,239 @@
+"""
+Resident DocCleaner service: one warm process that accepts cleanup jobs over a
+local HTTP API (TCP on localhost or a Unix socket).
+
+Usage: python -m doc_cleaner serve [--port 8765 | --socket /run/doccleaner.sock]
+
+API:
+    POST /jobs                {"folder": "...", "recursive": true, "dry_run": false}
+    GET  /jobs                list of jobs
+    GET  /jobs/<id>           status and progress of one job
+    GET  /jobs/<id>/results   per-file results of a finished job
+"""
+import os
+import json
+import uuid
+import argparse
+import datetime
+import logging
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+from . import organizer, pipeline, memory
+from .records import to_json
+
+class Job:
+    """One submitted (folder, options) cleanup and its progress."""
+
+    def __init__(self, folder: str, options: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.folder = folder
+        self.options = options
+        self.status = "queued"
+        self.done = 0
+        self.total = None
+        self.output_root = None
+        self.summary = None
+        self.error = None
+        self.submitted_at = datetime.datetime.now().isoformat()
+        self.finished_at = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = None
+        if self.summary:
+            summary = {k: v for k, v in self.summary.items() if k != 'results'}
+        return {
+            "id": self.id,
+            "folder": self.folder,
+            "options": self.options,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "output_root": self.output_root,
+            "summary": summary,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobManager:
+    """
+    Runs jobs on a shared pool. max_jobs bounds how many folders are processed
+    at once; io_slots bounds how many files are hashed/processed at once across
+    all jobs, so teams sharing a host don't all compete for the disks.
+    Each job runs pipeline.run with its own ExtractionPool (and worker processes
+    when isolated), sized by the job's 'workers': up to max_jobs x workers parsers
+    run at once, and a job's 'max_memory' budgets its own workers only.
+    """
+
+    def __init__(self, max_jobs: int = 2, io_concurrency: int = 4):
+        self.pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="doccleaner-job")
+        self.io_slots = threading.BoundedSemaphore(io_concurrency)
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, folder: str, options: Dict[str, Any]) -> Job:
+        folder = os.path.abspath(folder)
+        if not os.path.isdir(folder):
+            raise ValueError(f"Folder does not exist: {folder}")
+        pipeline.check_options(options)
+
+        with self._lock:
+            for job in self.jobs.values():
+                if job.folder == folder and job.status in ("queued", "running"):
+                    raise RuntimeError(f"A job for {folder} is already {job.status}: {job.id}")
+            job = Job(folder, options)
+            self.jobs[job.id] = job
+
+        self.pool.submit(self._run, job)
+        return job
+
+    def list_jobs(self):
+        """Snapshot of the jobs (submit may add one meanwhile)."""
+        with self._lock:
+            return list(self.jobs.values())
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job: Job):
+        job.status = "running"
+        try:
+            dry_run = job.options.get('dry_run', False)
+            run_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            job.output_root = organizer.create_output_structure(job.folder, run_timestamp, dry_run=dry_run)
+            logging.info(f"Job {job.id}: started on {job.folder}")
+
+            def update_progress(done, total):
+                job.done, job.total = done, total
+
+            job.summary = pipeline.run(job.folder, job.output_root, job.options,
+                                       progress=update_progress, io_slots=self.io_slots)
+            job.status = "done"
+            logging.info(f"Job {job.id}: finished ({job.summary['organized']} organized, "
+                         f"{job.summary['duplicates']} duplicates)")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logging.error(f"Job {job.id} failed: {e}", exc_info=True)
+        finally:
+            job.finished_at = datetime.datetime.now().isoformat()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+class RequestHandler(BaseHTTPRequestHandler):
+    manager = None  # JobManager, set by make_server
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=to_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+
+        if parts == ["jobs"]:
+            return self._send_json(200, [job.to_dict() for job in self.manager.list_jobs()])
+
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.manager.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": f"Unknown job: {parts[1]}"})
+            if len(parts) == 2:
+                return self._send_json(200, job.to_dict())
+            if parts[2] == "results":
+                if job.status != "done":
+                    return self._send_json(409, {"error": f"Job is {job.status}"})
+                return self._send_json(200, job.summary['results'])
+
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != "/jobs":
+            return self._send_json(404, {"error": "Not found"})
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            folder = request["folder"]
+            options = {
+                "recursive": bool(request.get("recursive", False)),
+                "dry_run": bool(request.get("dry_run", False)),
+                "scan_workers": int(request.get("scan_workers", 1)),
+            }
+            if "isolate" in request:
+                options["isolate"] = bool(request["isolate"])
+            if "workers" in request:
+                options["workers"] = int(request["workers"])
+            if "max_memory" in request:
+                options["max_memory"] = memory.parse_size(request["max_memory"])
+            if "events" in request:
+                options["events"] = str(request["events"])
+        except (ValueError, TypeError, KeyError) as e:
+            return self._send_json(400, {"error": f"Invalid job request: {e}"})
+
+        try:
+            job = self.manager.submit(folder, options)
+        except ValueError as e:
+            return self._send_json(400, {"error": str(e)})
+        except RuntimeError as e:
+            return self._send_json(409, {"error": str(e)})
+        self._send_json(202, job.to_dict())
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        # Attributes BaseHTTPRequestHandler expects from HTTPServer
+        self.server_name = "localhost"
+        self.server_port = 0
+
+def make_server(manager: JobManager, port: int = 8765, socket_path: str = None):
+    """Creates the HTTP server bound to localhost:port, or to socket_path if given."""
+    handler = type("BoundRequestHandler", (RequestHandler,), {"manager": manager})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="doc_cleaner serve", description="DocCleaner service: run cleanup jobs submitted over a local API")
+    parser.add_argument("--port", type=int, default=8765, help="Port on 127.0.0.1 to listen on")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-jobs", type=int, default=2, help="Jobs (folders) processed concurrently")
+    parser.add_argument("--io-concurrency", type=int, default=4, help="Files hashed/processed concurrently across all jobs")
+    args = parser.parse_args(argv)
+
+    # Console only: every job still writes its manifest and reports in its own run folder
+    pipeline.setup_logging(None, dry_run=True)
+
+    manager = JobManager(max_jobs=args.max_jobs, io_concurrency=args.io_concurrency)
+    server = make_server(manager, port=args.port, socket_path=args.socket)
+    where = args.socket or f"http://127.0.0.1:{args.port}"
+    logging.info(f"DocCleaner service listening on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
@@ -0,0 +1,150 @@
+"""
+Sharded runs: N machines sharing a mount each process a deterministic slice
+of the tree (--shard i/N), then 'merge' combines the shard manifests and
+resolves duplicates that ended up in different shards.
+
+Usage: python -m doc_cleaner merge RUN_OR_MANIFEST [RUN_OR_MANIFEST ...] --output DIR
+"""
+import os
+import json
+import hashlib
+import argparse
+from typing import List, Dict, Any, Tuple
+from . import duplicates, exporter, scanner
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parses 'i/N' (1-based, e.g. '2/4') into (i, N).
+    Raises ValueError on malformed specs.
+    """
+    try:
+        index_str, count_str = spec.split('/')
+        index, count = int(index_str), int(count_str)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/N (e.g. 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': i must be between 1 and N")
+    return index, count
+
+def relative_key(path: str, root_path: str) -> str:
+    """Path relative to the scanned root with '/' separators, identical on every machine."""
+    return os.path.relpath(path, root_path).replace(os.sep, '/')
+
+def shard_of(rel_path: str, count: int) -> int:
+    """Returns the 1-based shard a relative path belongs to."""
+    digest = hashlib.sha1(rel_path.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+def order_for_sharding(file_paths: List[str], root_path: str) -> List[str]:
+    """
+    Sorts scanned files in scan_folder's walk order of their relative path. The
+    relative path (recorded as scan_key) does not depend on what other nodes have
+    already moved, so this order is the same on all machines and defines 'first
+    seen' inside a shard and across shards exactly as in an unsharded run.
+    """
+    return sorted(file_paths, key=lambda p: scanner.walk_order_key(relative_key(p, root_path)))
+
+def select_shard(file_paths: List[str], root_path: str, index: int, count: int) -> List[str]:
+    """Keeps the files whose relative path hashes to shard index (1-based) of count."""
+    return [p for p in file_paths if shard_of(relative_key(p, root_path), count) == index]
+
+def _load_manifest(path: str) -> List[Dict[str, Any]]:
+    if os.path.isdir(path):
+        path = os.path.join(path, "manifest.json")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def merge(manifest_paths: List[str], output_path: str, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Combines shard manifests into output_path and resolves cross-shard duplicates.
+    Within each (extension, hash) group the first entry in walk order of scan_key
+    is kept, as process_duplicates keeps the first file seen in an unsharded run;
+    an entry with an error (not organized) is only kept when every copy has one.
+    The other copies are moved from their current location to the duplicated folder.
+    Writes manifest.json, doccleaner_organization_plan.json and hash_index.json.
+    The merged manifest supersedes the shard manifests for restore.py.
+    Raises ValueError when the shards hashed with different algorithms.
+    """
+    entries = []
+    for path in manifest_paths:
+        entries.extend(_load_manifest(path))
+
+    # Manifests written before the algorithm was recorded used SHA-256
+    algorithms = {entry.get('hash_algorithm') or 'sha256' for entry in entries if entry.get('hash')}
+    if len(algorithms) > 1:
+        raise ValueError(f"Shard manifests use different hash algorithms ({', '.join(sorted(algorithms))}); "
+                         "duplicates cannot be matched across them")
+
+    # Group by extension and hash, like duplicates.process_duplicates
+    groups = {}
+    for entry in entries:
+        if not entry.get('hash') or entry.get('scan_key') is None:
+            continue
+        ext = os.path.splitext(entry['original_path'])[1].lower()
+        groups.setdefault((ext, entry['hash']), []).append(entry)
+
+    hash_index = {}  # ext -> {hash: kept original_path}
+    moved = 0
+    errors = 0
+
+    for (ext, file_hash), group in groups.items():
+        group.sort(key=lambda e: scanner.walk_order_key(e['scan_key']))
+        # Copies already marked as duplicates inside their shard are not candidates
+        candidates = [e for e in group if not e.get('is_duplicate')] or group
+        kept = next((e for e in candidates if not e.get('error')), candidates[0])
+        hash_index.setdefault(ext, {})[file_hash] = kept['original_path']
+
+        for entry in group:
+            if entry is kept or entry.get('is_duplicate'):
+                continue # Kept, or already handled inside its shard
+            try:
+                new_path = duplicates.move_to_duplicated(entry['current_path'], dry_run=dry_run)
+            except Exception as e:
+                entry['error'] = str(e)
+                errors += 1
+                continue
+            entry['is_duplicate'] = True
+            entry['topic'] = None
+            entry['current_path'] = new_path
+            entry['duplicate_of'] = kept['original_path']
+            moved += 1
+
+    entries.sort(key=lambda e: scanner.walk_order_key(e.get('scan_key') or ''))
+
+    if not dry_run:
+        os.makedirs(output_path, exist_ok=True)
+        exporter.generate_reports(entries, output_path)
+        with open(os.path.join(output_path, "hash_index.json"), 'w', encoding='utf-8') as f:
+            json.dump({"hash_algorithm": algorithms.pop() if algorithms else None, "index": hash_index},
+                      f, indent=2, ensure_ascii=False)
+
+    return {
+        "manifests": len(manifest_paths),
+        "entries": len(entries),
+        "cross_shard_duplicates": moved,
+        "errors": errors,
+        "results": entries
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="doc_cleaner merge", description="Merge the manifests of a sharded DocCleaner run")
+    parser.add_argument("manifests", nargs="+", help="Shard run folders or their manifest.json files")
+    parser.add_argument("--output", "-o", required=True, help="Folder for the merged manifest and reports")
+    parser.add_argument("--dry-run", action="store_true", help="Report cross-shard duplicates without moving files")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = merge(args.manifests, os.path.abspath(args.output), dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    print("\n" + "="*40)
+    print("DocCleaner Merge Complete")
+    print("="*40)
+    print(f"Shard manifests: {summary['manifests']}")
+    print(f"Entries: {summary['entries']}")
+    print(f"Cross-shard duplicates moved: {summary['cross_shard_duplicates']}")
+    print(f"Errors: {summary['errors']}")
+    print(f"Output location: {os.path.abspath(args.output)}")
+    print("="*40)
@@ -0,0 +1,225 @@
+"""
+Cheap pre-validation from magic bytes and container markers, so renamed,
+truncated, encrypted or empty files are rejected before any parser is loaded.
+"""
+import os
+import re
+import struct
+from typing import Optional
+from . import io_accounting
+
+# Problem codes recorded in the manifest as 'error'
+EMPTY_FILE = "EmptyFile"
+TRUNCATED = "Truncated"
+ENCRYPTED = "Encrypted"
+EXTENSION_MISMATCH = "ExtensionMismatch"
+PACKAGE_MISMATCH = "PackageMismatch"
+PROBLEM_CODES = (EMPTY_FILE, TRUNCATED, ENCRYPTED, EXTENSION_MISMATCH, PACKAGE_MISMATCH)
+
+PDF_MAGIC = b'%PDF-'
+ZIP_MAGIC = b'PK\x03\x04'
+EMPTY_ZIP_MAGIC = b'PK\x05\x06'
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# PDF readers look for the header in the first 1 KB and for %%EOF in the last 1 KB
+_PDF_WINDOW = 1024
+# Trailer / xref stream dictionary that carries /Encrypt
+_PDF_TRAILER_WINDOW = 4096
+_PDF_STARTXREF = re.compile(rb'startxref\s+(\d+)')
+_PDF_XREF_SUBSECTION = re.compile(rb'\s*(\d+)\s+(\d+)[ \t]*\r?\n')
+_PDF_OBJECT = re.compile(rb'\s*\d+\s+\d+\s+obj')
+# Each entry of a classic cross-reference table is exactly 20 bytes
+_PDF_XREF_ENTRY = 20
+# OLE compound file: header fields, directory entries, end of a sector chain
+_OLE_HEADER_SIZE = 512
+_OLE_DIR_ENTRY = 128
+_OLE_STREAM = 2
+_OLE_MAX_SECTOR = 0xFFFFFFFA
+_OLE_HEADER_DIFAT = 109
+# End of central directory record: 22 bytes + up to 64 KB comment
+_EOCD_SIZE = 22
+_EOCD_WINDOW = _EOCD_SIZE + 65535
+
+# Part every package of each type must contain
+_OOXML_MAIN_PART = {
+    '.docx': b'word/document.xml',
+    '.xlsx': b'xl/workbook.xml',
+    '.pptx': b'ppt/presentation.xml',
+}
+
+def sniff_file(path: str) -> Optional[str]:
+    """
+    Checks that the file looks like what its extension says.
+    Returns None if it looks valid (or the type is not checked),
+    otherwise one of the problem codes above.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    size = io_accounting.getsize(path)
+    if size == 0:
+        return EMPTY_FILE
+
+    with io_accounting.open_file(path, 'rb') as f:
+        head = f.read(_PDF_WINDOW)
+        if ext == '.pdf':
+            return _check_pdf(f, head, size)
+        if ext in _OOXML_MAIN_PART:
+            return _check_ooxml(f, head, size, ext)
+    return None
+
+def _read_tail(f, size: int, window: int) -> bytes:
+    f.seek(max(0, size - window))
+    return f.read(window)
+
+def _check_pdf(f, head: bytes, size: int) -> Optional[str]:
+    if PDF_MAGIC not in head:
+        return EXTENSION_MISMATCH
+    if b'%%EOF' not in _read_tail(f, size, _PDF_WINDOW):
+        return TRUNCATED
+    tail = _read_tail(f, size, _PDF_TRAILER_WINDOW)
+    startxref = list(_PDF_STARTXREF.finditer(tail))
+    trailer = _pdf_trailer(f, int(startxref[-1].group(1)), size) if startxref else None
+    if trailer is None:
+        # No usable startxref: fall back to the trailer near the end of the file
+        trailer = tail
+    if b'/Encrypt' in trailer:
+        return ENCRYPTED
+    linearized = head.find(b'/Linearized')
+    if linearized >= 0:
+        # The first-page trailer of a linearized file follows its parameter dictionary
+        end = head.find(b'endobj', linearized)
+        first = _pdf_trailer(f, end + len(b'endobj'), size) if end >= 0 else None
+        if first and b'/Encrypt' in first:
+            return ENCRYPTED
+    return None
+
+def _pdf_trailer(f, offset: int, size: int) -> Optional[bytes]:
+    """
+    Trailer dictionary of the cross-reference section at offset: a classic
+    xref table (its subsections are skipped by entry count) or an xref stream
+    object. Returns None when offset does not point at either.
+    """
+    if offset >= size:
+        return None
+    f.seek(offset)
+    chunk = f.read(_PDF_TRAILER_WINDOW)
+    stripped = chunk.lstrip()
+    if _PDF_OBJECT.match(stripped):
+        return _pdf_dictionary(stripped)
+    if not stripped.startswith(b'xref'):
+        return None
+    pos = offset + len(chunk) - len(stripped) + len(b'xref')
+    while pos < size:
+        f.seek(pos)
+        chunk = f.read(_PDF_TRAILER_WINDOW)
+        subsection = _PDF_XREF_SUBSECTION.match(chunk)
+        if not subsection:
+            break
+        pos += subsection.end() + int(subsection.group(2)) * _PDF_XREF_ENTRY
+    stripped = chunk.lstrip()
+    if not stripped.startswith(b'trailer'):
+        return None
+    return _pdf_dictionary(stripped)
+
+def _pdf_dictionary(data: bytes) -> bytes:
+    """The first << ... >> dictionary in data (up to the end of data if it is not closed there)."""
+    start = data.find(b'<<')
+    if start < 0:
+        return b''
+    depth, pos = 0, start
+    while pos < len(data) - 1:
+        pair = data[pos:pos + 2]
+        if pair == b'<<':
+            depth += 1
+            pos += 2
+        elif pair == b'>>':
+            depth -= 1
+            pos += 2
+            if depth == 0:
+                return data[start:pos]
+        else:
+            pos += 1
+    return data[start:]
+
+def _check_ooxml(f, head: bytes, size: int, ext: str) -> Optional[str]:
+    if head.startswith(OLE_MAGIC):
+        # Password-protected OOXML is wrapped in an OLE compound file with an
+        # EncryptionInfo stream; anything else is a legacy .doc/.xls/.ppt renamed
+        if 'EncryptionInfo' in _ole_stream_names(f, size):
+            return ENCRYPTED
+        return EXTENSION_MISMATCH
+    if not head.startswith(ZIP_MAGIC) and not head.startswith(EMPTY_ZIP_MAGIC):
+        return EXTENSION_MISMATCH
+
+    tail = _read_tail(f, size, _EOCD_WINDOW)
+    eocd_pos = tail.rfind(EMPTY_ZIP_MAGIC)
+    if eocd_pos < 0 or len(tail) - eocd_pos < _EOCD_SIZE:
+        return TRUNCATED
+
+    cd_size, cd_offset = struct.unpack('<II', tail[eocd_pos + 12:eocd_pos + 20])
+    if cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+        return None # Zip64: leave the detailed checks to the parser
+    eocd_offset = size - len(tail) + eocd_pos
+    if cd_offset + cd_size > eocd_offset:
+        return TRUNCATED
+
+    # File names of all members live in the central directory
+    f.seek(cd_offset)
+    central_directory = f.read(cd_size)
+    if b'[Content_Types].xml' not in central_directory or _OOXML_MAIN_PART[ext] not in central_directory:
+        return PACKAGE_MISMATCH
+    return None
+
+def _ole_stream_names(f, size: int) -> set:
+    """
+    Names of the streams in an OLE compound file's directory, following the
+    directory sector chain through the FAT. A damaged header or chain ends the
+    walk early (the names read so far are returned).
+    """
+    f.seek(0)
+    header = f.read(_OLE_HEADER_SIZE)
+    if len(header) < _OLE_HEADER_SIZE:
+        return set()
+    sector_size = 1 << struct.unpack_from('<H', header, 0x1E)[0]
+    if sector_size not in (512, 4096):
+        return set()
+    first_dir, = struct.unpack_from('<I', header, 0x30)
+    difat_sector, difat_count = struct.unpack_from('<II', header, 0x44)
+    max_sectors = size // sector_size
+
+    def read_sector(sector: int) -> bytes:
+        f.seek((sector + 1) * sector_size)
+        return f.read(sector_size)
+
+    # Locations of the FAT sectors: 109 in the header, the rest in a DIFAT chain
+    fat_sectors = list(struct.unpack_from(f'<{_OLE_HEADER_DIFAT}I', header, 0x4C))
+    per_difat = sector_size // 4 - 1
+    for _ in range(min(difat_count, max_sectors)):
+        if difat_sector >= _OLE_MAX_SECTOR:
+            break
+        data = read_sector(difat_sector)
+        if len(data) < sector_size:
+            break
+        entries = struct.unpack(f'<{per_difat + 1}I', data)
+        fat_sectors.extend(entries[:per_difat])
+        difat_sector = entries[per_difat]
+
+    def next_sector(sector: int) -> int:
+        per_fat = sector_size // 4
+        index = sector // per_fat
+        if index >= len(fat_sectors) or fat_sectors[index] >= _OLE_MAX_SECTOR:
+            return _OLE_MAX_SECTOR
+        f.seek((fat_sectors[index] + 1) * sector_size + (sector % per_fat) * 4)
+        data = f.read(4)
+        return struct.unpack('<I', data)[0] if len(data) == 4 else _OLE_MAX_SECTOR
+
+    names = set()
+    sector, seen = first_dir, set()
+    while sector < _OLE_MAX_SECTOR and sector not in seen and len(seen) < max_sectors:
+        seen.add(sector)
+        data = read_sector(sector)
+        for pos in range(0, len(data) - _OLE_DIR_ENTRY + 1, _OLE_DIR_ENTRY):
+            name_length, entry_type = struct.unpack_from('<HB', data, pos + 64)
+            if entry_type == _OLE_STREAM and 2 <= name_length <= 64:
+                names.add(data[pos:pos + name_length - 2].decode('utf-16-le', 'replace'))
+        sector = next_sector(sector)
+    return names
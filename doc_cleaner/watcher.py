@@ -0,0 +1,345 @@
+"""
+Watch mode: keeps a warm DocCleaner process organizing files as they are dropped
+into a folder, instead of rescanning the whole tree from cron.
+
+Files go through the same steps as a run (validation, tier 0, early exit, isolated
+extraction, events and the metadata log for 'reclassify', with the same options);
+metrics.json is written when the watch stops. Near-duplicates, size prefiltering
+and memory budgets need the whole set of files and are not available here.
+
+Usage: python -m doc_cleaner watch FOLDER [--recursive] [--dry-run] [--isolate] [--events TARGET] ...
+"""
+import os
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import argparse
+import datetime
+import functools
+import logging
+from typing import Any, Dict, List, Optional
+from .config import ALLOWED_EXTENSIONS, TIERED_CLASSIFICATION, VALIDATION, EARLY_EXIT, EXTRACTION_LIMITS, METRICS, RECLASSIFICATION
+from . import scanner, duplicates, organizer, exporter, pipeline, extraction, events, reclassify, io_accounting
+from .metrics import Metrics
+
+# inotify constants (see <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+class InotifySource:
+    """
+    Reports changed paths using Linux inotify through libc (no extra dependency).
+    New subdirectories are watched as they appear.
+    """
+    def __init__(self, root_path: str, recursive: bool = True):
+        self.root_path = root_path
+        self.recursive = recursive
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._wd_paths = {}
+        self._add_tree(root_path)
+
+    def _add_watch(self, path: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self._wd_paths[wd] = path
+        else:
+            logging.warning(f"Could not watch {path}: {os.strerror(ctypes.get_errno())}")
+
+    def _add_tree(self, path: str):
+        if not self.recursive:
+            self._add_watch(path)
+            return
+        for dirpath, dirs, _ in os.walk(path):
+            dirs[:] = [d for d in dirs if not scanner.is_excluded_dir(d)]
+            self._add_watch(dirpath)
+
+    def poll(self, timeout: float) -> List[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped by the kernel: fall back to a full listing
+                paths.extend(scanner.scan_folder(self.root_path, recursive=self.recursive, include_archives=False))
+                continue
+
+            parent = self._wd_paths.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+
+            if mask & IN_ISDIR:
+                if self.recursive and not scanner.is_excluded_dir(os.path.basename(path)):
+                    self._add_tree(path)
+                    # Files may have landed before the watch was added
+                    paths.extend(scanner.scan_folder(path, include_archives=False))
+            else:
+                paths.append(path)
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingSource:
+    """
+    Fallback for platforms without inotify: rescans the tree every interval
+    and reports files that are new or whose size/mtime changed.
+    """
+    def __init__(self, root_path: str, recursive: bool = True, interval: float = 2.0):
+        self.root_path = root_path
+        self.recursive = recursive
+        self.interval = interval
+        self._known = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for path in scanner.scan_folder(self.root_path, recursive=self.recursive, include_archives=False):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout: float) -> List[str]:
+        time.sleep(max(timeout, self.interval))
+        current = self._snapshot()
+        changed = [p for p, sig in current.items() if self._known.get(p) != sig]
+        self._known = current
+        return changed
+
+    def close(self):
+        pass
+
+class Debouncer:
+    """
+    Holds paths until their size and mtime have not changed for settle_seconds.
+    """
+    def __init__(self, settle_seconds: float = 2.0):
+        self.settle_seconds = settle_seconds
+        self._pending = {}  # path -> (signature, last change time)
+
+    def touch(self, path: str):
+        self._pending[path] = (None, time.monotonic())
+
+    def __len__(self):
+        return len(self._pending)
+
+    def settled(self) -> List[str]:
+        now = time.monotonic()
+        ready = []
+        for path, (signature, changed_at) in list(self._pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Deleted or moved away before settling
+                del self._pending[path]
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif now - changed_at >= self.settle_seconds:
+                del self._pending[path]
+                ready.append(path)
+        return sorted(ready)
+
+class Watcher:
+    """
+    Warm pipeline state for watch mode: one run folder, the per-extension hash
+    index of every file seen so far, and an incrementally appended manifest.
+    options: 'tiered', 'validate', 'quarantine', 'early_exit', 'isolate' and 'events',
+             as for pipeline.run (defaults to config).
+    """
+    def __init__(self, root_path: str, recursive: bool = True, dry_run: bool = False,
+                 settle_seconds: float = 2.0, poll_interval: float = 2.0, use_inotify: bool = True,
+                 options: Optional[Dict[str, Any]] = None):
+        options = options or {}
+        self.root_path = os.path.abspath(root_path)
+        self.recursive = recursive
+        self.dry_run = dry_run
+        self.poll_interval = poll_interval
+        self.debouncer = Debouncer(settle_seconds)
+        self.seen_hashes = {}  # ext -> {hash: first path}
+        self.duplicates = 0
+        self.organized = 0
+        self.tiered = options.get('tiered', TIERED_CLASSIFICATION['enabled'])
+        self.validate = options.get('validate', VALIDATION['enabled'])
+        self.quarantine = options.get('quarantine', VALIDATION['quarantine'])
+        self.metrics = Metrics(slowest=METRICS['slowest_files'])
+        self.read_totals = {}
+
+        run_timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.output_root = organizer.create_output_structure(self.root_path, run_timestamp, dry_run=dry_run)
+
+        self.read_options = {"early_exit": options.get('early_exit', EARLY_EXIT['enabled'])}
+        self.metadata_log = None
+        if not dry_run and RECLASSIFICATION['store_metadata']:
+            self.metadata_log = reclassify.MetadataLog(self.output_root)
+            self.read_options['keep_sample'] = True
+        self.worker = None
+        if options.get('isolate', EXTRACTION_LIMITS['isolate']):
+            self.worker = extraction.IsolatedWorker(read_options=self.read_options)
+            self.read = self.worker.read
+        else:
+            self.read = functools.partial(extraction.read_inline, **self.read_options)
+        self.bus = events.EventBus(options['events']) if options.get('events') else None
+        self.source = self._open_source(use_inotify)
+
+    def _open_source(self, use_inotify: bool):
+        if use_inotify:
+            try:
+                return InotifySource(self.root_path, recursive=self.recursive)
+            except (OSError, AttributeError) as e:
+                # AttributeError: libc without inotify symbols (non-Linux)
+                logging.warning(f"inotify unavailable ({e}), falling back to polling")
+        return PollingSource(self.root_path, recursive=self.recursive, interval=self.poll_interval)
+
+    def handle_file(self, path: str) -> Optional[Dict]:
+        """Runs a settled file through dedup -> read -> classify -> rename -> move."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            return None
+
+        item = duplicates.check_duplicate(path, self.seen_hashes.setdefault(ext, {}), dry_run=self.dry_run,
+                                          metrics=self.metrics)
+        state = pipeline.start_item(item, self.output_root, dry_run=self.dry_run, tiered=self.tiered,
+                                    validate=self.validate, quarantine=self.quarantine,
+                                    metrics=self.metrics, bus=self.bus)
+        body = None
+        if state['needs_body'] and not state['done']:
+            body = self._extract(path)
+        res_entry = pipeline.finish_item(state, self.output_root, dry_run=self.dry_run, body=body,
+                                         read_totals=self.read_totals, metrics=self.metrics, bus=self.bus)
+        if self.metadata_log and res_entry['topic'] and state['metadata'] is not None:
+            self.metadata_log.add(path, state['metadata'], properties=state['properties'],
+                                  sample=body[2].get('sample') if body else None,
+                                  early_exit=self.read_options['early_exit'],
+                                  truncated=bool(body and body[2].get('stopped_early')))
+
+        if res_entry['is_duplicate']:
+            self.duplicates += 1
+        elif 'error' not in res_entry:
+            self.organized += 1
+
+        if not self.dry_run:
+            exporter.append_manifest([res_entry], self.output_root)
+        return res_entry
+
+    def _extract(self, path: str):
+        """(metadata, extraction_error, stats) of path, as ExtractionPool reports them."""
+        stats = {}
+        start = time.perf_counter()
+        try:
+            with io_accounting.track() as io:
+                metadata, error = self.read(path, stats)
+            # Isolated workers count their own I/O; the parent only sees the pipe
+            stats.setdefault('io', io)
+        except Exception as e:
+            metadata, error = None, extraction.EXTRACTION_CRASHED
+            stats['exception'] = str(e)
+        stats['extraction_seconds'] = time.perf_counter() - start
+        return metadata, error, stats
+
+    def close(self):
+        """Stops watching; writes metrics.json and closes the worker, metadata log and event bus."""
+        self.source.close()
+        if self.worker:
+            self.worker.close()
+        if self.metadata_log:
+            self.metadata_log.close()
+        if not self.dry_run:
+            exporter.write_metrics(self.metrics.to_dict(), self.output_root)
+        events.emit(self.bus, "run_finished", total_files=self.duplicates + self.organized,
+                    duplicates=self.duplicates, organized=self.organized)
+        if self.bus is not None:
+            self.bus.close()
+
+    def run_once(self, timeout: float = 0.5):
+        for path in self.source.poll(timeout):
+            self.debouncer.touch(path)
+        for path in self.debouncer.settled():
+            self.handle_file(path)
+
+    def run(self):
+        events.emit(self.bus, "run_started", root=self.root_path, output_root=self.output_root)
+        # Files already present when the watch starts are organized too
+        for path in scanner.scan_folder(self.root_path, recursive=self.recursive, include_archives=False):
+            self.debouncer.touch(path)
+        try:
+            while True:
+                self.run_once()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="doc_cleaner watch", description="DocCleaner watch mode: organize files as they arrive")
+    parser.add_argument("folder", help="Folder to watch")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Watch subdirectories recursively")
+    parser.add_argument("--dry-run", action="store_true", help="Simulate execution without moving files")
+    parser.add_argument("--settle", type=float, default=2.0, help="Seconds a file must stay unchanged before it is processed")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Rescan interval when inotify is unavailable")
+    parser.add_argument("--polling", action="store_true", help="Force the polling fallback instead of inotify")
+    parser.add_argument("--quiet", "-q", action="store_true", help="No console line per file (the log file still has them)")
+    parser.add_argument("--isolate", action="store_true", help="Parse documents in a worker process with per-file time/memory budgets (see extraction_limits in config)")
+    parser.add_argument("--early-exit", action="store_true", help="Stop reading a document once its topic can no longer change (see early_exit in config)")
+    parser.add_argument("--tiered", action="store_true", help="Classify from file name and document properties first and parse the body only when undecided")
+    parser.add_argument("--validate", action="store_true", help="Check magic bytes before parsing (see validation in config)")
+    parser.add_argument("--quarantine", action="store_true", help="Validate as --validate and move invalid files to the run's quarantine folder")
+    parser.add_argument("--events", help="Write JSONL events to this file, tcp://host:port or unix:///path")
+    args = parser.parse_args(argv)
+
+    options = {}
+    for flag in ("isolate", "early_exit", "tiered", "validate", "quarantine"):
+        if getattr(args, flag):
+            options[flag] = True
+    if args.quarantine:
+        options["validate"] = True
+    if args.events:
+        options["events"] = args.events
+
+    root_path = os.path.abspath(args.folder)
+    if not os.path.exists(root_path):
+        print(f"Error: Folder does not exist: {root_path}")
+        return
+
+    watcher = Watcher(root_path, recursive=args.recursive, dry_run=args.dry_run,
+                      settle_seconds=args.settle, poll_interval=args.poll_interval,
+                      use_inotify=not args.polling, options=options)
+    pipeline.setup_logging(watcher.output_root, dry_run=args.dry_run, verbose=not args.quiet)
+    logging.info(f"Watching {root_path} (output: {watcher.output_root}). Press Ctrl+C to stop.")
+    watcher.run()
+
+    print("\n" + "="*40)
+    print("DocCleaner Watch Stopped")
+    print("="*40)
+    print(f"Duplicates moved: {watcher.duplicates}")
+    print(f"Files organized: {watcher.organized}")
+    print(f"Output location: {watcher.output_root}")
+    print("="*40)
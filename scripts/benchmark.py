@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import time
+import shutil
+import contextlib
+import platform
+import argparse
+import datetime
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from doc_cleaner import scanner, duplicates, content_reader, classifier, renamer, organizer, exporter, memory
+from doc_cleaner.records import FileRecord
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_RESULTS = os.path.join(REPO_ROOT, "benchmark_results.jsonl")
+
+class StageTimer:
+    """Wall time, file/byte throughput and peak RSS of each benchmark stage."""
+
+    def __init__(self):
+        self.peaks = memory.StagePeaks(interval=0.05)
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, nbytes=0):
+        """Times the block; set counts['files'] inside it when it is not known upfront."""
+        counts = {"files": 0}
+        self.peaks.begin(name)
+        start = time.perf_counter()
+        yield counts
+        seconds = time.perf_counter() - start
+        self.peaks.end()
+        files = counts["files"]
+        self.stages[name] = {
+            "seconds": round(seconds, 6),
+            "files": files,
+            "files_per_second": round(files / seconds, 1) if seconds else None,
+            "mb_per_second": round(nbytes / (1024 * 1024) / seconds, 2) if seconds and nbytes else None,
+            "peak_rss_mb": self.peaks.report().get(name),
+        }
+
+    def run(self, name, func, items, nbytes=0):
+        with self.stage(name, nbytes) as counts:
+            counts["files"] = len(items)
+            return [func(item) for item in items]
+
+def git_revision():
+    """(short commit, dirty) of the working tree, or ('unknown', False) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(status)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+def corpus_params(corpus):
+    path = os.path.join(corpus, "corpus.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        info = json.load(f)
+    info.pop("expected_topics", None)
+    return info
+
+def benchmark(corpus, work_dir):
+    """Copies the corpus to work_dir and times every stage on the copy (moves change the tree)."""
+    tree = os.path.join(work_dir, "corpus")
+    shutil.copytree(corpus, tree)
+    output = os.path.join(work_dir, "output")
+    os.makedirs(output)
+    timer = StageTimer()
+
+    with timer.stage("scan") as counts:
+        files = scanner.scan_folder(tree, recursive=True)
+        counts["files"] = len(files)
+    sizes = {path: os.path.getsize(path) for path in files}
+    total_bytes = sum(sizes.values())
+
+    hashes = timer.run("hash", duplicates.get_file_hash, files, total_bytes)
+    # Throughput of every available algorithm on the same files (the run above uses the configured one)
+    for algorithm in duplicates.available_algorithms():
+        timer.run(f"hash.{algorithm}", lambda path: duplicates.get_file_hash(path, algorithm), files, total_bytes)
+
+    metadata = {}
+    by_ext = {}
+    for path in files:
+        by_ext.setdefault(os.path.splitext(path)[1].lower(), []).append(path)
+    for ext, paths in sorted(by_ext.items()):
+        results = timer.run(f"read{ext}", content_reader.read_content, paths, sum(sizes[p] for p in paths))
+        metadata.update(zip(paths, results))
+
+    topics = timer.run("classify", lambda path: classifier.classify_document(metadata[path]), files)
+    dates = {path: datetime.datetime.fromtimestamp(os.path.getmtime(path)) for path in files}
+    names = timer.run("rename", lambda job: renamer.generate_new_name(job[0], job[1], dates[job[0]]),
+                      list(zip(files, topics)))
+
+    def move(job):
+        path, topic, name = job
+        return organizer.move_file(path, organizer.determine_destination(output, topic, dates[path], name), name)
+    final_paths = timer.run("move", move, list(zip(files, topics, names)), total_bytes)
+
+    records = []
+    for path, file_hash, topic, final_path in zip(files, hashes, topics, final_paths):
+        record = FileRecord(path, hash=file_hash)
+        record['topic'] = topic
+        record['current_path'] = final_path
+        records.append(record)
+    with timer.stage("export") as counts:
+        exporter.generate_reports(records, output)
+        counts["files"] = len(records)
+
+    return {
+        "files": len(files),
+        "bytes": total_bytes,
+        "stages": timer.stages,
+    }
+
+def run_command(args):
+    corpus = os.path.abspath(args.corpus)
+    work_dir = tempfile.mkdtemp(prefix="doccleaner_bench_", dir=args.work_dir)
+    try:
+        result = benchmark(corpus, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    commit, dirty = git_revision()
+    entry = {
+        "commit": commit,
+        "dirty": dirty,
+        "label": args.label,
+        "timestamp": datetime.datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "corpus": corpus_params(corpus),
+        **result,
+    }
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    print(f"Benchmark of {result['files']} files ({result['bytes'] / (1024 * 1024):.1f} MB) at {commit}{' (dirty)' if dirty else ''}")
+    print(f"{'stage':<14}{'seconds':>10}{'files/s':>12}{'MB/s':>10}{'peak MB':>10}")
+    for stage, s in result["stages"].items():
+        print(f"{stage:<14}{s['seconds']:>10.3f}{s['files_per_second'] or 0:>12.1f}"
+              f"{s['mb_per_second'] or 0:>10.2f}{s['peak_rss_mb'] or 0:>10.1f}")
+    print(f"Results appended to {args.results}")
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def pick(results, ref):
+    """Latest result whose commit starts with ref or whose label is ref."""
+    matches = [r for r in results if r["commit"].startswith(ref) or r.get("label") == ref]
+    return matches[-1] if matches else None
+
+def compare_command(args):
+    results = load_results(args.results)
+    if not results:
+        print(f"Error: No benchmark results in {args.results}")
+        return 1
+
+    head = pick(results, args.head) if args.head else results[-1]
+    if args.base:
+        base = pick(results, args.base)
+    else:
+        # Most recent run of another commit on the same corpus
+        earlier = [r for r in results if r is not head and r["commit"] != head["commit"]
+                   and r.get("corpus") == head.get("corpus")]
+        base = earlier[-1] if earlier else None
+    if head is None or base is None:
+        print("Error: Need two benchmark results to compare (see --base/--head)")
+        return 1
+    if base.get("corpus") != head.get("corpus"):
+        print("Warning: results come from different corpora")
+
+    print(f"Base: {base['commit']} ({base['timestamp']})  Head: {head['commit']} ({head['timestamp']})")
+    print(f"{'stage':<14}{'base s':>10}{'head s':>10}{'change':>10}")
+    regressions = []
+    for stage, head_stage in head["stages"].items():
+        base_stage = base["stages"].get(stage)
+        if not base_stage or not base_stage["seconds"]:
+            print(f"{stage:<14}{'-':>10}{head_stage['seconds']:>10.3f}{'new':>10}")
+            continue
+        change = 100 * (head_stage["seconds"] - base_stage["seconds"]) / base_stage["seconds"]
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(stage)
+        print(f"{stage:<14}{base_stage['seconds']:>10.3f}{head_stage['seconds']:>10.3f}{change:>+9.1f}%{flag}")
+
+    if regressions:
+        print(f"Slower than {args.threshold:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage-level DocCleaner benchmarks (see generate_corpus.py)")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSONL file with one result per run")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Time each stage on a corpus and store the result")
+    run_parser.add_argument("corpus", help="Corpus folder (left untouched, a copy is processed)")
+    run_parser.add_argument("--label", help="Optional name for this result")
+    run_parser.add_argument("--work-dir", help="Where to put the temporary copy (defaults to the system temp dir)")
+
+    compare_parser = sub.add_parser("compare", help="Compare two stored results")
+    compare_parser.add_argument("--base", help="Commit (prefix) or label of the baseline; defaults to the previous commit benchmarked")
+    compare_parser.add_argument("--head", help="Commit (prefix) or label to check; defaults to the latest result")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Slowdown in percent reported as a regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run_command(args)
+    else:
+        sys.exit(compare_command(args))
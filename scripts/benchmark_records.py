@@ -0,0 +1,71 @@
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from doc_cleaner.records import FileRecord
+
+def synthetic_paths(count, files_per_dir=500):
+    root = "/srv/shared/departamento/documentos"
+    for i in range(count):
+        yield f"{root}/area_{i // (files_per_dir * 20)}/carpeta_{i // files_per_dir}/documento_{i:08d}.pdf"
+
+def build_dicts(paths):
+    """
+    Per-file state as it used to travel: the duplicates result and res_entry,
+    both alive until the end of the run (dup_results and final_results).
+    """
+    items = []
+    entries = []
+    for i, path in enumerate(paths):
+        file_hash = f"{i:064x}"
+        item = {
+            "original_path": path,
+            "hash": file_hash,
+            "is_duplicate": False,
+            "final_path": path
+        }
+        items.append(item)
+        entries.append({
+            "original_path": item["original_path"],
+            "created_at": "2025-01-01T10:00:00",
+            "modified_at": "2025-01-02T10:00:00",
+            "is_duplicate": item["is_duplicate"],
+            "topic": "PROCEDIMIENTO",
+            "current_path": path.replace("/srv/shared", "/srv/out"),
+            "hash": file_hash
+        })
+    return items, entries
+
+def build_records(paths):
+    records = []
+    for i, path in enumerate(paths):
+        record = FileRecord(path, hash=f"{i:064x}")
+        record['created_at'] = "2025-01-01T10:00:00"
+        record['modified_at'] = "2025-01-02T10:00:00"
+        record['topic'] = "PROCEDIMIENTO"
+        record['current_path'] = path.replace("/srv/shared", "/srv/out")
+        records.append(record)
+    return records
+
+def measure(builder, count):
+    # The scanner's path list is shared by both layouts, so it is built before tracing
+    paths = list(synthetic_paths(count))
+    tracemalloc.start()
+    entries = builder(paths)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entries
+    return current / count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bytes per file of the per-file pipeline state")
+    parser.add_argument("--files", type=int, default=200000, help="Number of synthetic files")
+    args = parser.parse_args()
+
+    before = measure(build_dicts, args.files)
+    after = measure(build_records, args.files)
+    print(f"Files: {args.files}")
+    print(f"dicts:       {before:8.0f} bytes/file")
+    print(f"FileRecord:  {after:8.0f} bytes/file ({100 * (1 - after / before):.0f}% less)")
@@ -0,0 +1,300 @@
+import os
+import sys
+import json
+import math
+import random
+import zipfile
+import argparse
+import datetime
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from doc_cleaner.config import TOPIC_KEYWORDS
+
+# Neutral office vocabulary (none of it is a topic keyword)
+FILLER_WORDS = (
+    "area departamento informe revision documento version equipo responsable fecha "
+    "proyecto cliente entrega control calidad registro archivo sistema usuario datos "
+    "resultado objetivo alcance anexo tabla indicador seguimiento estado pendiente "
+    "aprobado firma observaciones general interno externo mensual anual recursos costo"
+).split()
+
+FORMATS = ('.pdf', '.docx', '.xlsx', '.pptx')
+
+CORE_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+    'xmlns:dc="http://purl.org/dc/elements/1.1/">{}</cp:coreProperties>'
+)
+
+def content_types(overrides):
+    parts = "".join(f'<Override PartName="{name}" ContentType="{ctype}"/>' for name, ctype in overrides)
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Default Extension="bin" ContentType="application/octet-stream"/>'
+        f'{parts}</Types>'
+    )
+
+def relationships(targets):
+    rels = "".join(f'<Relationship Id="rId{i}" Type="{rtype}" Target="{target}"/>'
+                   for i, (rtype, target) in enumerate(targets, 1))
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>')
+
+REL_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+REL_CORE = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"
+CT_CORE = "application/vnd.openxmlformats-package.core-properties+xml"
+
+def make_paragraphs(rng, topic, count, keyword_density):
+    """count paragraphs of filler text; each one holds a topic keyword with probability keyword_density."""
+    keywords = TOPIC_KEYWORDS.get(topic, [])
+    paragraphs = []
+    for _ in range(count):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(15, 50))]
+        if keywords and rng.random() < keyword_density:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        paragraphs.append(" ".join(words).capitalize() + ".")
+    return paragraphs
+
+def core_properties(title, subject):
+    fields = ""
+    if title:
+        fields += f"<dc:title>{escape(title)}</dc:title>"
+    if subject:
+        fields += f"<dc:subject>{escape(subject)}</dc:subject>"
+    return CORE_XML.format(fields)
+
+def write_package(path, parts, padding):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts:
+            zf.writestr(name, data)
+        if padding:
+            # Unreferenced stored part: readers ignore it, it only sets the file size
+            zf.writestr(zipfile.ZipInfo("docProps/padding.bin"), padding, compress_type=zipfile.ZIP_STORED)
+
+def write_docx(path, title, paragraphs, properties, padding):
+    body = f'<w:p><w:pPr><w:pStyle w:val="Title"/></w:pPr><w:r><w:t>{escape(title)}</w:t></w:r></w:p>'
+    body += "".join(f'<w:p><w:r><w:t xml:space="preserve">{escape(p)}</w:t></w:r></w:p>' for p in paragraphs)
+    w_ns = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+    styles = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:styles {w_ns}>'
+              '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+              '<w:style w:type="paragraph" w:styleId="Title"><w:name w:val="Title"/><w:basedOn w:val="Normal"/></w:style>'
+              '</w:styles>')
+    write_package(path, [
+        ("[Content_Types].xml", content_types([
+            ("/word/document.xml", "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"),
+            ("/word/styles.xml", "application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"),
+            ("/docProps/core.xml", CT_CORE)])),
+        ("_rels/.rels", relationships([(REL_DOCUMENT, "word/document.xml"), (REL_CORE, "docProps/core.xml")])),
+        ("word/_rels/document.xml.rels", relationships([
+            ("http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles", "styles.xml")])),
+        ("word/document.xml", f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                              f'<w:document {w_ns}><w:body>{body}<w:sectPr/></w:body></w:document>'),
+        ("word/styles.xml", styles),
+        ("docProps/core.xml", core_properties(*properties)),
+    ], padding)
+
+def write_xlsx(path, title, paragraphs, properties, padding):
+    rows = [title] + paragraphs
+    cells = "".join(f'<row r="{i}"><c r="A{i}" t="inlineStr"><is><t>{escape(text)}</t></is></c></row>'
+                    for i, text in enumerate(rows, 1))
+    ns = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+    r_ns = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    write_package(path, [
+        ("[Content_Types].xml", content_types([
+            ("/xl/workbook.xml", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"),
+            ("/xl/worksheets/sheet1.xml", "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"),
+            ("/docProps/core.xml", CT_CORE)])),
+        ("_rels/.rels", relationships([(REL_DOCUMENT, "xl/workbook.xml"), (REL_CORE, "docProps/core.xml")])),
+        ("xl/_rels/workbook.xml.rels", relationships([
+            ("http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet", "worksheets/sheet1.xml")])),
+        ("xl/workbook.xml", f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><workbook {ns} {r_ns}>'
+                            '<sheets><sheet name="Hoja1" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+        ("xl/worksheets/sheet1.xml", f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                                     f'<worksheet {ns}><sheetData>{cells}</sheetData></worksheet>'),
+        ("docProps/core.xml", core_properties(*properties)),
+    ], padding)
+
+def write_pptx(path, title, paragraphs, properties, padding):
+    # The slide master/layout/theme parts are too involved to write by hand
+    import pptx
+    prs = pptx.Presentation()
+    prs.core_properties.title = properties[0] or ""
+    prs.core_properties.subject = properties[1] or ""
+    slide = prs.slides.add_slide(prs.slide_layouts[0])
+    slide.shapes.title.text = title
+    for start in range(0, len(paragraphs), 4):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = paragraphs[start][:40]
+        slide.placeholders[1].text = "\n".join(paragraphs[start:start + 4])
+    prs.save(path)
+    if padding:
+        with zipfile.ZipFile(path, 'a') as zf:
+            zf.writestr(zipfile.ZipInfo("docProps/padding.bin"), padding, compress_type=zipfile.ZIP_STORED)
+
+def _pdf_string(text):
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+def write_pdf(path, title, paragraphs, properties, padding):
+    """Minimal PDF 1.4 with Helvetica text pages, an info dictionary and a valid xref table."""
+    lines = [title, ""]
+    for paragraph in paragraphs:
+        words, line = paragraph.split(), ""
+        for word in words:
+            if len(line) + len(word) > 90:
+                lines.append(line)
+                line = ""
+            line = f"{line} {word}".strip()
+        lines.extend([line, ""])
+    pages = [lines[i:i + 60] for i in range(0, len(lines), 60)] or [[]]
+
+    objects = []  # bodies; object number = index + 1
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_obj = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for page_lines in pages:
+        text = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"{_pdf_string(l)} '" for l in page_lines) + " ET"
+        stream = text.encode('latin-1', 'replace')
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(f"<< /Type /Page /Parent {pages_obj} 0 R /MediaBox [0 0 595 842] "
+                        f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>".encode()))
+    objects[catalog - 1] = f"<< /Type /Catalog /Pages {pages_obj} 0 R >>".encode()
+    objects[pages_obj - 1] = (f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] "
+                              f"/Count {len(kids)} >>").encode()
+    info_fields = ""
+    if properties[0]:
+        info_fields += f"/Title {_pdf_string(properties[0])} "
+    if properties[1]:
+        info_fields += f"/Subject {_pdf_string(properties[1])} "
+    info = add(f"<< {info_fields}/Producer (DocCleaner corpus generator) >>".encode('latin-1', 'replace'))
+    if padding:
+        add(b"<< /Length %d >>\nstream\n" % len(padding) + padding + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += (f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R /Info {info} 0 R >>\n"
+            f"startxref\n{xref}\n%%EOF\n").encode()
+    with open(path, 'wb') as f:
+        f.write(out)
+
+WRITERS = {'.pdf': write_pdf, '.docx': write_docx, '.xlsx': write_xlsx, '.pptx': write_pptx}
+
+def make_directories(root, fanout, depth):
+    """Directory tree with fanout subfolders per level, depth levels deep. Returns all folders."""
+    dirs = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f"nivel{d + 1}_{i:02d}") for parent in level for i in range(fanout)]
+        dirs.extend(level)
+    for path in dirs:
+        os.makedirs(path, exist_ok=True)
+    return dirs
+
+def generate(output, files, seed=42, formats=FORMATS, median_kb=60.0, size_sigma=1.0,
+             duplicate_ratio=0.1, keyword_density=0.3, generic_ratio=0.2, properties_ratio=0.5,
+             fanout=4, depth=2):
+    """
+    Writes a reproducible corpus of files under output and returns its description
+    (parameters plus the expected topic of every generated path, relative to output).
+    """
+    rng = random.Random(seed)
+    if '.pptx' in formats:
+        try:
+            import pptx  # noqa: F401
+        except ImportError:
+            print("python-pptx not installed: generating without .pptx files")
+            formats = tuple(f for f in formats if f != '.pptx')
+
+    dirs = make_directories(output, fanout, depth)
+    topics = [t for t in TOPIC_KEYWORDS if t != 'GENERIC']
+    now = datetime.datetime.now().timestamp()
+    generated = []  # (path, topic)
+    expected = {}
+    duplicates = 0
+
+    for i in range(files):
+        folder = rng.choice(dirs)
+        if generated and rng.random() < duplicate_ratio:
+            # Byte-identical copy of an earlier file, under a new name and folder
+            source, topic = rng.choice(generated)
+            ext = os.path.splitext(source)[1]
+            path = os.path.join(folder, f"copia_{i:07d}{ext}")
+            with open(source, 'rb') as src, open(path, 'wb') as dst:
+                dst.write(src.read())
+            duplicates += 1
+        else:
+            ext = rng.choice(formats)
+            topic = 'GENERIC' if rng.random() < generic_ratio else rng.choice(topics)
+            keyword = rng.choice(TOPIC_KEYWORDS[topic]) if topic != 'GENERIC' else rng.choice(FILLER_WORDS)
+            title = f"{keyword.capitalize()} {rng.choice(FILLER_WORDS)} {i}"
+            properties = (title, keyword) if rng.random() < properties_ratio else ("", "")
+
+            target = int(math.exp(rng.gauss(math.log(median_kb * 1024), size_sigma)))
+            # About 250 bytes per paragraph before compression; text is capped, the rest is padding
+            paragraphs = make_paragraphs(rng, topic, max(3, min(target // 250, 400)), keyword_density)
+            path = os.path.join(folder, f"doc_{i:07d}_{rng.choice(FILLER_WORDS)}{ext}")
+            WRITERS[ext](path, title, paragraphs, properties, None)
+            missing = target - os.path.getsize(path)
+            if missing > 0:
+                WRITERS[ext](path, title, paragraphs, properties, rng.randbytes(missing))
+
+        mtime = now - rng.uniform(0, 3 * 365 * 86400)
+        os.utime(path, (mtime, mtime))
+        generated.append((path, topic))
+        expected[os.path.relpath(path, output)] = topic
+
+    description = {
+        "seed": seed, "files": files, "formats": list(formats), "median_kb": median_kb,
+        "size_sigma": size_sigma, "duplicate_ratio": duplicate_ratio, "keyword_density": keyword_density,
+        "generic_ratio": generic_ratio, "properties_ratio": properties_ratio, "fanout": fanout,
+        "depth": depth, "duplicates": duplicates, "expected_topics": expected,
+    }
+    with open(os.path.join(output, "corpus.json"), 'w', encoding='utf-8') as f:
+        json.dump(description, f, indent=2, ensure_ascii=False)
+    return description
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic corpus for DocCleaner benchmarks")
+    parser.add_argument("output", help="Folder to create the corpus in")
+    parser.add_argument("--files", type=int, default=1000, help="Number of files")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed -> same corpus)")
+    parser.add_argument("--formats", default=",".join(FORMATS), help="Comma separated extensions")
+    parser.add_argument("--median-kb", type=float, default=60.0, help="Median file size (log-normal distribution)")
+    parser.add_argument("--size-sigma", type=float, default=1.0, help="Spread of the log-normal size distribution")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Fraction of files that are exact copies")
+    parser.add_argument("--keyword-density", type=float, default=0.3, help="Probability that a paragraph holds a topic keyword")
+    parser.add_argument("--generic-ratio", type=float, default=0.2, help="Fraction of files without a topic")
+    parser.add_argument("--properties-ratio", type=float, default=0.5, help="Fraction of files with title/subject properties")
+    parser.add_argument("--fanout", type=int, default=4, help="Subfolders per folder")
+    parser.add_argument("--depth", type=int, default=2, help="Folder levels below the root")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output) and os.listdir(args.output):
+        print(f"Error: Output folder is not empty: {args.output}")
+        sys.exit(1)
+
+    formats = tuple(f.strip() if f.strip().startswith('.') else '.' + f.strip() for f in args.formats.split(','))
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown:
+        print(f"Error: Unsupported formats: {', '.join(unknown)}")
+        sys.exit(1)
+
+    info = generate(args.output, args.files, seed=args.seed, formats=formats, median_kb=args.median_kb,
+                    size_sigma=args.size_sigma, duplicate_ratio=args.duplicate_ratio,
+                    keyword_density=args.keyword_density, generic_ratio=args.generic_ratio,
+                    properties_ratio=args.properties_ratio, fanout=args.fanout, depth=args.depth)
+    print(f"Generated {info['files']} files ({info['duplicates']} duplicates) in {args.output}")
@@ -10,7 +10,11 @@ def restore_files(manifest_path, dry_run=False):
         return
 
     with open(manifest_path, 'r', encoding='utf-8') as f:
-        manifest = json.load(f)
+        if manifest_path.endswith('.jsonl'):
+            # Incremental manifest written by watch mode: one entry per line
+            manifest = [json.loads(line) for line in f if line.strip()]
+        else:
+            manifest = json.load(f)
 
     print(f"Loaded manifest with {len(manifest)} entries.")
     
@@ -26,6 +30,22 @@ def restore_files(manifest_path, dry_run=False):
             
         if original == current:
             continue
+
+        if ".zip!/" in original.lower():
+            # Extracted from a ZIP archive (archive.zip!/member), which still holds the original:
+            # undoing the run means removing the extracted copy
+            archive = original.split("!/", 1)[0]
+            if not os.path.exists(archive) or not os.path.exists(current):
+                print(f"Warning: Archive or extracted copy missing for {original}. Skipping.")
+                errors += 1
+                continue
+            if dry_run:
+                print(f"[Dry Run] Remove extracted copy: {current}")
+            else:
+                os.remove(current)
+                print(f"Removed extracted copy: {os.path.basename(current)}")
+                restored_count += 1
+            continue
             
         # Check if current file exists (it should, unless moved again)
         if not os.path.exists(current):
@@ -57,7 +77,7 @@ def restore_files(manifest_path, dry_run=False):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Restore files moved by DocCleaner using manifest.json")
-    parser.add_argument("manifest", help="Path to manifest.json file")
+    parser.add_argument("manifest", help="Path to manifest.json (or manifest.jsonl) file")
     parser.add_argument("--dry-run", action="store_true", help="Simulate restoration")
     
     args = parser.parse_args()
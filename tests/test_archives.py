@@ -0,0 +1,140 @@
+import unittest
+import io
+import os
+import json
+import shutil
+import hashlib
+import zipfile
+import tempfile
+import threading
+from unittest import mock
+from doc_cleaner import archives, scanner, duplicates, io_accounting, pipeline, organizer, config
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+class TestArchives(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+        archives.clear_cache()
+
+        deepest = zip_bytes({"muy_profundo.pdf": b"deep"})
+        inner = zip_bytes({"formato_interno.docx": b"inner docx", "deeper.zip": deepest})
+        self.archive = os.path.join(self.test_dir, "backup.zip")
+        with open(self.archive, "wb") as f:
+            f.write(zip_bytes({
+                "2024/acta_reunion.pdf": b"%PDF-1.4 acta body",
+                "copia_informe.pdf": b"same as the loose file",
+                "notes.txt": b"not an allowed extension",
+                "inner.zip": inner,
+            }))
+        # Scanned before backup.zip (files come sorted by name), so the archived copy is the duplicate
+        with open(os.path.join(self.test_dir, "a_informe.pdf"), "wb") as f:
+            f.write(b"same as the loose file")
+
+    def tearDown(self):
+        archives.clear_cache()
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_scan_lists_members_with_depth_limit(self):
+        stats = {}
+        with mock.patch.dict(archives.ARCHIVES, {"max_depth": 2}):
+            files = scanner.scan_folder(self.test_dir, recursive=False, stats=stats, include_archives=True)
+        members = sorted(f for f in files if archives.is_member(f))
+        self.assertEqual(members, sorted([
+            self.archive + "!/2024/acta_reunion.pdf",
+            self.archive + "!/copia_informe.pdf",
+            self.archive + "!/inner.zip!/formato_interno.docx",
+        ]))
+        self.assertEqual(stats["archives"], 1)
+        self.assertNotIn(self.archive, files)
+        # Without the option archives are ignored as before
+        self.assertEqual(scanner.scan_folder(self.test_dir, recursive=False, include_archives=False),
+                         [os.path.join(self.test_dir, "a_informe.pdf")])
+
+    def test_streamed_and_in_memory_hash_agree(self):
+        member = self.archive + "!/inner.zip!/formato_interno.docx"
+        expected = hashlib.sha256(b"inner docx").hexdigest()
+        self.assertEqual(duplicates.get_file_hash(member, "sha256"), expected)
+        archives.clear_cache()
+        with mock.patch.dict(archives.ARCHIVES, {"in_memory_mb": 0}):
+            with io_accounting.track() as counters:
+                self.assertEqual(duplicates.get_file_hash(member, "sha256"), expected)
+        self.assertEqual(counters["full_reads"], 1)
+        self.assertEqual(io_accounting.getsize(member), len(b"inner docx"))
+
+    def test_evicted_archives_are_closed(self):
+        member = self.archive + "!/copia_informe.pdf"
+        with mock.patch.object(archives, "_CACHE_SIZE", 1):
+            outer = archives._archive(self.archive)
+            stream = io_accounting.open_file(self.archive + "!/inner.zip!/formato_interno.docx")
+            self.assertIsNone(outer.fp)  # evicted by inner.zip
+            self.assertEqual(stream.read(), b"inner docx")
+            # Opened again on the next access
+            self.assertEqual(duplicates.get_file_hash(member, "sha256"),
+                             hashlib.sha256(b"same as the loose file").hexdigest())
+            stream.close()
+
+    def test_runs_have_their_own_cache(self):
+        other_run = archives.ArchiveCache()
+        with archives.use_cache(other_run):
+            other = archives._archive(self.archive)
+        mine = archives._archive(self.archive)
+        self.assertIsNot(mine, other)
+
+        def run_ends():
+            with archives.use_cache(other_run):
+                archives.clear_cache()
+        thread = threading.Thread(target=run_ends)
+        thread.start()
+        thread.join()
+        self.assertIsNone(other.fp)
+        self.assertIsNotNone(mine.fp)  # still open for this run
+        self.assertIs(archives._archive(self.archive), mine)
+
+    def test_unreadable_member_hashes_as_error(self):
+        member = self.archive + "!/copia_informe.pdf"
+        for error in (RuntimeError("encrypted"), NotImplementedError("compression"), KeyError("gone")):
+            with mock.patch.object(archives, "open_member", side_effect=error):
+                self.assertEqual(duplicates.get_file_hash(member, "sha256"), "")
+
+    def test_is_member(self):
+        self.assertTrue(archives.is_member("/a/b.ZIP!/c.pdf"))
+        self.assertFalse(archives.is_member("/a/hello!/c.pdf"))
+
+    def test_run_extracts_only_organized_members(self):
+        before = open(self.archive, "rb").read()
+        output_root = organizer.create_output_structure(self.test_dir, "test_archives")
+        summary = pipeline.run(self.test_dir, output_root, {"validate": False, "tiered": True, "archives": True})
+
+        by_path = {r["original_path"]: r for r in summary["results"]}
+        acta = by_path[self.archive + "!/2024/acta_reunion.pdf"]
+        self.assertEqual(acta["topic"], "ACTA")
+        self.assertTrue(acta["current_path"].startswith(output_root))
+        with open(acta["current_path"], "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 acta body")
+
+        # The archived copy of the loose file is a duplicate and is not extracted anywhere
+        copy = by_path[self.archive + "!/copia_informe.pdf"]
+        self.assertTrue(copy["is_duplicate"])
+        self.assertEqual(copy["current_path"], copy["original_path"])
+        self.assertEqual(os.listdir(self.dup_dir), [])
+
+        # The archive is untouched and the manifest keeps the virtual paths
+        self.assertEqual(open(self.archive, "rb").read(), before)
+        with open(os.path.join(output_root, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertIn(self.archive + "!/2024/acta_reunion.pdf", [e["original_path"] for e in manifest])
+
+if __name__ == '__main__':
+    unittest.main()
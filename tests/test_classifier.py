@@ -1,5 +1,5 @@
 import unittest
-from doc_cleaner import classifier
+from doc_cleaner import classifier, content_reader
 
 class TestClassifier(unittest.TestCase):
     
@@ -34,3 +34,43 @@ class TestClassifier(unittest.TestCase):
         
         meta = {"title": text, "subtitle": "", "sample_text": ""}
         self.assertEqual(classifier.classify_document(meta), "PROCEDIMIENTO")
+
+class TestStreamingClassifier(unittest.TestCase):
+
+    def test_confident_threshold(self):
+        streaming = classifier.StreamingClassifier(confident_score=3, min_lead=2)
+        streaming.feed("Acta de reunion")
+        self.assertFalse(streaming.can_stop(2000))
+        streaming.feed("Minuta del meeting")
+        self.assertTrue(streaming.can_stop(2000))
+        self.assertEqual(streaming.topic(), "ACTA")
+
+    def test_lead_cannot_be_overturned(self):
+        streaming = classifier.StreamingClassifier()  # no confident threshold
+        streaming.feed("acta acta acta")
+        self.assertFalse(streaming.can_stop(2000))
+        self.assertTrue(streaming.can_stop(0))
+
+    def test_reader_stops_early(self):
+        consumed = []
+
+        def pages():
+            yield 'expected', 3
+            for text in ["Acta de reunion, minuta del meeting", "page two", "page three"]:
+                consumed.append(text)
+                yield 'text', text
+                yield 'unit', None
+
+        stats = {}
+        metadata = content_reader._consume(pages(), stats, early_exit=True)
+        self.assertEqual(consumed, ["Acta de reunion, minuta del meeting"])
+        self.assertEqual(classifier.classify_document(metadata), "ACTA")
+        self.assertTrue(stats['stopped_early'])
+        self.assertEqual(stats['units_saved'], 2)
+
+    def test_reader_reads_everything_without_early_exit(self):
+        pages = [('text', "Acta de reunion, minuta del meeting"), ('unit', None), ('text', "page two"), ('unit', None)]
+        stats = {}
+        metadata = content_reader._consume(iter(pages), stats, early_exit=False)
+        self.assertFalse(stats['stopped_early'])
+        self.assertIn("page two", metadata['sample_text'])
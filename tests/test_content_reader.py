@@ -0,0 +1,74 @@
+import unittest
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+from doc_cleaner import content_reader, classifier, io_accounting
+
+CORE_XML = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+    xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <dc:title>Manual de compras</dc:title>
+  <dc:subject>Procedimiento interno</dc:subject>
+  <cp:keywords>instructivo</cp:keywords>
+  <cp:category>Calidad</cp:category>
+</cp:coreProperties>"""
+
+class TestReadProperties(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_core_properties(self):
+        path = os.path.join(self.test_dir, "scan_0001.docx")
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr("docProps/core.xml", CORE_XML)
+            zf.writestr("word/document.xml", "<w:document/>")
+
+        metadata = content_reader.read_properties(path)
+        self.assertEqual(metadata["title"], "Manual de compras")
+        self.assertEqual(metadata["subtitle"], "Procedimiento interno")
+        self.assertIn("instructivo", metadata["sample_text"])
+        self.assertIn("scan 0001", metadata["sample_text"])
+        self.assertEqual(classifier.classify_with_score(metadata), ("PROCEDIMIENTO", 3))
+
+    def test_broken_package_gives_file_name_only(self):
+        path = os.path.join(self.test_dir, "acta_comite.xlsx")
+        with open(path, 'w') as f:
+            f.write("not a zip")
+
+        metadata = content_reader.read_properties(path)
+        self.assertEqual(metadata, {"title": "", "subtitle": "", "sample_text": "acta comite"})
+
+class TestReaders(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_corrupt_workbook_closes_file(self):
+        path = os.path.join(self.test_dir, "hoja.xlsx")
+        with open(path, 'w') as f:
+            f.write("not a zip")
+        opened = []
+        real_open = io_accounting.open_file
+
+        def open_file(*args, **kwargs):
+            opened.append(real_open(*args, **kwargs))
+            return opened[-1]
+        fake = mock.Mock()
+        fake.load_workbook.side_effect = zipfile.BadZipFile("corrupt")
+        with mock.patch.object(content_reader, 'openpyxl', fake), \
+                mock.patch.object(io_accounting, 'open_file', open_file):
+            with self.assertRaises(zipfile.BadZipFile):
+                list(content_reader._read_xlsx(path))
+        self.assertTrue(opened[0].closed)
+
+if __name__ == '__main__':
+    unittest.main()
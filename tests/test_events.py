@@ -0,0 +1,166 @@
+import unittest
+import io
+import os
+import sys
+import json
+import shutil
+import socket
+import logging
+import tempfile
+import threading
+from unittest import mock
+from doc_cleaner import events, pipeline, organizer, config
+
+class TestEventBus(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_run_events_file(self):
+        source = os.path.join(self.test_dir, "source")
+        os.makedirs(source)
+        for name, content in [("acta_reunion.pdf", "A"), ("copia.pdf", "A"), ("formato.docx", "B")]:
+            with open(os.path.join(source, name), "w") as f:
+                f.write(content)
+        events_path = os.path.join(self.test_dir, "events.jsonl")
+        output_root = organizer.create_output_structure(source, "test_events")
+        summary = pipeline.run(source, output_root, {"validate": False, "events": events_path})
+
+        with open(events_path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        kinds = [line["event"] for line in lines]
+        self.assertEqual(kinds[0], "run_started")
+        self.assertEqual(kinds[-1], "run_finished")
+        self.assertEqual(kinds.count("duplicate"), 1)
+        self.assertEqual(kinds.count("file_started"), 2)
+        self.assertEqual(kinds.count("classified"), 2)
+        self.assertEqual(kinds.count("moved"), 2)
+
+        moved = {line["path"]: line["current_path"] for line in lines if line["event"] == "moved"}
+        for entry in summary["results"]:
+            if not entry["is_duplicate"]:
+                self.assertEqual(moved[entry["original_path"]], entry["current_path"])
+        self.assertEqual(lines[-1]["organized"], summary["organized"])
+        self.assertTrue(all("ts" in line for line in lines))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not available")
+    def test_unix_socket(self):
+        path = os.path.join(self.test_dir, "events.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(1)
+        received = []
+
+        def accept():
+            conn, _ = server.accept()
+            with conn, conn.makefile('r', encoding='utf-8') as stream:
+                received.extend(json.loads(line) for line in stream)
+        thread = threading.Thread(target=accept)
+        thread.start()
+
+        bus = events.EventBus(f"unix://{path}")
+        bus.emit("moved", path="/a/b.pdf", current_path="/out/b.pdf")
+        bus.close()
+        thread.join(5)
+        server.close()
+        self.assertEqual(received[0]["event"], "moved")
+        self.assertEqual(received[0]["current_path"], "/out/b.pdf")
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not available")
+    def test_socket_events_arrive_before_close(self):
+        path = os.path.join(self.test_dir, "events.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(path)
+        server.listen(1)
+        bus = events.EventBus(f"unix://{path}")
+        conn, _ = server.accept()
+        try:
+            conn.settimeout(5)
+            bus.emit("file_started", path="/a/b.pdf")
+            self.assertEqual(json.loads(conn.recv(65536).decode("utf-8"))["event"], "file_started")
+
+            # A consumer going away disables the bus without failing the caller
+            conn.close()
+            for _ in range(50):
+                bus.emit("moved", path="/a/b.pdf", current_path="/out/b.pdf")
+            self.assertIsNone(bus._stream)
+        finally:
+            bus.close()
+            server.close()
+
+    def test_emit_without_bus(self):
+        events.emit(None, "moved", path="/a/b.pdf")
+
+class TestProgress(unittest.TestCase):
+
+    def test_rate_limited(self):
+        calls = []
+        report = events.rate_limited(lambda done, total: calls.append(done), interval=3600)
+        for done in range(1, 101):
+            report(done, 100)
+        # First call goes through, the rest are aggregated until the last file
+        self.assertEqual(calls, [1, 100])
+
+class TestQueueLogging(unittest.TestCase):
+
+    def tearDown(self):
+        pipeline.stop_logging()
+        logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+
+    def test_per_file_lines_only_when_verbose(self):
+        for verbose in (False, True):
+            out_dir = tempfile.mkdtemp()
+            try:
+                pipeline.setup_logging(out_dir, verbose=verbose)
+                logging.info("Processing: a.pdf", extra=pipeline.PER_FILE)
+                logging.info("Run line")
+                pipeline.stop_logging()
+                with open(os.path.join(out_dir, "logs", "doccleaner.log"), encoding="utf-8") as f:
+                    log = f.read()
+                # The log file always gets both lines
+                self.assertIn("Processing: a.pdf", log)
+                self.assertIn("Run line", log)
+                logging.basicConfig(handlers=[logging.NullHandler()], force=True)
+            finally:
+                shutil.rmtree(out_dir)
+
+    def test_lines_are_formatted_once(self):
+        out_dir = tempfile.mkdtemp()
+        console = io.StringIO()
+        try:
+            with mock.patch.object(sys, 'stdout', console):
+                pipeline.setup_logging(out_dir)
+                logging.info("Started execution")
+                try:
+                    raise ValueError("broken file")
+                except ValueError:
+                    logging.error("Error processing a.pdf", exc_info=True)
+                pipeline.stop_logging()
+            with open(os.path.join(out_dir, "logs", "doccleaner.log"), encoding="utf-8") as f:
+                log = f.read().splitlines()
+        finally:
+            shutil.rmtree(out_dir)
+
+        self.assertTrue(log[0].endswith(" - root - INFO - Started execution"), log[0])
+        self.assertTrue(log[1].endswith(" - root - ERROR - Error processing a.pdf"), log[1])
+        self.assertEqual(sum("Traceback" in line for line in log), 1)
+        self.assertEqual(console.getvalue().splitlines()[0], "INFO: Started execution")
+
+    def test_console_filter(self):
+        pipeline.setup_logging(None, dry_run=True, verbose=False)
+        console = pipeline._log_listener.handlers[0]
+        per_file = logging.makeLogRecord({"msg": "Processing: a.pdf", "per_file": True, "levelno": logging.INFO})
+        run_line = logging.makeLogRecord({"msg": "Run line", "levelno": logging.INFO})
+        self.assertFalse(console.filter(per_file))
+        self.assertTrue(console.filter(run_line))
+
+if __name__ == '__main__':
+    unittest.main()
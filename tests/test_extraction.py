@@ -0,0 +1,133 @@
+import unittest
+import os
+import time
+import shutil
+import tempfile
+from doc_cleaner import extraction, content_reader
+
+def slow_reader(path, stats=None):
+    if "slow" in path:
+        time.sleep(30)
+    return quick_reader(path, stats)
+
+def hungry_reader(path, stats=None):
+    blocks = []
+    while True:
+        blocks.append(bytearray(16 * 1024 * 1024))
+        time.sleep(0.01)
+
+def quick_reader(path, stats=None):
+    return {"title": os.path.basename(path), "subtitle": "", "sample_text": ""}
+
+class TestIsolatedExtraction(unittest.TestCase):
+
+    def setUp(self):
+        self.original_limits = dict(extraction.EXTRACTION_LIMITS)
+        # Limits are checked by the parent, so patching them here is enough
+        extraction.EXTRACTION_LIMITS.update({"timeout_seconds": 5, "max_rss_mb": 200, "per_extension": {}})
+
+    def tearDown(self):
+        extraction.EXTRACTION_LIMITS.clear()
+        extraction.EXTRACTION_LIMITS.update(self.original_limits)
+
+    def test_workers_are_spawned(self):
+        self.assertEqual(extraction._MP.get_start_method(), "spawn")
+
+    def test_timeout_kills_worker_and_recovers(self):
+        worker = extraction.IsolatedWorker(reader=slow_reader)
+        try:
+            # Warm up: the spawned worker imports the package before its first file
+            self.assertIsNone(worker.read("first.pdf")[1])
+            extraction.EXTRACTION_LIMITS["timeout_seconds"] = 0.5
+            start = time.monotonic()
+            self.assertEqual(worker.read("slow.pdf"), (None, extraction.EXTRACTION_TIMEOUT))
+            self.assertLess(time.monotonic() - start, 5)
+
+            extraction.EXTRACTION_LIMITS["timeout_seconds"] = 20  # the restarted worker starts cold
+            metadata, error = worker.read("next.pdf")
+            self.assertIsNone(error)
+            self.assertEqual(metadata["title"], "next.pdf")
+        finally:
+            worker.close()
+
+    def test_memory_budget(self):
+        extraction.EXTRACTION_LIMITS["timeout_seconds"] = 20
+        worker = extraction.IsolatedWorker(reader=hungry_reader)
+        try:
+            self.assertEqual(worker.read("huge.docx"), (None, extraction.EXTRACTION_OOM))
+        finally:
+            worker.close()
+
+    def test_per_extension_override(self):
+        extraction.EXTRACTION_LIMITS["per_extension"] = {".pdf": {"timeout_seconds": 9}}
+        self.assertEqual(extraction.limits_for(".pdf"), (9, 200))
+        self.assertEqual(extraction.limits_for(".docx"), (5, 200))
+
+class TestExtractionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_reader = content_reader.read_content
+        self.read_order = []
+
+        def recording_reader(path, stats=None):
+            self.read_order.append(os.path.basename(path))
+            return quick_reader(path, stats)
+        content_reader.read_content = recording_reader
+
+    def tearDown(self):
+        content_reader.read_content = self.original_reader
+        shutil.rmtree(self.test_dir)
+
+    def _make(self, name, size):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        return path
+
+    def test_largest_first(self):
+        small = self._make("small.docx", 10)
+        big = self._make("big.docx", 3 * 1024 * 1024)
+        medium = self._make("medium.docx", 1024 * 1024)
+        self.assertGreater(extraction.estimate_cost(big), extraction.estimate_cost(medium))
+        self.assertGreater(extraction.estimate_cost("x.pdf", pages=500), extraction.estimate_cost("x.pdf", pages=1))
+
+        pool = extraction.ExtractionPool(workers=1)
+        pool.submit([(small, None), (big, None), (medium, None)])
+        metadata, error, stats = pool.result(small)
+        pool.close()
+
+        self.assertEqual(self.read_order, ["big.docx", "medium.docx", "small.docx"])
+        self.assertIsNone(error)
+        self.assertEqual(metadata["title"], "small.docx")
+        self.assertIn("extraction_predicted_s", stats)
+        self.assertIn("extraction_seconds", stats)
+        self.assertEqual(pool.cost_report()[".docx"]["files"], 3)
+
+    def test_as_completed_hands_results_over_in_completion_order(self):
+        small = self._make("small.docx", 10)
+        big = self._make("big.docx", 3 * 1024 * 1024)
+        pool = extraction.ExtractionPool(workers=1)
+        pool.submit([(small, None), (big, None)])
+        # The scan-order first file is read last, yet the big one is handed over without waiting for it
+        completed = [os.path.basename(path) for path, _ in pool.as_completed()]
+        pool.close()
+        self.assertEqual(completed, ["big.docx", "small.docx"])
+        self.assertEqual(list(pool.as_completed()), [])
+
+    def test_results_from_several_workers(self):
+        paths = [self._make(f"f{i}.pptx", i * 1000) for i in range(8)]
+        pool = extraction.ExtractionPool(workers=3)
+        pool.submit([(p, None) for p in paths])
+        titles = [pool.result(p)[0]["title"] for p in paths]
+        pool.close()
+        self.assertEqual(titles, [os.path.basename(p) for p in paths])
+
+class TestFilenameMetadata(unittest.TestCase):
+
+    def test_filename_fallback(self):
+        metadata = content_reader.filename_metadata("/tmp/acta_reunion-comite.pdf")
+        self.assertEqual(metadata["title"], "acta reunion comite")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from unittest import mock
+from doc_cleaner import duplicates, io_accounting, sharding, config
+
+class TestFileHash(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "a.pdf")
+        self.data = os.urandom(300 * 1024)
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_algorithms_match_hashlib(self):
+        for algorithm in ("sha256", "blake2b", "md5"):
+            expected = hashlib.new(algorithm, self.data).hexdigest()
+            self.assertEqual(duplicates.get_file_hash(self.path, algorithm), expected)
+
+    def test_small_buffer_and_mmap_agree(self):
+        expected = hashlib.sha256(self.data).hexdigest()
+        with mock.patch.dict(duplicates.DUPLICATES, {"buffer_kb": 7, "mmap_min_mb": 1024}):
+            self.assertEqual(duplicates.get_file_hash(self.path, "sha256"), expected)
+        with mock.patch.dict(duplicates.DUPLICATES, {"mmap": True, "mmap_min_mb": 0}):
+            with io_accounting.track() as counters:
+                self.assertEqual(duplicates.get_file_hash(self.path, "sha256"), expected)
+        # Mapped reads are still accounted for
+        self.assertEqual(counters["bytes_read"], len(self.data))
+        self.assertEqual(counters["full_reads"], 1)
+
+    def test_mmap_is_opt_in(self):
+        with mock.patch.dict(duplicates.DUPLICATES, {"mmap_min_mb": 0}), \
+                mock.patch.object(duplicates.mmap, 'mmap') as mapped:
+            self.assertEqual(duplicates.get_file_hash(self.path, "sha256"), hashlib.sha256(self.data).hexdigest())
+        mapped.assert_not_called()
+
+    def test_empty_file(self):
+        empty = os.path.join(self.test_dir, "empty.pdf")
+        open(empty, "wb").close()
+        with mock.patch.dict(duplicates.DUPLICATES, {"mmap": True, "mmap_min_mb": 0}):
+            self.assertEqual(duplicates.get_file_hash(empty, "sha256"), hashlib.sha256().hexdigest())
+
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            duplicates.get_file_hash(self.path, "crc32")
+        with self.assertRaises(ValueError):
+            duplicates.process_duplicates([self.path], algorithm="crc32")
+
+    @unittest.skipIf(duplicates.xxhash is not None, "xxhash is installed")
+    def test_xxhash_needs_package(self):
+        self.assertNotIn("xxh3_64", duplicates.available_algorithms())
+        with self.assertRaises(ValueError):
+            duplicates.new_hasher("xxh3_64")
+
+class TestAlgorithmRecorded(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_records_carry_algorithm(self):
+        paths = []
+        for name in ("a.pdf", "b.pdf"):
+            paths.append(os.path.join(self.test_dir, name))
+            with open(paths[-1], "w") as f:
+                f.write("same")
+        results = duplicates.process_duplicates(paths, algorithm="blake2b")
+        self.assertEqual([r["hash_algorithm"] for r in results], ["blake2b", "blake2b"])
+        self.assertEqual(results[0]["hash"], hashlib.blake2b(b"same").hexdigest())
+        self.assertTrue(results[1]["is_duplicate"])
+
+    def test_merge_rejects_mixed_algorithms(self):
+        manifests = []
+        for i, algorithm in enumerate(("sha256", "blake2b")):
+            path = os.path.join(self.test_dir, f"manifest{i}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"original_path": f"/in/{i}.pdf", "current_path": f"/out/{i}.pdf", "hash": "ab",
+                            "hash_algorithm": algorithm, "scan_key": f"{i}.pdf", "is_duplicate": False}], f)
+            manifests.append(path)
+        with self.assertRaises(ValueError):
+            sharding.merge(manifests, os.path.join(self.test_dir, "merged"), dry_run=True)
+
+if __name__ == '__main__':
+    unittest.main()
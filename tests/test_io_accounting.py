@@ -0,0 +1,187 @@
+import unittest
+import os
+import errno
+import json
+import shutil
+import tempfile
+import threading
+from unittest import mock
+from doc_cleaner import io_accounting, metrics, duplicates, pipeline, organizer, config
+
+class TestCounters(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "a.pdf")
+        with open(self.path, "wb") as f:
+            f.write(b"x" * 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_partial_and_full_reads(self):
+        with io_accounting.track() as counters:
+            with io_accounting.open_file(self.path) as f:
+                f.read(10)
+            with io_accounting.open_file(self.path) as f:
+                f.read()
+            io_accounting.getsize(self.path)
+        self.assertEqual(counters["opens"], 2)
+        self.assertEqual(counters["bytes_read"], 1010)
+        self.assertEqual(counters["full_reads"], 1)
+        self.assertEqual(counters["stats"], 1)
+
+    def test_nested_blocks_add_up(self):
+        with io_accounting.track() as outer:
+            io_accounting.exists(self.path)
+            with io_accounting.track() as inner:
+                io_accounting.exists(self.path)
+        self.assertEqual(inner["stats"], 1)
+        self.assertEqual(outer["stats"], 2)
+
+    def test_untracked_calls_are_plain(self):
+        with io_accounting.open_file(self.path) as f:
+            self.assertEqual(len(f.read()), 1000)
+
+    def test_read_slots_are_held_per_read(self):
+        slots = threading.Semaphore(1)
+        with io_accounting.read_slots(slots), io_accounting.open_file(self.path) as f:
+            f.read(10)
+            # Between reads (while a parser works on the data) the slot is free
+            self.assertTrue(slots.acquire(blocking=False))
+            slots.release()
+            with mock.patch.object(io_accounting, '_slot', wraps=io_accounting._slot) as slot:
+                self.assertEqual(len(list(f)), 1)
+            self.assertEqual(slot.call_count, 2)  # the line, then end of file
+        # Outside the block reads do not wait for a slot
+        slots.acquire()
+        with io_accounting.open_file(self.path) as f:
+            self.assertEqual(len(f.read()), 1000)
+        slots.release()
+
+    def test_rename_reads_no_data(self):
+        dest = os.path.join(self.test_dir, "b.pdf")
+        with io_accounting.track() as counters:
+            io_accounting.move(self.path, dest)
+        self.assertTrue(os.path.exists(dest))
+        self.assertEqual(counters["bytes_read"], 0)
+        self.assertEqual(counters["full_reads"], 0)
+
+    def test_refused_rename_falls_back_to_copy(self):
+        for i, code in enumerate((errno.EXDEV, errno.EPERM, errno.EACCES)):
+            dest = os.path.join(self.test_dir, f"copy{i}.pdf")
+            with mock.patch.object(os, 'rename', side_effect=OSError(code, os.strerror(code))), \
+                    io_accounting.track() as counters:
+                io_accounting.move(self.path, dest)
+            self.assertTrue(os.path.exists(dest))
+            self.assertEqual(counters["bytes_read"], 1000)
+            self.assertEqual(counters["full_reads"], 1)
+            self.path = dest
+        with mock.patch.object(os, 'rename', side_effect=OSError(errno.ENOENT, "gone")):
+            with self.assertRaises(OSError):
+                io_accounting.move(self.path, os.path.join(self.test_dir, "missing.pdf"))
+
+class TestDuplicatesBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.test_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_unique_size_is_never_read(self):
+        unique = self._write("unique.pdf", "a much longer body")
+        first = self._write("first.pdf", "same")
+        copy = self._write("copy.pdf", "same")
+        other = self._write("other.pdf", "diff")
+        collector = metrics.Metrics()
+
+        results = duplicates.process_duplicates([unique, first, copy, other], metrics=collector, size_prefilter=True)
+
+        self.assertEqual([r['original_path'] for r in results], [unique, first, copy, other])
+        self.assertIsNone(results[0]['hash'])
+        self.assertFalse(results[0]['is_duplicate'])
+        self.assertTrue(results[2]['is_duplicate'])
+        self.assertEqual(collector.io.file_counters(unique), {"bytes_read": 0, "full_reads": 0})
+        self.assertEqual(collector.io.file_counters(first)["full_reads"], 1)
+
+        hash_io = collector.io.stages["hash"]
+        self.assertEqual(hash_io["opens"], 3)
+        self.assertEqual(hash_io["full_reads"], 3)
+        self.assertEqual(collector.io.stages["size_check"]["stats"], 4)
+
+    def test_without_prefilter_every_file_is_hashed(self):
+        unique = self._write("unique.pdf", "a much longer body")
+        collector = metrics.Metrics()
+        results = duplicates.process_duplicates([unique], metrics=collector)
+        self.assertIsNotNone(results[0]['hash'])
+        self.assertEqual(collector.io.file_counters(unique)["full_reads"], 1)
+
+class TestRunIO(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_io_in_metrics_and_summary(self):
+        for name, content in [("acta_reunion.pdf", "A"), ("copia.pdf", "A"), ("formato.docx", "B")]:
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write(content)
+        output_root = organizer.create_output_structure(self.test_dir, "test_io")
+        summary = pipeline.run(self.test_dir, output_root, {"validate": False})
+
+        with open(os.path.join(output_root, "metrics.json"), encoding="utf-8") as f:
+            io = json.load(f)["io"]
+        self.assertEqual(io["stages"]["scan"]["listdirs"], 1)
+        self.assertEqual(io["stages"]["hash"]["full_reads"], 3)
+        self.assertGreater(io["stages"]["export"]["bytes_written"], 0)
+        # Moves within one file system are renames
+        self.assertEqual(io["stages"]["move"]["bytes_read"], 0)
+        self.assertEqual(summary["io"]["total"], io["total"])
+
+    def _manifest_hashes(self, options):
+        output_root = organizer.create_output_structure(self.test_dir, "test_io")
+        pipeline.run(self.test_dir, output_root, dict(options, validate=False))
+        with open(os.path.join(output_root, "manifest.json"), encoding="utf-8") as f:
+            return {os.path.basename(e["original_path"]): (e["hash"], e["hash_algorithm"]) for e in json.load(f)}
+
+    def test_manifest_hashes_with_and_without_size_prefilter(self):
+        for name, content in [("acta_reunion.pdf", "A"), ("copia.pdf", "A"), ("formato.docx", "B")]:
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write(content)
+
+        hashes = self._manifest_hashes({"size_prefilter": True})
+        self.assertEqual(hashes["formato.docx"], (None, None))  # unique size, never read
+        self.assertEqual(hashes["acta_reunion.pdf"][1], "sha256")
+
+        shutil.rmtree(self.dup_dir)
+        os.makedirs(self.dup_dir)
+        for name, content in [("acta_reunion.pdf", "A"), ("copia.pdf", "A"), ("formato.docx", "B")]:
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write(content)
+        hashes = self._manifest_hashes({})
+        self.assertEqual(len(hashes), 3)
+        for file_hash, algorithm in hashes.values():
+            self.assertRegex(file_hash, "^[0-9a-f]{64}$")
+            self.assertEqual(algorithm, "sha256")
+
+if __name__ == '__main__':
+    unittest.main()
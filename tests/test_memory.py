@@ -0,0 +1,166 @@
+import unittest
+import os
+import time
+import shutil
+import tempfile
+import threading
+from unittest import mock
+from doc_cleaner import memory, extraction, content_reader, pipeline, organizer, config
+
+class TestMemoryGovernor(unittest.TestCase):
+
+    def setUp(self):
+        self.original_rss = memory.processes_rss_bytes
+        self.original_get_rss = memory.get_rss_bytes
+        self.original_children = memory._children
+        self.original_config = dict(memory.MEMORY)
+        memory.MEMORY["sample_interval"] = 0
+
+    def tearDown(self):
+        memory.processes_rss_bytes = self.original_rss
+        memory.get_rss_bytes = self.original_get_rss
+        memory._children = self.original_children
+        memory.MEMORY.clear()
+        memory.MEMORY.update(self.original_config)
+
+    def test_parse_size(self):
+        self.assertEqual(memory.parse_size("2G"), 2 * 1024 ** 3)
+        self.assertEqual(memory.parse_size("512mb"), 512 * 1024 ** 2)
+        self.assertEqual(memory.parse_size("300"), 300 * 1024 ** 2)
+        with self.assertRaises(ValueError):
+            memory.parse_size("lots")
+
+    def test_scales_down_and_up(self):
+        rss = [900]
+        memory.processes_rss_bytes = lambda pids: rss[0]
+        governor = memory.MemoryGovernor(1000, max_workers=4)
+
+        self.assertEqual(governor.allowed(), 3)
+        self.assertEqual(governor.allowed(), 2)
+        self.assertEqual(governor.allowed(), 1)
+        self.assertEqual(governor.allowed(), 1)  # never below one
+
+        rss[0] = 100
+        self.assertEqual(governor.allowed(), 2)
+        self.assertEqual(governor.lowest_limit, 1)
+
+    def test_parent_memory_does_not_ratchet_the_limit(self):
+        parent, worker, other_job_worker = os.getpid(), -1, -2
+        # The parent never gives its memory back; another job's worker has its own budget
+        rss = {parent: 10 ** 12, worker: 900, other_job_worker: 10 ** 9}
+        memory.get_rss_bytes = lambda pid: rss[pid]
+        memory._children = lambda pid: [worker, other_job_worker] if pid == parent else []
+        governor = memory.MemoryGovernor(1000, max_workers=3, pids=lambda: [worker])
+
+        self.assertEqual(governor.allowed(), 2)
+        self.assertEqual(governor.allowed(), 1)
+        rss[worker] = 100  # the over-budget worker was restarted
+        self.assertEqual(governor.allowed(), 2)
+        self.assertEqual(governor.allowed(), 3)
+        self.assertEqual(memory.tree_rss_bytes(), 10 ** 12 + 10 ** 9 + 100)
+
+    def test_pool_budgets_its_own_workers(self):
+        pool = extraction.ExtractionPool(workers=2, isolate=True, max_memory=10 ** 9)
+        self.assertEqual(pool.governor.pids(), [])
+        worker = extraction.IsolatedWorker()
+        worker._start()
+        try:
+            pool._isolated.append(worker)
+            self.assertEqual(pool.governor.pids(), [worker.pid])
+        finally:
+            worker.close()
+        self.assertEqual(pool.governor.pids(), [])
+
+    def test_budget_requires_isolation(self):
+        with self.assertRaises(ValueError):
+            extraction.ExtractionPool(workers=2, max_memory=1000)
+
+    def test_no_budget(self):
+        governor = memory.MemoryGovernor(None, max_workers=3)
+        self.assertEqual(governor.allowed(), 3)
+
+    def test_tree_rss(self):
+        self.assertGreater(memory.tree_rss_bytes(), 0)
+
+    def test_stage_peaks(self):
+        peaks = memory.StagePeaks(interval=0.01)
+        peaks.begin("scan")
+        peaks.begin("extraction")
+        peaks.end()
+        self.assertEqual(list(peaks.report()), ["scan", "extraction"])
+
+class TestBudgetWithoutIsolation(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_rejected_before_anything_moves(self):
+        for name in ["acta_reunion.pdf", "copia.pdf"]:
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write("SAME")
+        output_root = organizer.create_output_structure(self.test_dir, "test_budget")
+        for options in ({"max_memory": 10 ** 9, "isolate": False}, {"isolate": False}):
+            with mock.patch.dict(pipeline.MEMORY, {"max_memory_mb": 512}), self.assertRaises(ValueError):
+                pipeline.run(self.test_dir, output_root, {"validate": False, **options})
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["DocCleaner_Run_test_budget", "acta_reunion.pdf", "copia.pdf"])
+        self.assertEqual(os.listdir(self.dup_dir), [])
+
+class TestLargeFileLane(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.original_reader = content_reader.read_content
+        self.original_config = dict(memory.MEMORY)
+        extraction.MEMORY.update({"large_file_mb": 1, "large_file_workers": 1})
+
+    def tearDown(self):
+        content_reader.read_content = self.original_reader
+        extraction.MEMORY.clear()
+        extraction.MEMORY.update(self.original_config)
+        shutil.rmtree(self.test_dir)
+
+    def test_one_large_file_at_a_time(self):
+        lock = threading.Lock()
+        running = {"large": 0, "peak_large": 0, "small_done": 0}
+
+        def reader(path, stats=None):
+            large = os.path.getsize(path) >= 1024 * 1024
+            with lock:
+                if large:
+                    running["large"] += 1
+                    running["peak_large"] = max(running["peak_large"], running["large"])
+            time.sleep(0.05)
+            with lock:
+                if large:
+                    running["large"] -= 1
+                else:
+                    running["small_done"] += 1
+            return {"title": "", "subtitle": "", "sample_text": ""}
+        content_reader.read_content = reader
+
+        paths = []
+        for i, size in enumerate([2, 2, 2, 0, 0, 0]):
+            path = os.path.join(self.test_dir, f"f{i}.docx")
+            with open(path, "wb") as f:
+                f.write(b"x" * (size * 1024 * 1024 + 10))
+            paths.append(path)
+
+        pool = extraction.ExtractionPool(workers=3)
+        pool.submit([(p, None) for p in paths])
+        for path in paths:
+            self.assertIsNone(pool.result(path)[1])
+        pool.close()
+
+        self.assertEqual(running["peak_large"], 1)
+        self.assertEqual(running["small_done"], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from doc_cleaner import metrics, pipeline, organizer, config
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_and_extensions(self):
+        collector = metrics.Metrics(slowest=2)
+        collector.record("read", 0.004, "/a/x.pdf")
+        collector.record("read", 0.004, "/a/y.pdf")
+        collector.record("read", 0.3, "/a/z.docx")
+        collector.record("scan", 1.5)
+
+        report = collector.to_dict()
+        read = report["stages"]["read"]
+        self.assertEqual(read["count"], 3)
+        self.assertEqual(read["histogram"], {"<=5ms": 2, "<=500ms": 1})
+        self.assertEqual(read["p50_ms"], 5.0)
+        self.assertEqual(read["by_extension"][".pdf"]["count"], 2)
+        self.assertNotIn("by_extension", report["stages"]["scan"])
+
+        slowest = report["slowest_files"]
+        self.assertEqual([s["path"] for s in slowest], ["/a/z.docx", "/a/y.pdf"])
+
+    def test_timed_without_collector(self):
+        with metrics.timed(None, "classify"):
+            pass
+
+class TestRunMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_metrics_json_next_to_manifest(self):
+        for name, content in [("acta_reunion.pdf", "A"), ("copia.pdf", "A"), ("formato.docx", "B")]:
+            with open(os.path.join(self.test_dir, name), "w") as f:
+                f.write(content)
+        output_root = organizer.create_output_structure(self.test_dir, "test_metrics")
+        summary = pipeline.run(self.test_dir, output_root, {"validate": False})
+
+        with open(os.path.join(output_root, "metrics.json"), encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report, summary["metrics"])
+        self.assertTrue(os.path.exists(os.path.join(output_root, "manifest.json")))
+
+        stages = report["stages"]
+        self.assertEqual(stages["hash"]["count"], 3)
+        self.assertEqual(stages["classify"]["count"], 2)
+        self.assertEqual(stages["move"]["count"], 3)  # two organized files and one duplicate
+        self.assertEqual(set(stages["classify"]["by_extension"]), {".pdf", ".docx"})
+        self.assertIn("scan", stages)
+        self.assertIn("export", stages)
+        self.assertLessEqual(len(report["slowest_files"]), config.METRICS["slowest_files"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from doc_cleaner import pipeline, organizer, config
+
+class TestMultiRoot(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def _root(self, name, files):
+        root = os.path.join(self.test_dir, name)
+        os.makedirs(root)
+        for file_name, content in files:
+            with open(os.path.join(root, file_name), "w") as f:
+                f.write(content)
+        return root
+
+    def test_cross_root_duplicates_and_own_manifests(self):
+        legal = self._root("legal", [("acta_reunion.pdf", "same body"), ("formato.docx", "B")])
+        finance = self._root("finance", [("copia_acta.pdf", "same body"), ("informe.pdf", "other body")])
+        roots = [(root, organizer.create_output_structure(root, "test_multi")) for root in (legal, finance)]
+
+        summary = pipeline.run_roots(roots, {"validate": False})
+
+        self.assertEqual(summary["total_files"], 4)
+        self.assertEqual(summary["duplicates"], 1)
+        by_root = {r["root"]: r for r in summary["roots"]}
+        self.assertEqual(by_root[legal]["duplicates"], 0)
+        self.assertEqual(by_root[finance]["duplicates"], 1)  # copy of a file in the first root
+        self.assertEqual(by_root[finance]["organized"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dup_dir, "copia_acta.pdf")))
+
+        for root, output_root in roots:
+            with open(os.path.join(output_root, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.assertEqual(len(manifest), 2)
+            self.assertTrue(all(e["original_path"].startswith(root + os.sep) for e in manifest))
+            for entry in manifest:
+                if not entry["is_duplicate"]:
+                    self.assertTrue(entry["current_path"].startswith(output_root))
+            self.assertTrue(os.path.exists(os.path.join(output_root, "metrics.json")))
+
+    def test_nested_root_files_counted_once(self):
+        outer = self._root("outer", [("acta_reunion.pdf", "A")])
+        inner = self._root(os.path.join("outer", "inner"), [("informe.pdf", "B")])
+        roots = [(root, organizer.create_output_structure(root, "test_nested")) for root in (outer, inner)]
+
+        summary = pipeline.run_roots(roots, {"validate": False, "recursive": True, "dry_run": True})
+
+        self.assertEqual(summary["total_files"], 2)
+        self.assertEqual(summary["duplicates"], 0)
+        self.assertEqual([r["total_files"] for r in summary["roots"]], [2, 0])
+
+    def test_shard_needs_single_root(self):
+        a = self._root("a", [])
+        b = self._root("b", [])
+        with self.assertRaises(ValueError):
+            pipeline.run_roots([(a, a), (b, b)], {"shard": (1, 2)})
+
+if __name__ == '__main__':
+    unittest.main()
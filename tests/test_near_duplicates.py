@@ -0,0 +1,91 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+from doc_cleaner import near_duplicates, content_reader, pipeline, organizer, config
+
+BASE = ("Procedimiento para la recepcion de materiales en el almacen central. "
+        "El responsable verifica la orden de compra, revisa la cantidad recibida, "
+        "registra el ingreso en el sistema y archiva el soporte firmado por el proveedor. "
+        "En caso de diferencias se informa al area de compras antes de aceptar la entrega.")
+
+class TestNearDuplicates(unittest.TestCase):
+
+    def test_choose_bands_matches_threshold(self):
+        bands, rows = near_duplicates.choose_bands(64, 0.8)
+        self.assertEqual(bands * rows, 64)
+        self.assertAlmostEqual((1.0 / bands) ** (1.0 / rows), 0.8, delta=0.1)
+
+    def test_similarity_estimate(self):
+        hasher = near_duplicates.MinHasher(128)
+        a = hasher.signature(near_duplicates.shingles(BASE))
+        b = hasher.signature(near_duplicates.shingles(BASE + " Version 3."))
+        c = hasher.signature(near_duplicates.shingles("Acta de reunion del comite de calidad con los asistentes"))
+        self.assertGreater(near_duplicates.estimate_similarity(a, b), 0.8)
+        self.assertLess(near_duplicates.estimate_similarity(a, c), 0.2)
+
+    def test_clusters(self):
+        index = near_duplicates.NearDuplicateIndex(threshold=0.7, num_perm=64)
+        entries = [{"original_path": f"doc{i}.docx"} for i in range(4)]
+        index.add(entries[0], BASE)
+        index.add(entries[1], "Acta de reunion del comite de calidad con los asistentes y compromisos")
+        index.add(entries[2], BASE + " Revisado v2.")
+        self.assertFalse(index.add(entries[3], ""))
+
+        self.assertEqual(near_duplicates.annotate_clusters(index), 1)
+        self.assertEqual(entries[0]['near_duplicate_cluster'], 1)
+        self.assertEqual(entries[2]['near_duplicate_cluster'], 1)
+        self.assertNotIn('near_duplicate_cluster', entries[1])
+
+    def test_cluster_compares_with_one_member(self):
+        index = near_duplicates.NearDuplicateIndex(threshold=0.7, num_perm=64)
+        with mock.patch.object(near_duplicates, 'estimate_similarity',
+                               wraps=near_duplicates.estimate_similarity) as similarity:
+            for i in range(20):
+                index.add(i, BASE)
+        # Each copy is checked against the existing cluster once, not against every copy
+        self.assertEqual(similarity.call_count, 19)
+        self.assertEqual(index.clusters(), [list(range(20))])
+        self.assertTrue(all(len(bucket) <= 2 for buckets in index.buckets for bucket in buckets.values()))
+
+def read_lines(path):
+    """Stand-in reader: one text chunk and one unit per line of a plain-text file."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield 'text', line.strip()
+            yield 'unit', None
+
+class TestNearDuplicatesInRun(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_shared_heading_is_not_a_near_duplicate(self):
+        # The heading alone decides the topic, so early exit would stop right after it
+        heading = "Acta de reunion: acta acta minuta del comite"
+        bodies = [BASE, "Compromisos del area de ventas para el trimestre, presupuesto aprobado "
+                        "por la gerencia, cronograma de visitas a clientes y seguimiento de indicadores."]
+        for i, body in enumerate(bodies):
+            with open(os.path.join(self.test_dir, f"acta{i}.pdf"), 'w', encoding='utf-8') as f:
+                f.write(f"{heading}\n{body}\n")
+
+        output_root = organizer.create_output_structure(self.test_dir, "test_near")
+        with mock.patch.dict(content_reader._READERS, {'.pdf': read_lines}), \
+                mock.patch.dict(content_reader.EARLY_EXIT, {"enabled": True}):
+            summary = pipeline.run(self.test_dir, output_root,
+                                   {"near_duplicates": True, "near_threshold": 0.7, "validate": False})
+
+        self.assertEqual(summary['near_duplicate_clusters'], 0)
+        self.assertEqual(summary['read_stats'].get('early_exits', 0), 0)
+
+if __name__ == '__main__':
+    unittest.main()
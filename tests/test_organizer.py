@@ -0,0 +1,87 @@
+import unittest
+import os
+import json
+import shutil
+import datetime
+import tempfile
+from unittest import mock
+from doc_cleaner import organizer, exporter
+
+DATE = datetime.datetime(2025, 3, 7)
+
+class TestDestinationLayout(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        organizer._buckets.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        organizer._buckets.clear()
+
+    def _layout(self, **layout):
+        return mock.patch.dict(organizer.DESTINATION_LAYOUT, layout)
+
+    def test_month_is_default(self):
+        with self._layout(mode="month", max_entries=0):
+            dest = organizer.determine_destination(self.test_dir, "ACTA", DATE, "a.pdf")
+        self.assertEqual(os.path.relpath(dest, self.test_dir), os.path.join("ACTAS", "Mar2025"))
+
+    def test_day(self):
+        with self._layout(mode="day", max_entries=0):
+            dest = organizer.determine_destination(self.test_dir, "ACTA", DATE, "a.pdf")
+        self.assertEqual(os.path.relpath(dest, self.test_dir), os.path.join("ACTAS", "Mar2025", "07"))
+
+    def test_hash_buckets_are_stable(self):
+        with self._layout(mode="hash", hash_prefix_length=2, max_entries=0):
+            first = organizer.determine_destination(self.test_dir, "ACTA", DATE, "Acta_2025.pdf")
+            again = organizer.determine_destination(self.test_dir, "ACTA", DATE, "acta_2025.pdf")
+            names = {organizer.determine_destination(self.test_dir, "ACTA", DATE, f"f{i}.pdf") for i in range(200)}
+        self.assertEqual(first, again)
+        self.assertEqual(len(os.path.basename(first)), 2)
+        self.assertGreater(len(names), 50)
+
+    def test_max_entries_fills_numbered_buckets(self):
+        with self._layout(mode="month", max_entries=2):
+            dests = [organizer.determine_destination(self.test_dir, "ACTA", DATE, f"{i}.pdf") for i in range(5)]
+        self.assertEqual([os.path.basename(d) for d in dests], ["0001", "0001", "0002", "0002", "0003"])
+
+    def test_buckets_continue_on_disk_and_collisions(self):
+        source_dir = os.path.join(self.test_dir, "source")
+        os.makedirs(source_dir)
+        output = os.path.join(self.test_dir, "out")
+        with self._layout(mode="month", max_entries=2):
+            for i in range(3):
+                path = os.path.join(source_dir, f"src{i}.pdf")
+                with open(path, "w") as f:
+                    f.write(str(i))
+                # Same name every time: the collision counter applies inside each bucket
+                organizer.move_file(path, organizer.determine_destination(output, "ACTA", DATE, "acta.pdf"), "acta.pdf")
+            month = os.path.join(output, "ACTAS", "Mar2025")
+            self.assertEqual(sorted(os.listdir(os.path.join(month, "0001"))), ["acta.pdf", "acta_1.pdf"])
+            self.assertEqual(os.listdir(os.path.join(month, "0002")), ["acta.pdf"])
+
+            # A new process picks up the last bucket and its count from disk
+            organizer._buckets.clear()
+            self.assertEqual(os.path.basename(organizer.determine_destination(output, "ACTA", DATE, "b.pdf")), "0002")
+            self.assertEqual(os.path.basename(organizer.determine_destination(output, "ACTA", DATE, "c.pdf")), "0003")
+
+    def test_unknown_mode(self):
+        with self._layout(mode="week"):
+            with self.assertRaises(ValueError):
+                organizer.determine_destination(self.test_dir, "ACTA", DATE, "a.pdf")
+
+    def test_plan_counts_files_per_folder(self):
+        results = [
+            {"topic": "ACTA", "current_path": os.path.join(self.test_dir, "ACTAS", "Mar2025", "0001", "a.pdf")},
+            {"topic": "ACTA", "current_path": os.path.join(self.test_dir, "ACTAS", "Mar2025", "0001", "b.pdf")},
+            {"topic": "ACTA", "current_path": os.path.join(self.test_dir, "ACTAS", "Mar2025", "0002", "c.pdf")},
+        ]
+        exporter.generate_reports(results, self.test_dir)
+        with open(os.path.join(self.test_dir, "doccleaner_organization_plan.json"), encoding="utf-8") as f:
+            plan = json.load(f)
+        self.assertEqual(plan["ACTA"]["folders"], {os.path.join("ACTAS", "Mar2025", "0001"): 2,
+                                                   os.path.join("ACTAS", "Mar2025", "0002"): 1})
+
+if __name__ == '__main__':
+    unittest.main()
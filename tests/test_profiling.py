@@ -0,0 +1,88 @@
+import unittest
+import os
+import time
+import shutil
+import pstats
+import tempfile
+from doc_cleaner import profiling, pipeline, organizer, config
+
+def slow_step():
+    time.sleep(0.3)
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def test_cpu_profile(self):
+        profiler = profiling.Profiler("cpu", self.log_dir)
+        profiler.start()
+        sorted(range(10000), key=lambda x: -x)
+        path = profiler.stop()
+        self.assertTrue(path.endswith("profile_cpu_run.prof"))
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.exists(os.path.join(self.log_dir, "profile_cpu_run.txt")))
+
+    def test_memory_profile(self):
+        profiler = profiling.Profiler("memory", self.log_dir)
+        profiler.start()
+        blocks = [bytearray(1024) for _ in range(100)]
+        path = profiler.stop()
+        with open(path, encoding="utf-8") as f:
+            self.assertIn("allocation sites", f.read())
+        self.assertTrue(os.path.exists(os.path.join(self.log_dir, "profile_memory_run.tracemalloc")))
+        del blocks
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            profiling.Profiler("disk", self.log_dir)
+
+    def test_slow_file_stacks(self):
+        sampler = profiling.SlowFileSampler(self.log_dir, threshold=0.05, interval=0.01)
+        with sampler.watch("/data/quick.pdf"):
+            pass
+        with sampler.watch("/data/slow.pdf"):
+            slow_step()
+        sampler.close()
+
+        self.assertEqual(sampler.slow_files, 1)
+        with open(sampler.path, encoding="utf-8") as f:
+            report = f.read()
+        self.assertIn("/data/slow.pdf", report)
+        self.assertNotIn("/data/quick.pdf", report)
+        self.assertIn("slow_step", report)
+
+    def test_watch_is_noop_when_off(self):
+        with profiling.watch(None, "/data/a.pdf"):
+            pass
+
+class TestProfiledRun(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def test_profile_in_run_logs(self):
+        with open(os.path.join(self.test_dir, "acta.pdf"), "w") as f:
+            f.write("A")
+        output_root = organizer.create_output_structure(self.test_dir, "test_profile")
+        summary = pipeline.run(self.test_dir, output_root, {"validate": False, "profile": "cpu"})
+        self.assertEqual(summary["profile"], os.path.join(output_root, "logs", "profile_cpu_run.prof"))
+        self.assertTrue(os.path.exists(summary["profile"]))
+        self.assertEqual(summary["organized"], 1)
+        # Parsing runs on the extraction pool's thread and is part of the profile
+        functions = {(os.path.basename(filename), name) for filename, _, name in pstats.Stats(summary["profile"]).stats}
+        self.assertIn(("content_reader.py", "read_content"), functions)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from unittest import mock
+from doc_cleaner import reclassify, pipeline, organizer, classifier, content_reader, config
+
+def read_lines(path):
+    """Stand-in reader: one text chunk and one unit per line of a plain-text file."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield 'text', line.strip()
+            yield 'unit', None
+
+class TestReclassify(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+        self.readers = mock.patch.dict(content_reader._READERS, {'.pdf': read_lines})
+        self.readers.start()
+
+    def tearDown(self):
+        self.readers.stop()
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def run_on(self, files, options=None):
+        for name, body in files.items():
+            with open(os.path.join(self.test_dir, name), 'w', encoding='utf-8') as f:
+                f.write(body)
+        self.output_root = organizer.create_output_structure(self.test_dir, "test_reclassify")
+        pipeline.run(self.test_dir, self.output_root, {"validate": False, **(options or {})})
+
+    def run_default(self):
+        self.run_on({"acta_reunion.pdf": "acta de la reunion",
+                     "manual_guia_presupuesto.pdf": "manual\nguia del presupuesto",
+                     "formato_plantilla.pdf": "formato\nplantilla"})
+
+    def manifest(self):
+        with open(os.path.join(self.output_root, "manifest.json"), encoding='utf-8') as f:
+            return {os.path.basename(e['original_path']): e for e in json.load(f)}
+
+    def test_run_stores_metadata(self):
+        self.run_default()
+        stored = reclassify.load_metadata(self.output_root)
+        self.assertEqual(len(stored), 3)
+        record = stored[os.path.join(self.test_dir, "acta_reunion.pdf")]
+        self.assertEqual(record['metadata']['sample_text'], "acta de la reunion")
+        self.assertEqual(record['sample'], [['text', "acta de la reunion"]])
+        self.assertIsNone(record['properties'])
+        self.assertFalse(record['early_exit'])
+
+    def tuned_keywords(self):
+        return {**config.TOPIC_KEYWORDS,
+                "FORMATO": config.TOPIC_KEYWORDS["FORMATO"] + ["presupuesto"],
+                "PROCEDIMIENTO": ["procedimiento"]}
+
+    def test_moves_only_changed_topics(self):
+        self.run_default()
+        before = self.manifest()
+        self.assertEqual(before["manual_guia_presupuesto.pdf"]['topic'], 'PROCEDIMIENTO')
+        with mock.patch.object(classifier, 'TOPIC_KEYWORDS', self.tuned_keywords()), \
+             mock.patch.object(content_reader, 'read_content', side_effect=AssertionError("document re-read")):
+            summary = reclassify.reclassify(self.output_root)
+
+        self.assertEqual(summary['reclassified'], 1)
+        self.assertEqual(summary['unchanged'], 2)
+        after = self.manifest()
+        moved = after["manual_guia_presupuesto.pdf"]
+        self.assertEqual(moved['topic'], 'FORMATO')
+        self.assertEqual(moved['reclassified_from'], 'PROCEDIMIENTO')
+        self.assertTrue(os.path.basename(moved['current_path']).endswith("_FORMATO_manual_guia_presupuesto.pdf"))
+        self.assertTrue(moved['current_path'].startswith(os.path.join(self.output_root, "FORMATOS")))
+        self.assertTrue(os.path.exists(moved['current_path']))
+        self.assertFalse(os.path.exists(before["manual_guia_presupuesto.pdf"]['current_path']))
+        # Files whose topic did not change stay where they were
+        self.assertEqual(after["acta_reunion.pdf"]['current_path'], before["acta_reunion.pdf"]['current_path'])
+
+    def test_dry_run_moves_nothing(self):
+        self.run_default()
+        with mock.patch.object(classifier, 'TOPIC_KEYWORDS', self.tuned_keywords()):
+            summary = reclassify.reclassify(self.output_root, dry_run=True)
+        self.assertEqual(summary['reclassified'], 1)
+        entry = self.manifest()["manual_guia_presupuesto.pdf"]
+        self.assertNotIn('reclassified_from', entry)
+        self.assertTrue(os.path.exists(entry['current_path']))
+
+    def test_keyword_after_early_exit_stop(self):
+        body = "acta\nreunion\nacta\n" + "proceso\n" * 4
+        with mock.patch.dict(content_reader.EARLY_EXIT, {"confident_score": 3, "min_lead": 2}):
+            self.run_on({"informe.pdf": body}, {"early_exit": True})
+            entry = self.manifest()["informe.pdf"]
+            self.assertEqual(entry['topic'], 'ACTA')
+            record = reclassify.load_metadata(self.output_root)[entry['original_path']]
+            # Storing the sample does not make the run read past the stop point
+            self.assertNotIn("proceso", record['metadata']['sample_text'])
+            self.assertEqual(record['sample'], [['text', "acta"], ['text', "reunion"], ['text', "acta"]])
+            self.assertTrue(record['truncated'])
+
+            # Keywords that still stop within the stored sample need no read
+            keywords = {**config.TOPIC_KEYWORDS, "FORMATO": ["formato", "presupuesto"]}
+            with mock.patch.object(classifier, 'TOPIC_KEYWORDS', keywords), \
+                 mock.patch.object(content_reader, 'read_content', side_effect=AssertionError("document re-read")):
+                summary = reclassify.reclassify(self.output_root)
+            self.assertEqual((summary['unchanged'], summary['read_again']), (1, 0))
+
+            # Without 'reunion', the start no longer decides and the document is read again
+            keywords = {**config.TOPIC_KEYWORDS, "ACTA": ["acta"]}
+            with mock.patch.object(classifier, 'TOPIC_KEYWORDS', keywords):
+                summary = reclassify.reclassify(self.output_root)
+
+        self.assertEqual((summary['reclassified'], summary['read_again']), (1, 1))
+        self.assertEqual(self.manifest()["informe.pdf"]['topic'], 'PROCESO')
+        record = reclassify.load_metadata(self.output_root)[entry['original_path']]
+        self.assertEqual(len(record['sample']), 7)
+        self.assertFalse(record['truncated'])
+
+    def test_tier0_file_read_again_when_properties_no_longer_decide(self):
+        self.run_on({"acta_reunion.pdf": "proceso del flujo"}, {"tiered": True})
+        entry = self.manifest()["acta_reunion.pdf"]
+        self.assertEqual(entry['classification_tier'], 0)
+        self.assertIsNone(reclassify.load_metadata(self.output_root)[entry['original_path']]['sample'])
+
+        with mock.patch.object(classifier, 'TOPIC_KEYWORDS', {**config.TOPIC_KEYWORDS, "ACTA": ["acta"]}):
+            summary = reclassify.reclassify(self.output_root)
+
+        self.assertEqual(summary['read_again'], 1)
+        self.assertEqual(self.manifest()["acta_reunion.pdf"]['topic'], 'PROCESO')
+        record = reclassify.load_metadata(self.output_root)[entry['original_path']]
+        self.assertEqual(record['sample'], [['text', "proceso del flujo"]])
+
+if __name__ == '__main__':
+    unittest.main()
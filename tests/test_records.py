@@ -0,0 +1,56 @@
+import unittest
+import json
+from doc_cleaner.records import FileRecord, to_json
+
+class TestFileRecord(unittest.TestCase):
+
+    def test_reads_like_manifest_dict(self):
+        record = FileRecord("/data/in/report.pdf", hash="ab" * 32, hash_algorithm="sha256")
+        record['created_at'] = "2025-01-01T10:00:00"
+        record['topic'] = "ACTA"
+        record['current_path'] = "/data/out/ACTAS/report.pdf"
+        record['classification_tier'] = 0
+
+        self.assertEqual(record.to_dict(), {
+            "original_path": "/data/in/report.pdf",
+            "created_at": "2025-01-01T10:00:00",
+            "modified_at": None,
+            "is_duplicate": False,
+            "topic": "ACTA",
+            "current_path": "/data/out/ACTAS/report.pdf",
+            "hash": "ab" * 32,
+            "hash_algorithm": "sha256",
+            "classification_tier": 0,
+        })
+        self.assertEqual(list(record.keys())[:8], ["original_path", "created_at", "modified_at",
+                                                    "is_duplicate", "topic", "current_path", "hash",
+                                                    "hash_algorithm"])
+        self.assertEqual(json.loads(json.dumps([record], default=to_json))[0], record.to_dict())
+
+    def test_optional_keys(self):
+        record = FileRecord("/data/in/a.docx")
+        self.assertNotIn("error", record)
+        self.assertIsNone(record.get("scan_key"))
+        with self.assertRaises(KeyError):
+            record["scan_key"]
+
+        record["error"] = "ReadFailed"
+        self.assertIn("error", record)
+        self.assertEqual(record.pop("error"), "ReadFailed")
+        self.assertNotIn("error", record)
+
+    def test_final_path_alias(self):
+        record = FileRecord("/data/in/a.docx", is_duplicate=True)
+        self.assertEqual(record["final_path"], "/data/in/a.docx")
+        record["final_path"] = "/dups/a_1.docx"
+        self.assertEqual(record["current_path"], "/dups/a_1.docx")
+        self.assertNotIn("final_path", list(record.keys()))
+
+    def test_directory_is_shared(self):
+        a = FileRecord("/data/" + "in/a.docx")
+        b = FileRecord("/data/i" + "n/b.docx")
+        self.assertIs(a._orig_dir, b._orig_dir)
+        self.assertFalse(hasattr(a, "__dict__"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import os
+import shutil
+import tempfile
+from doc_cleaner import scanner
+
+class TestParallelScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for sub in ["a", "a/deep", "b", ".hidden", "__cache", "DocCleaner_Run_2025-01-01_00-00-00"]:
+            os.makedirs(os.path.join(self.test_dir, sub), exist_ok=True)
+        for rel in ["root.pdf", "a/one.docx", "a/deep/two.xlsx", "b/three.pptx", "b/skip.txt",
+                    ".hidden/hidden.pdf", "__cache/cached.pdf", "DocCleaner_Run_2025-01-01_00-00-00/old.pdf"]:
+            with open(os.path.join(self.test_dir, rel), 'w') as f:
+                f.write("x")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_same_files_as_serial_walk(self):
+        serial = scanner.scan_folder(self.test_dir)
+        parallel = scanner.scan_folder(self.test_dir, workers=4)
+        self.assertEqual(sorted(serial), sorted(parallel))
+        self.assertEqual(len(parallel), 4)
+
+    def test_deterministic_order(self):
+        expected = [os.path.join(self.test_dir, rel) for rel in
+                    ["root.pdf", "a/one.docx", "a/deep/two.xlsx", "b/three.pptx"]]
+        for _ in range(5):
+            self.assertEqual(scanner.scan_folder(self.test_dir, workers=3), expected)
+
+    def test_serial_walk_uses_the_same_order(self):
+        for name in ["z.pdf", "m.pdf", "c.pdf"]:
+            with open(os.path.join(self.test_dir, "a", name), 'w') as f:
+                f.write("x")
+        parallel = scanner.scan_folder(self.test_dir, workers=3)
+        self.assertEqual(scanner.scan_folder(self.test_dir), parallel)
+        self.assertEqual(parallel[1:5], [os.path.join(self.test_dir, "a", name)
+                                         for name in ["c.pdf", "m.pdf", "one.docx", "z.pdf"]])
+
+    def test_stats(self):
+        stats = {}
+        scanner.scan_folder(self.test_dir, workers=2, stats=stats)
+        self.assertEqual(stats["directories"], 4)
+        self.assertEqual(stats["files"], 4)
+        self.assertIn("files_per_second", stats)
+
+if __name__ == '__main__':
+    unittest.main()
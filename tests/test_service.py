@@ -0,0 +1,176 @@
+import unittest
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from unittest import mock
+from doc_cleaner import service, pipeline, config
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the job")
+        time.sleep(0.01)
+
+class TestJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        self.original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+        self.release = threading.Event()
+        self.managers = []
+
+    def tearDown(self):
+        self.release.set()
+        for manager in self.managers:
+            manager.shutdown()
+        config.DUPLICATED_FOLDER_PATH = self.original_dup_dir
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def manager(self, **kwargs):
+        manager = service.JobManager(**kwargs)
+        self.managers.append(manager)
+        return manager
+
+    def folder(self, name):
+        path = os.path.join(self.test_dir, name)
+        os.makedirs(path)
+        return path
+
+    def blocked_run(self, calls):
+        """Stand-in for pipeline.run that waits for self.release."""
+        def run(folder, output_root, options, progress=None, io_slots=None):
+            calls.append((folder, io_slots))
+            self.release.wait(10)
+            return {"organized": 0, "duplicates": 0, "results": []}
+        return run
+
+    def test_submit_poll_and_results(self):
+        folder = self.folder("in")
+        for name in ["acta_reunion.pdf", "copia.pdf"]:
+            with open(os.path.join(folder, name), 'w') as f:
+                f.write("SAME")
+        manager = self.manager()
+        job = manager.submit(folder, {"validate": False})
+        wait_for(lambda: job.status in ("done", "failed"))
+
+        self.assertEqual(job.status, "done", job.error)
+        status = job.to_dict()
+        self.assertEqual(status["progress"], {"done": 2, "total": 2})
+        self.assertEqual(status["summary"]["duplicates"], 1)
+        self.assertNotIn("results", status["summary"])
+        self.assertEqual(len(job.summary["results"]), 2)
+        self.assertTrue(os.path.exists(os.path.join(job.output_root, "manifest.json")))
+
+    def test_rejects_missing_and_busy_folders(self):
+        manager = self.manager()
+        with self.assertRaises(ValueError):
+            manager.submit(os.path.join(self.test_dir, "missing"), {})
+        folder = self.folder("in")
+        calls = []
+        with mock.patch.object(pipeline, 'run', self.blocked_run(calls)):
+            first = manager.submit(folder, {})
+            wait_for(lambda: first.status == "running")
+            with self.assertRaises(RuntimeError):
+                manager.submit(folder, {})
+            self.release.set()
+            wait_for(lambda: first.status == "done")
+        # A finished folder can be submitted again
+        self.assertIsNot(manager.submit(folder, {"dry_run": True}), first)
+
+    def test_max_jobs_and_shared_io_slots(self):
+        manager = self.manager(max_jobs=1, io_concurrency=3)
+        calls = []
+        with mock.patch.object(pipeline, 'run', self.blocked_run(calls)):
+            first = manager.submit(self.folder("a"), {})
+            second = manager.submit(self.folder("b"), {})
+            wait_for(lambda: first.status == "running")
+            time.sleep(0.05)
+            self.assertEqual(second.status, "queued")
+            self.release.set()
+            wait_for(lambda: second.status == "done")
+
+        self.assertEqual(len(calls), 2)
+        for _, io_slots in calls:
+            self.assertIs(io_slots, manager.io_slots)
+        # One semaphore bounds file I/O across jobs
+        for _ in range(3):
+            self.assertTrue(manager.io_slots.acquire(blocking=False))
+        self.assertFalse(manager.io_slots.acquire(blocking=False))
+        for _ in range(3):
+            manager.io_slots.release()
+
+    def test_job_listing_is_a_snapshot(self):
+        manager = self.manager(max_jobs=1)
+        with mock.patch.object(pipeline, 'run', self.blocked_run([])):
+            job = manager.submit(self.folder("a"), {})
+            jobs = manager.list_jobs()
+            manager.submit(self.folder("b"), {})  # does not change the listing
+            self.assertEqual(jobs, [job])
+            self.assertIs(manager.get(job.id), job)
+            self.assertIsNone(manager.get("unknown"))
+            self.release.set()
+
+class TestRequestHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.release = threading.Event()
+        self.manager = service.JobManager(max_jobs=1)
+        self.server = service.make_server(self.manager, port=0)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        def run(folder, output_root, options, progress=None, io_slots=None):
+            self.release.wait(10)
+            return {"organized": 1, "duplicates": 0, "results": [{"original_path": folder}]}
+        self.patch = mock.patch.object(pipeline, 'run', run)
+        self.patch.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+        self.manager.shutdown()
+        self.patch.stop()
+        shutil.rmtree(self.test_dir)
+
+    def request(self, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.base + path, data=data), timeout=10) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_job_lifecycle_and_errors(self):
+        self.assertEqual(self.request("/jobs/unknown")[0], 404)
+        self.assertEqual(self.request("/nowhere")[0], 404)
+        self.assertEqual(self.request("/jobs", {"recursive": True})[0], 400)  # no folder
+        self.assertEqual(self.request("/jobs", {"folder": self.test_dir, "max_memory": "lots"})[0], 400)
+        self.assertEqual(self.request("/jobs", {"folder": self.test_dir, "max_memory": "1G", "isolate": False})[0], 400)
+        with mock.patch.dict(pipeline.MEMORY, {"max_memory_mb": 512}):
+            self.assertEqual(self.request("/jobs", {"folder": self.test_dir, "isolate": False})[0], 400)
+
+        status, job = self.request("/jobs", {"folder": self.test_dir, "dry_run": True, "workers": 2})
+        self.assertEqual(status, 202)
+        self.assertEqual(job["options"]["workers"], 2)
+        self.assertEqual(self.request("/jobs", {"folder": self.test_dir})[0], 409)  # already queued/running
+        self.assertEqual(self.request(f"/jobs/{job['id']}/results")[0], 409)
+
+        self.release.set()
+        wait_for(lambda: self.request(f"/jobs/{job['id']}")[1]["status"] == "done")
+        status, results = self.request(f"/jobs/{job['id']}/results")
+        self.assertEqual((status, results), (200, [{"original_path": self.test_dir}]))
+        self.assertEqual([j["id"] for j in self.request("/jobs")[1]], [job["id"]])
+
+if __name__ == '__main__':
+    unittest.main()
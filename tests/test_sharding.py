@@ -0,0 +1,113 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+import multiprocessing
+from doc_cleaner import sharding, scanner, pipeline, organizer, config
+
+SHARDS = 3
+
+def run_shard(root_path, dup_dir, index):
+    """One node of a sharded run (executed in its own process)."""
+    config.DUPLICATED_FOLDER_PATH = dup_dir
+    output_root = organizer.create_output_structure(root_path, f"test_shard{index}of{SHARDS}")
+    options = {"recursive": True, "shard": (index, SHARDS)}
+    pipeline.run(root_path, output_root, options)
+    return output_root
+
+class TestSharding(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def create_dummy_file(self, rel_path, content):
+        path = os.path.join(self.test_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_parse_shard(self):
+        self.assertEqual(sharding.parse_shard("2/4"), (2, 4))
+        for bad in ["0/4", "5/4", "a/b", "3"]:
+            with self.assertRaises(ValueError):
+                sharding.parse_shard(bad)
+
+    def test_shards_partition_files(self):
+        files = [os.path.join(self.test_dir, f"dir{i % 7}", f"file{i}.pdf") for i in range(200)]
+        selected = []
+        for index in range(1, SHARDS + 1):
+            selected.extend(sharding.select_shard(files, self.test_dir, index, SHARDS))
+        self.assertEqual(sorted(selected), sorted(files))
+
+    def test_parallel_shards_and_merge(self):
+        # Several copies of the same content spread over the tree, plus unique files
+        copies = [self.create_dummy_file(f"{d}/copy.pdf", "SAME") for d in ["a", "b", "c", "d", "e"]]
+        for i in range(10):
+            self.create_dummy_file(f"u{i}/unique{i}.pdf", f"UNIQUE_{i}")
+
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(SHARDS) as pool:
+            run_folders = pool.starmap(run_shard, [(self.test_dir, self.dup_dir, i) for i in range(1, SHARDS + 1)])
+
+        merged_dir = os.path.join(self.test_dir, "__merged")
+        summary = sharding.merge(run_folders, merged_dir)
+
+        with open(os.path.join(merged_dir, "manifest.json"), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.assertEqual(len(manifest), 15)
+
+        same = [e for e in manifest if e['original_path'] in copies]
+        kept = [e for e in same if not e['is_duplicate']]
+        # The first copy in the global order survives, regardless of which shard saw it
+        self.assertEqual([e['original_path'] for e in kept], [copies[0]])
+        self.assertEqual(len(os.listdir(self.dup_dir)), 4)
+        self.assertEqual(len([e for e in manifest if not e['is_duplicate']]), 11)
+        self.assertEqual(summary['errors'], 0)
+
+    def write_manifest(self, name, entries):
+        run = os.path.join(self.test_dir, name)
+        os.makedirs(run)
+        with open(os.path.join(run, "manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        return run
+
+    def shard_entry(self, scan_key, **fields):
+        path = self.create_dummy_file(scan_key, "SAME")
+        return {"original_path": path, "current_path": path, "scan_key": scan_key, "hash": "h1",
+                "is_duplicate": False, "topic": "GENERIC", **fields}
+
+    def test_merge_keeps_the_copy_an_unsharded_run_keeps(self):
+        # The walk lists root files before subfolders: z_copy.pdf is seen before a/copy.pdf
+        self.create_dummy_file("z_copy.pdf", "SAME")
+        self.create_dummy_file("a/copy.pdf", "SAME")
+        walk_order = [sharding.relative_key(p, self.test_dir) for p in scanner.scan_folder(self.test_dir)]
+        self.assertEqual(walk_order, ["z_copy.pdf", "a/copy.pdf"])
+
+        runs = [self.write_manifest("s1", [self.shard_entry("a/copy.pdf")]),
+                self.write_manifest("s2", [self.shard_entry("z_copy.pdf")])]
+        summary = sharding.merge(runs, os.path.join(self.test_dir, "__merged"))
+        kept = [e['scan_key'] for e in summary['results'] if not e['is_duplicate']]
+        self.assertEqual(kept, ["z_copy.pdf"])
+        self.assertEqual(sharding.order_for_sharding(
+            [os.path.join(self.test_dir, k) for k in ["a/copy.pdf", "z_copy.pdf"]], self.test_dir),
+            [os.path.join(self.test_dir, k) for k in walk_order])
+
+    def test_merge_never_keeps_an_entry_with_error(self):
+        runs = [self.write_manifest("s1", [self.shard_entry("a.pdf", error="EMPTY")]),
+                self.write_manifest("s2", [self.shard_entry("b.pdf")])]
+        summary = sharding.merge(runs, os.path.join(self.test_dir, "__merged"))
+        by_key = {e['scan_key']: e for e in summary['results']}
+        self.assertFalse(by_key["b.pdf"]['is_duplicate'])
+        self.assertTrue(by_key["a.pdf"]['is_duplicate'])
+        self.assertEqual(by_key["a.pdf"]['duplicate_of'], by_key["b.pdf"]['original_path'])
+
+if __name__ == '__main__':
+    unittest.main()
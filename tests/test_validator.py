@@ -0,0 +1,121 @@
+import unittest
+import os
+import shutil
+import tempfile
+import struct
+import zipfile
+from doc_cleaner import validator, pipeline, organizer, config
+
+def ole_file(streams, dir_sector=1, padding=b""):
+    """Minimal OLE compound file (512-byte sectors, FAT first) whose directory lists streams."""
+    fat_count = dir_sector // 128 + 1
+    header = bytearray(512)
+    header[:8] = validator.OLE_MAGIC
+    struct.pack_into('<HHH', header, 0x1A, 3, 0xFFFE, 9)  # version, byte order, sector shift
+    struct.pack_into('<II', header, 0x2C, fat_count, dir_sector)  # FAT sectors, first directory sector
+    struct.pack_into('<II', header, 0x44, 0xFFFFFFFE, 0)  # no DIFAT sectors
+    struct.pack_into('<109I', header, 0x4C, *range(fat_count), *[0xFFFFFFFF] * (109 - fat_count))
+    fat = [0xFFFFFFFF] * (128 * fat_count)
+    fat[:fat_count] = [0xFFFFFFFD] * fat_count
+    fat[dir_sector] = 0xFFFFFFFE
+    directory = bytearray(512)
+    for i, (name, entry_type) in enumerate([("Root Entry", 5)] + [(name, 2) for name in streams]):
+        encoded = name.encode('utf-16-le') + b"\0\0"
+        directory[i * 128:i * 128 + len(encoded)] = encoded
+        struct.pack_into('<HB', directory, i * 128 + 64, len(encoded), entry_type)
+    sectors = [struct.pack(f'<{len(fat)}I', *fat)] + [padding.ljust(512, b"\0")] * (dir_sector - fat_count)
+    return bytes(header) + b"".join(sectors) + bytes(directory)
+
+def pdf_file(objects, trailer, xref_stream=False):
+    """PDF with a classic xref table (or an xref stream object) pointed at by startxref."""
+    body = b"%PDF-1.7\n" + b"".join(objects)
+    offset = len(body)
+    if xref_stream:
+        data = b"x" * 6000  # stream data pushes the dictionary out of the last 4 KB
+        body += b"9 0 obj\n" + trailer + b"\nstream\n" + data + b"\nendstream\nendobj\n"
+    else:
+        body += b"xref\n0 2\n0000000000 65535 f \n0000000009 00000 n \ntrailer\n" + trailer + b"\n"
+    return body + b"startxref\n" + str(offset).encode() + b"\n%%EOF\n"
+
+class TestValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, filename, data):
+        path = os.path.join(self.test_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def write_package(self, filename, parts):
+        path = os.path.join(self.test_dir, filename)
+        with zipfile.ZipFile(path, 'w') as zf:
+            for part in parts:
+                zf.writestr(part, "<x/>")
+        return path
+
+    def test_pdf_checks(self):
+        body = b"%PDF-1.7\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+        self.assertIsNone(validator.sniff_file(self.write("ok.pdf", body)))
+        self.assertEqual(validator.sniff_file(self.write("cut.pdf", body[:20])), validator.TRUNCATED)
+        self.assertEqual(validator.sniff_file(self.write("locked.pdf", body.replace(b"trailer<<", b"trailer<</Encrypt 5 0 R"))),
+                         validator.ENCRYPTED)
+        self.assertEqual(validator.sniff_file(self.write("fake.pdf", b"hello")), validator.EXTENSION_MISMATCH)
+        self.assertEqual(validator.sniff_file(self.write("empty.pdf", b"")), validator.EMPTY_FILE)
+
+    def test_pdf_encrypt_is_read_from_the_trailer(self):
+        page = b"1 0 obj<</Length 20>>stream\n(see /Encrypt docs)\nendstream endobj\n"
+        self.assertIsNone(validator.sniff_file(self.write("plain.pdf", pdf_file([page], b"<</Root 1 0 R>>"))))
+        locked = pdf_file([page], b"<</Type/XRef/Root 1 0 R/Encrypt 5 0 R>>", xref_stream=True)
+        self.assertGreater(len(locked) - locked.index(b"/Encrypt"), 4096)
+        self.assertEqual(validator.sniff_file(self.write("stream.pdf", locked)), validator.ENCRYPTED)
+        self.assertIsNone(validator.sniff_file(self.write("open_stream.pdf",
+                                                          pdf_file([page], b"<</Type/XRef>>", xref_stream=True))))
+
+        # Linearized: /Encrypt only in the first-page trailer
+        first_page = (b"1 0 obj<</Linearized 1>>endobj\nxref\n0 1\n0000000000 65535 f \n"
+                      b"trailer\n<</Encrypt 5 0 R/ID[<ab><cd>]>>\n")
+        self.assertEqual(validator.sniff_file(self.write("linear.pdf", pdf_file([first_page, page], b"<<>>"))),
+                         validator.ENCRYPTED)
+
+    def test_ooxml_checks(self):
+        docx = self.write_package("ok.docx", ["[Content_Types].xml", "word/document.xml"])
+        self.assertIsNone(validator.sniff_file(docx))
+
+        xlsx_named_docx = self.write_package("wrong.docx", ["[Content_Types].xml", "xl/workbook.xml"])
+        self.assertEqual(validator.sniff_file(xlsx_named_docx), validator.PACKAGE_MISMATCH)
+
+        with open(docx, 'rb') as f:
+            data = f.read()
+        self.assertEqual(validator.sniff_file(self.write("cut.docx", data[:len(data) // 2])), validator.TRUNCATED)
+
+        encrypted = ole_file(["EncryptionInfo", "EncryptedPackage"])
+        self.assertEqual(validator.sniff_file(self.write("locked.xlsx", encrypted)), validator.ENCRYPTED)
+        # The directory is found through the FAT wherever it is, not by a byte search
+        far = ole_file(["EncryptionInfo"], dir_sector=200)
+        self.assertEqual(validator.sniff_file(self.write("far.xlsx", far)), validator.ENCRYPTED)
+        mentioned = ole_file(["WordDocument"], dir_sector=2, padding="EncryptionInfo".encode("utf-16-le"))
+        self.assertEqual(validator.sniff_file(self.write("legacy.docx", mentioned)), validator.EXTENSION_MISMATCH)
+        self.assertEqual(validator.sniff_file(self.write("legacy.pptx", validator.OLE_MAGIC + b"\0" * 100)),
+                         validator.EXTENSION_MISMATCH)
+        self.assertEqual(validator.sniff_file(self.write("pdf.docx", b"%PDF-1.4")), validator.EXTENSION_MISMATCH)
+
+    def test_run_validates_only_when_asked(self):
+        self.write("fake.pdf", b"hello")
+        original_dup_dir = config.DUPLICATED_FOLDER_PATH
+        config.DUPLICATED_FOLDER_PATH = self.test_dir
+        try:
+            output_root = organizer.create_output_structure(self.test_dir, "test_validate")
+            default = pipeline.run(self.test_dir, output_root, {"dry_run": True})
+            checked = pipeline.run(self.test_dir, output_root, {"dry_run": True, "validate": True})
+        finally:
+            config.DUPLICATED_FOLDER_PATH = original_dup_dir
+        self.assertNotIn('error', default['results'][0])
+        self.assertEqual(checked['results'][0]['error'], validator.EXTENSION_MISMATCH)
+
+if __name__ == '__main__':
+    unittest.main()
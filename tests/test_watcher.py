@@ -0,0 +1,83 @@
+import unittest
+import os
+import json
+import time
+import shutil
+import tempfile
+from doc_cleaner import watcher, reclassify, config
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dup_dir = tempfile.mkdtemp()
+        config.DUPLICATED_FOLDER_PATH = self.dup_dir
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.dup_dir)
+
+    def create_dummy_file(self, filename, content="test content"):
+        path = os.path.join(self.test_dir, filename)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_debouncer_waits_for_stable_file(self):
+        path = self.create_dummy_file("growing.pdf", "a")
+        debouncer = watcher.Debouncer(settle_seconds=0.2)
+        debouncer.touch(path)
+        self.assertEqual(debouncer.settled(), [])  # first stat only records the signature
+        with open(path, 'a') as f:
+            f.write("more")
+        self.assertEqual(debouncer.settled(), [])  # changed again
+        time.sleep(0.25)
+        self.assertEqual(debouncer.settled(), [path])
+        self.assertEqual(len(debouncer), 0)
+
+    def test_incremental_manifest_and_warm_hash_index(self):
+        w = watcher.Watcher(self.test_dir, use_inotify=False, settle_seconds=0)
+        p1 = self.create_dummy_file("first.pdf", "SAME")
+        p2 = self.create_dummy_file("second.pdf", "SAME")
+
+        self.assertFalse(w.handle_file(p1)['is_duplicate'])
+        self.assertTrue(w.handle_file(p2)['is_duplicate'])
+        self.assertTrue(os.path.exists(os.path.join(self.dup_dir, "second.pdf")))
+
+        with open(os.path.join(w.output_root, "manifest.jsonl"), encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([e['original_path'] for e in entries], [p1, p2])
+        w.close()
+
+    def test_polled_files_get_metrics_events_and_metadata(self):
+        events_path = os.path.join(self.dup_dir, "events.jsonl")
+        w = watcher.Watcher(self.test_dir, use_inotify=False, settle_seconds=0, poll_interval=0.01,
+                            options={"events": events_path})
+        self.assertIsInstance(w.source, watcher.PollingSource)
+        p1 = self.create_dummy_file("acta_reunion.pdf", "SAME")
+        p2 = self.create_dummy_file("copia.pdf", "SAME")
+        w.run_once(0)  # Seen
+        w.run_once(0)  # Settled and handled
+        w.close()
+
+        self.assertEqual((w.organized, w.duplicates), (1, 1))
+        with open(os.path.join(w.output_root, "manifest.jsonl"), encoding='utf-8') as f:
+            entries = {e['original_path']: e for e in map(json.loads, f)}
+        self.assertEqual(set(entries), {p1, p2})
+        self.assertTrue(entries[p2]['is_duplicate'])
+
+        with open(os.path.join(w.output_root, "metrics.json"), encoding='utf-8') as f:
+            stages = json.load(f)["stages"]
+        self.assertEqual(stages["hash"]["count"], 2)
+        self.assertEqual(stages["classify"]["count"], 1)
+        self.assertEqual(stages["extraction"]["count"], 1)
+
+        self.assertEqual(list(reclassify.load_metadata(w.output_root)), [p1])
+        with open(events_path, encoding='utf-8') as f:
+            kinds = [json.loads(line)["event"] for line in f]
+        self.assertIn("duplicate", kinds)
+        self.assertIn("moved", kinds)
+        self.assertEqual(kinds[-1], "run_finished")
+
+if __name__ == '__main__':
+    unittest.main()